@@ -18,6 +18,7 @@ import socket
 from monitor.collectors.gpu import GPUCollector
 from monitor.collectors.system import SystemCollector
 from monitor.collectors.network import NetworkCollector
+from monitor.collectors.disk import DiskCollector
 from monitor.storage.sqlite import MetricsStorage
 from monitor.alerting.rules import AlertEngine
 from monitor.cli.benchmark_cli import benchmark_cli
@@ -36,7 +37,10 @@ BANNER = f"""
 DEFAULT_CONFIG = {
     'cluster': {
         'name': 'Local System',
-        'nodes': []
+        'nodes': [],
+        'agent_host': '0.0.0.0',
+        'agent_port': 8091,
+        'node_timeout_seconds': 2
     },
     'monitoring': {
         'interval_seconds': 5,
@@ -94,8 +98,16 @@ def load_config(config_path: Optional[str]) -> dict:
     return config
 
 
-def collect_metrics() -> dict:
+# Kept across calls: CPU utilization, network and disk rates are deltas between two collections
+_sys_collector: Optional[SystemCollector] = None
+_net_collector: Optional[NetworkCollector] = None
+_disk_collector: Optional[DiskCollector] = None
+
+
+def collect_metrics(config: Optional[dict] = None) -> dict:
     """Collect metrics from local system."""
+    global _sys_collector, _net_collector, _disk_collector
+    monitoring = (config or {}).get('monitoring', {}) or {}
     metrics = {}
 
     try:
@@ -105,8 +117,9 @@ def collect_metrics() -> dict:
         metrics['gpus'] = [{'error': str(e)}]
 
     try:
-        sys_collector = SystemCollector()
-        sys_metrics = sys_collector.collect()
+        if _sys_collector is None:
+            _sys_collector = SystemCollector()
+        sys_metrics = _sys_collector.collect()
         metrics['system'] = sys_metrics
         # Ensure a hostname is present at top-level for header
         if 'hostname' in sys_metrics and sys_metrics['hostname']:
@@ -116,12 +129,23 @@ def collect_metrics() -> dict:
 
     # Optionally collect network metrics if collector exists
     try:
-        from monitor.collectors.network import NetworkCollector
-        net_collector = NetworkCollector()
-        metrics['network'] = net_collector.collect()
+        if _net_collector is None:
+            _net_collector = NetworkCollector(exclude=monitoring.get('network_exclude'))
+        metrics['network'] = _net_collector.collect()
     except Exception:
         pass
 
+    try:
+        if _disk_collector is None:
+            _disk_collector = DiskCollector(
+                devices=monitoring.get('disk_devices'),
+                mounts=monitoring.get('disk_mounts'),
+                statfs_timeout=monitoring.get('disk_statfs_timeout_seconds', 1.0),
+            )
+        metrics['disk'] = _disk_collector.collect()
+    except Exception as e:
+        metrics['disk'] = {'error': str(e)}
+
     return metrics
 
 
@@ -219,8 +243,27 @@ async def run_web_server(config: dict):
         console.print("[yellow]Install fastapi and uvicorn for web dashboard support.[/yellow]")
 
 
+async def run_agent_server(config: dict):
+    try:
+        from monitor.api.agent import create_agent_app
+        import uvicorn
+
+        app = create_agent_app(config)
+        host, port = config['cluster']['agent_host'], config['cluster']['agent_port']
+
+        console.print(f"[green]Serving local snapshot at http://{host}:{port}/api/agent/snapshot[/green]")
+
+        uvicorn_config = uvicorn.Config(app, host=host, port=port, log_level="warning")
+        server = uvicorn.Server(uvicorn_config)
+        await server.serve()
+
+    except ImportError as e:
+        console.print(f"[yellow]Warning: Could not start agent: {e}[/yellow]")
+        console.print("[yellow]Install fastapi and uvicorn for agent mode.[/yellow]")
+
+
 async def run_cli_monitor(config: dict):
-    storage = MetricsStorage(config['storage']['path'])
+    storage = MetricsStorage.from_config(config)
     await storage.initialize()
 
     alert_engine = AlertEngine(config.get('alerts', {}))
@@ -245,7 +288,7 @@ async def run_cli_monitor(config: dict):
         # inner renderables (Text and Table). We create mutable Text
         # objects for header/system/footer so updating their contents does
         # not recreate the top-level panels, minimizing redraw flicker.
-        initial_metrics = collect_metrics()
+        initial_metrics = collect_metrics(config)
         initial_alerts = alert_engine.check(initial_metrics)
 
         dashboard = Layout()
@@ -333,9 +376,10 @@ async def run_cli_monitor(config: dict):
 
             while True:
                 try:
-                    metrics = collect_metrics()
+                    metrics = collect_metrics(config)
 
                     alerts = alert_engine.check(metrics)
+                    storage.queue_alert_transitions(alert_engine.drain_transitions())
 
                     await storage.store(metrics)
 
@@ -381,8 +425,9 @@ async def run_cli_monitor(config: dict):
                     fixed_console.print(f"[red]Error: {e}[/red]")
                     await asyncio.sleep(5)
     finally:
-        # Clean exit from CLI loop (no global console mutation to restore)
-        pass
+        # Clean exit from CLI loop (no global console mutation to restore);
+        # close storage so buffered metrics are flushed
+        storage.close()
 
 
 def _run_app(config_path, port, nodes, once, web_mode=False, cli_mode=False):
@@ -453,7 +498,7 @@ def _run_app(config_path, port, nodes, once, web_mode=False, cli_mode=False):
         cfg['web']['port'] = port
     
     if nodes:
-        cfg['cluster']['nodes'] = [{'hostname': n.strip()} for n in nodes.split(',')]
+        cfg['cluster']['nodes'] = [{'hostname': n.strip()} for n in nodes.split(',') if n.strip()]
 
     if once:
         metrics = collect_metrics()
@@ -588,8 +633,9 @@ def cli(ctx, config, port, update, admin):
 @cli.command()
 @click.option('--port', '-p', type=int, help='Web server port (overrides config).')
 @click.option('--admin', is_flag=True, help='Start web server in administrative mode (enables privileged actions).')
+@click.option('--nodes', help='Comma-separated agents to aggregate, host or host:port (overrides cluster.nodes).')
 @click.pass_context
-def web(ctx, port, admin):
+def web(ctx, port, admin, nodes):
     """Launch the web dashboard."""
     # If called as a subcommand with --admin, ensure argv contains --admin so server detection sees it
     import sys
@@ -602,7 +648,23 @@ def web(ctx, port, admin):
                 sys.argv.append('--admin')
     except Exception:
         pass
-    _run_app(ctx.obj['config_path'], port, nodes=None, once=False, web_mode=True)
+    _run_app(ctx.obj['config_path'], port, nodes=nodes, once=False, web_mode=True)
+
+@cli.command()
+@click.option('--port', '-p', type=int, help='Agent port (default: cluster.agent_port, 8091).')
+@click.option('--host', help='Bind address (default: cluster.agent_host, 0.0.0.0).')
+@click.pass_context
+def agent(ctx, port, host):
+    """Serve this node's snapshot to a cluster aggregator."""
+    cfg = load_config(ctx.obj['config_path'])
+    if port is not None:
+        cfg['cluster']['agent_port'] = port
+    if host:
+        cfg['cluster']['agent_host'] = host
+    try:
+        asyncio.run(run_agent_server(cfg))
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Shutting down...[/yellow]")
 
 @cli.command(name="cli")
 @click.pass_context
@@ -610,6 +672,55 @@ def term(ctx):
     """Launch the interactive terminal dashboard."""
     _run_app(ctx.obj['config_path'], port=None, nodes=None, once=False, cli_mode=True)
 
+@cli.command(name="export-history")
+@click.argument('dest', type=click.Path())
+@click.option('--format', 'fmt', type=click.Choice(['parquet', 'arrow', 'npz']), help='File format (default: parquet with pyarrow, else npz).')
+@click.option('--hours', type=float, help='Only the last N hours (default: everything stored).')
+@click.option('--host', 'hostname', help='Only this hostname.')
+@click.pass_context
+def export_history_cmd(ctx, dest, fmt, hours, hostname):
+    """Export metrics history as one columnar file per series."""
+    from monitor.storage import columnar
+    config = load_config(ctx.obj['config_path'])
+
+    async def run():
+        storage = MetricsStorage.from_config(config)
+        await storage.initialize()
+        try:
+            return await asyncio.to_thread(columnar.export_history, storage, dest, fmt, hours, hostname)
+        finally:
+            storage.close()
+
+    try:
+        manifest = asyncio.run(run())
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    console.print(f"[green]Exported {manifest['rows']:,} samples in {len(manifest['series'])} series "
+                  f"({manifest['format']}) to {dest}[/green]")
+
+@cli.command(name="import-history")
+@click.argument('src', type=click.Path(exists=True))
+@click.option('--host', 'hostname', help='Store every series under this hostname instead of the exported one.')
+@click.pass_context
+def import_history_cmd(ctx, src, hostname):
+    """Backfill metrics history from an export directory or zip (stop the web server first)."""
+    from monitor.storage import columnar
+    config = load_config(ctx.obj['config_path'])
+
+    async def run():
+        storage = MetricsStorage.from_config(config)
+        await storage.initialize()
+        try:
+            return await columnar.import_history(storage, src, hostname)
+        finally:
+            storage.close()
+
+    try:
+        summary = asyncio.run(run())
+    except (ValueError, KeyError, OSError) as e:
+        raise click.ClickException(str(e))
+    console.print(f"[green]Imported {summary['rows']:,} samples in {summary['series']} series[/green]")
+
 @cli.command()
 def refresh():
     """Refresh feature detection cache (run after installing GPU libraries)."""
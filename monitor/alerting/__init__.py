@@ -1,3 +1,4 @@
 from .rules import AlertEngine
+from .store import AlertStore
 
-__all__ = ['AlertEngine']
+__all__ = ['AlertEngine', 'AlertStore']
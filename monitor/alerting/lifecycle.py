@@ -0,0 +1,179 @@
+"""Alert lifecycle: pending -> firing -> resolved, with dedup by fingerprint.
+
+Maintenance:
+- Purpose: turn per-tick rule matches (``RuleTable.evaluate``) into
+  long-lived alerts. An alert is identified by its fingerprint, a hash of
+  hostname and rendered alert name (which includes the GPU index), so the
+  same condition seen on consecutive ticks or twice in one tick is one alert.
+- States: a breach starts a *pending* alert; it becomes *firing* once the
+  breach has lasted the rule's ``for_seconds`` (immediately when 0). A
+  pending alert whose breach clears is dropped silently. A firing alert
+  stays firing while the value is inside the rule's hysteresis band and
+  *resolves* once it leaves it (or the GPU/host stops reporting).
+- Groups: within one host/GPU and rule group, the most severe candidate is
+  always tracked, and a less severe one only while no more severe alert is
+  firing (or firing this tick). So temperature warn keeps firing during
+  critical's ``for`` window, and resolves once critical fires.
+- Persistence: only transitions (fired, resolved) are queued, for the
+  caller to write in batches (``MetricsStorage.queue_alert_transitions``).
+  The queue is bounded so a caller that never drains it (CLI mode) cannot
+  grow memory.
+- Debug: ``AlertTracker.states()`` lists pending and firing alerts with
+  their start times.
+"""
+
+import hashlib
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from .rule_table import SEVERITY_RANK, Rule
+
+
+def fingerprint(hostname: str, name: str) -> str:
+    """Stable identity of one alert across ticks and restarts."""
+    return hashlib.sha1(f'{hostname}\x00{name}'.encode()).hexdigest()[:16]
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts).isoformat()
+
+
+class AlertState:
+    """One pending or firing alert."""
+
+    __slots__ = ('fingerprint', 'rule', 'hostname', 'index', 'name', 'state',
+                 'started', 'fired_at', 'value', 'alert')
+
+    def __init__(self, fp: str, rule: Rule, hostname: str, index: Optional[int], name: str, now: float):
+        self.fingerprint = fp
+        self.rule = rule
+        self.hostname = hostname
+        self.index = index
+        self.name = name
+        self.state = 'pending'
+        self.started = now
+        self.fired_at: Optional[float] = None
+        self.value: Optional[float] = None
+        self.alert: Optional[Dict[str, Any]] = None
+
+    def message(self) -> str:
+        return self.rule.message.format(index=self.index, value=self.value, hostname=self.hostname)
+
+    def record(self, state: str, timestamp: str) -> Dict[str, Any]:
+        """Transition record, in the shape the alerts table stores."""
+        return {
+            'fingerprint': self.fingerprint,
+            'state': state,
+            'timestamp': self.alert['fired_at'],
+            'hostname': self.hostname,
+            'name': self.name,
+            'severity': self.rule.severity,
+            'gpu_index': self.index,
+            'message': self.alert['message'],
+            'resolved_at': timestamp if state == 'resolved' else None,
+        }
+
+
+class AlertTracker:
+    """Stateful alert evaluation on top of per-tick rule matches."""
+
+    def __init__(self, max_transitions: int = 10000):
+        self._states: Dict[str, AlertState] = {}
+        self._names: Dict[Tuple[str, Optional[int], str], Tuple[str, str]] = {}
+        self._transitions: Deque[Dict[str, Any]] = deque(maxlen=max_transitions)
+
+    def update(self, matches: Iterable[Tuple[int, Optional[int], Rule, float, bool]],
+               hostnames: List[str], now: float) -> List[Dict[str, Any]]:
+        """Advance every alert of ``hostnames`` by one tick; returns the firing alerts.
+
+        Alerts of hosts not in ``hostnames`` are left untouched, so hosts can
+        be evaluated in separate calls.
+        """
+        # Candidates: breaches, plus in-band values that keep an alert alive
+        candidates = []
+        best: Dict[Tuple[str, Optional[int], str], int] = {}
+        # most severe candidate per group that is firing or fires this tick
+        best_firing: Dict[Tuple[str, Optional[int], str], int] = {}
+        for pos, index, rule, value, breached in matches:
+            hostname = hostnames[pos]
+            name, fp = self._identity(rule, index, hostname)
+            state = self._states.get(fp)
+            if not breached and (state is None or state.state != 'firing'):
+                continue
+            group = (hostname, index, rule.group)
+            rank = SEVERITY_RANK[rule.severity]
+            if rank > best.get(group, -1):
+                best[group] = rank
+            started = now if state is None else state.started
+            if (state is not None and state.state == 'firing') or now - started >= rule.for_seconds:
+                if rank > best_firing.get(group, -1):
+                    best_firing[group] = rank
+            candidates.append((group, rank, fp, name, index, rule, value, hostname))
+
+        timestamp = _iso(now)
+        firing = []
+        seen: Set[str] = set()
+        for group, rank, fp, name, index, rule, value, hostname in candidates:
+            # a pending candidate does not displace a less severe firing one
+            if (rank < best[group] and rank < best_firing.get(group, -1)) or fp in seen:
+                continue
+            seen.add(fp)
+            state = self._states.get(fp)
+            if state is None:
+                state = self._states[fp] = AlertState(fp, rule, hostname, index, name, now)
+            changed = state.value != value
+            state.value = value
+
+            if state.state == 'pending' and now - state.started >= rule.for_seconds:
+                state.state = 'firing'
+                state.fired_at = now
+                state.alert = {
+                    'timestamp': timestamp,
+                    'hostname': hostname,
+                    'name': name,
+                    'gpu_index': index,
+                    'severity': rule.severity,
+                    'message': state.message(),
+                    'state': 'firing',
+                    'fingerprint': fp,
+                    'fired_at': timestamp,
+                }
+                self._transitions.append(state.record('firing', timestamp))
+            elif state.state == 'firing':
+                state.alert['timestamp'] = timestamp
+                if changed:
+                    state.alert['message'] = state.message()
+
+            if state.state == 'firing':
+                firing.append(state.alert)
+
+        evaluated = set(hostnames)
+        for fp in [fp for fp, s in self._states.items() if fp not in seen and s.hostname in evaluated]:
+            state = self._states.pop(fp)
+            if state.state == 'firing':
+                self._transitions.append(state.record('resolved', timestamp))
+        return firing
+
+    def _identity(self, rule: Rule, index: Optional[int], hostname: str) -> Tuple[str, str]:
+        key = (rule.name, index, hostname)
+        identity = self._names.get(key)
+        if identity is None:
+            if len(self._names) > 100000:
+                self._names.clear()
+            name = rule.name.format(index=index, hostname=hostname)
+            identity = self._names[key] = (name, fingerprint(hostname, name))
+        return identity
+
+    def drain_transitions(self) -> List[Dict[str, Any]]:
+        """Transitions since the last call, oldest first."""
+        drained = list(self._transitions)
+        self._transitions.clear()
+        return drained
+
+    def states(self) -> List[Dict[str, Any]]:
+        return [
+            {'fingerprint': s.fingerprint, 'hostname': s.hostname, 'name': s.name, 'state': s.state,
+             'severity': s.rule.severity, 'since': _iso(s.started), 'value': s.value}
+            for s in self._states.values()
+        ]
@@ -0,0 +1,297 @@
+"""Declarative alert rules compiled into a vectorized evaluation table.
+
+Maintenance:
+- Purpose: rules are data (metric selector, comparator, threshold,
+  severity), declared under ``alerts.rules`` in the config. They are
+  compiled once into parallel arrays. Each tick, every GPU of every host
+  is checked in one NumPy pass (one column per rule) rather than a
+  Python branch per threshold per GPU. Alert lifecycle (pending, firing,
+  resolved) lives in ``lifecycle.py``.
+- Defaults: without ``alerts.rules`` the classic threshold keys
+  (``gpu_temperature_warn``, ``cpu_usage_warn``, ...) are turned into the
+  equivalent rule list (``legacy_rules``), so existing configs keep working.
+- Hysteresis: each rule has a breach threshold and a clear threshold
+  ``hysteresis`` units back. The pass reports every value inside the hold
+  band and flags the ones past the breach threshold; the alert engine
+  decides what that means given which alerts are already firing.
+- Groups: rules sharing a ``group`` (e.g. temperature warn/critical) only
+  report the most severe one for a given GPU or host (resolved in
+  ``AlertEngine``, since it depends on alert state).
+- Missing metrics evaluate as NaN and never fire. GPUs reporting an
+  ``error`` go through the pass like the others (their readings are
+  missing) and their matches are dropped afterwards, which is cheaper than
+  filtering every GPU up front. Without NumPy the same compiled table is
+  evaluated with plain Python loops.
+- Debug: ``RuleTable.from_config(cfg).rules`` shows the compiled rules;
+  ``scripts/bench_alert_rules.py`` times a 1,000 host x 8 GPU pass.
+"""
+
+import math
+import operator
+from bisect import bisect_right
+from itertools import accumulate, chain, compress, repeat
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+SCOPES = ('gpu', 'system')
+SEVERITY_RANK = {'info': 0, 'warning': 1, 'critical': 2}
+
+# Comparator -> (python operator, numpy ufunc name)
+COMPARATORS = {
+    '>': (operator.gt, 'greater'),
+    '>=': (operator.ge, 'greater_equal'),
+    '<': (operator.lt, 'less'),
+    '<=': (operator.le, 'less_equal'),
+    '==': (operator.eq, 'equal'),
+    '!=': (operator.ne, 'not_equal'),
+}
+
+
+@dataclass(frozen=True)
+class Rule:
+    """One declarative threshold rule.
+
+    ``metric`` is ``<scope>.<field>``, where scope is ``gpu`` (evaluated per
+    GPU) or ``system`` (per host). ``name`` and ``message`` are format
+    strings with ``{index}`` (GPU rules), ``{value}`` and ``{hostname}``.
+    ``for_seconds`` is how long the threshold must stay breached before the
+    alert fires; ``hysteresis`` is how far back it must go to resolve.
+    """
+    name: str
+    metric: str
+    op: str
+    threshold: float
+    severity: str = 'warning'
+    message: str = ''
+    group: str = ''
+    for_seconds: float = 0.0
+    hysteresis: float = 0.0
+
+    @property
+    def scope(self) -> str:
+        return self.metric.split('.', 1)[0]
+
+    @property
+    def field(self) -> str:
+        return self.metric.split('.', 1)[1]
+
+    @property
+    def clear_threshold(self) -> float:
+        """Where a firing alert resolves: ``hysteresis`` back inside the threshold."""
+        if self.op in ('>', '>='):
+            return self.threshold - self.hysteresis
+        if self.op in ('<', '<='):
+            return self.threshold + self.hysteresis
+        return self.threshold
+
+    @classmethod
+    def from_dict(cls, spec: Dict[str, Any]) -> 'Rule':
+        metric = str(spec['metric'])
+        op = str(spec.get('op', '>='))
+        if '.' not in metric or metric.split('.', 1)[0] not in SCOPES:
+            raise ValueError(f"alert rule metric must be gpu.<field> or system.<field>: {metric!r}")
+        if op not in COMPARATORS:
+            raise ValueError(f"unknown alert rule comparator {op!r}")
+        severity = str(spec.get('severity', 'warning'))
+        if severity not in SEVERITY_RANK:
+            raise ValueError(f"unknown alert severity {severity!r}")
+        name = str(spec.get('name') or metric.replace('.', '_'))
+        return cls(
+            name=name,
+            metric=metric,
+            op=op,
+            threshold=float(spec['threshold']),
+            severity=severity,
+            message=str(spec.get('message') or f"{metric} {op} {spec['threshold']}: {{value}}"),
+            group=str(spec.get('group') or name),
+            for_seconds=parse_duration(spec.get('for', 0)),
+            hysteresis=float(spec.get('hysteresis', 0) or 0),
+        )
+
+
+def parse_duration(value: Any) -> float:
+    """Seconds from a number or a string such as ``'90'``, ``'30s'``, ``'5m'`` or ``'1h'``."""
+    if value is None or value == '':
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().lower()
+    units = {'s': 1, 'm': 60, 'h': 3600}
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def legacy_rules(config: Dict[str, Any]) -> List[Rule]:
+    """Rules equivalent to the classic ``alerts`` threshold keys.
+
+    ``alerts.for`` and ``alerts.hysteresis`` (default 2 units, i.e. °C or
+    percentage points) apply to all of them.
+    """
+    rules = [
+        Rule('gpu_{index}_temp_critical', 'gpu.temperature', '>=',
+             config.get('gpu_temperature_critical', 90), 'critical',
+             'GPU {index} temperature critical: {value:g}°C', 'gpu_temp'),
+        Rule('gpu_{index}_temp_warn', 'gpu.temperature', '>=',
+             config.get('gpu_temperature_warn', 80), 'warning',
+             'GPU {index} temperature warning: {value:g}°C', 'gpu_temp'),
+        Rule('gpu_{index}_memory_high', 'gpu.memory_percent', '>=',
+             config.get('gpu_memory_usage_warn', 90), 'warning',
+             'GPU {index} memory usage high: {value:.0f}%', 'gpu_memory'),
+        Rule('gpu_{index}_idle', 'gpu.utilization', '<',
+             config.get('gpu_utilization_low', 10), 'info',
+             'GPU {index} appears idle: {value:g}% utilization', 'gpu_idle'),
+        Rule('cpu_high', 'system.cpu_percent', '>=',
+             config.get('cpu_usage_warn', 90), 'warning',
+             'CPU usage very high: {value:.0f}%', 'cpu'),
+        Rule('memory_high', 'system.memory_percent', '>=',
+             config.get('memory_usage_warn', 90), 'critical',
+             'System memory nearly exhausted: {value:.0f}%', 'memory'),
+        Rule('disk_high', 'system.disk_percent', '>=',
+             config.get('disk_usage_warn', 90), 'warning',
+             'Disk space running low: {value:.0f}%', 'disk'),
+    ]
+    for_seconds = parse_duration(config.get('for', 0))
+    hysteresis = float(config.get('hysteresis', 2.0))
+    return [replace(rule, for_seconds=for_seconds, hysteresis=hysteresis) for rule in rules]
+
+
+def _as_float(value) -> float:
+    try:
+        return float(value) if value is not None else math.nan
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _column(items: List[Dict[str, Any]], field: str):
+    """One metric across all targets, as a float array (NaN where missing)."""
+    if NUMPY_AVAILABLE:
+        try:
+            return np.fromiter(map(dict.get, items, repeat(field)), dtype=np.float64, count=len(items))
+        except (TypeError, ValueError):
+            # Missing (None) or non-numeric values: convert one by one
+            return np.array([_as_float(item.get(field)) for item in items], dtype=np.float64)
+    return [_as_float(item.get(field)) for item in items]
+
+
+def _memory_percent(items: List[Dict[str, Any]]):
+    used, total = _column(items, 'memory_used'), _column(items, 'memory_total')
+    if NUMPY_AVAILABLE:
+        used = np.nan_to_num(used)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(total > 0, used / total * 100, 0.0)
+    return [(0.0 if math.isnan(u) else u) / t * 100 if t > 0 else 0.0 for u, t in zip(used, total)]
+
+
+# Fields computed from several raw ones
+DERIVED = {
+    'memory_percent': _memory_percent,
+}
+
+
+class _ScopeTable:
+    """Compiled rules of one scope: a column per distinct metric and per rule."""
+
+    def __init__(self, rules: List[Rule]):
+        self.rules = rules
+        self.fields = list(dict.fromkeys(r.field for r in rules))
+        self.columns = [self.fields.index(r.field) for r in rules]
+        self.ops = [r.op for r in rules]
+        self.thresholds = [r.threshold for r in rules]
+        self.clear_thresholds = [r.clear_threshold for r in rules]
+        if NUMPY_AVAILABLE and rules:
+            self._columns = np.array(self.columns, dtype=np.intp)
+            self._thresholds = np.array(self.thresholds, dtype=np.float64)
+            self._clear_thresholds = np.array(self.clear_thresholds, dtype=np.float64)
+            self._op_columns = [
+                (getattr(np, COMPARATORS[op][1]), np.array([i for i, o in enumerate(self.ops) if o == op], dtype=np.intp))
+                for op in dict.fromkeys(self.ops)
+            ]
+
+    def match(self, items: List[Dict[str, Any]]) -> List[Tuple[int, int, float, bool]]:
+        """``(row, rule, value, breached)`` for every rule within its hold band on ``items``.
+
+        ``breached`` is True past the threshold itself; False means the value
+        is only inside the hysteresis band (it keeps a firing alert alive but
+        cannot start one).
+        """
+        if not self.rules or not items:
+            return []
+        columns = [DERIVED[f](items) if f in DERIVED else _column(items, f) for f in self.fields]
+        if NUMPY_AVAILABLE:
+            return self._match_numpy(np.column_stack(columns))
+        return self._match_python(columns)
+
+    def _match_numpy(self, values) -> List[Tuple[int, int, float, bool]]:
+        x = values[:, self._columns]  # targets x rules
+        hold = np.zeros(x.shape, dtype=bool)
+        breached = np.zeros(x.shape, dtype=bool)
+        with np.errstate(invalid='ignore'):
+            for compare, cols in self._op_columns:
+                hold[:, cols] = compare(x[:, cols], self._clear_thresholds[cols])
+                breached[:, cols] = compare(x[:, cols], self._thresholds[cols])
+        hold &= ~np.isnan(x)
+        rows, rules = np.nonzero(hold)
+        return list(zip(rows.tolist(), rules.tolist(), x[rows, rules].tolist(), breached[rows, rules].tolist()))
+
+    def _match_python(self, columns) -> List[Tuple[int, int, float, bool]]:
+        matched = []
+        for i, (col, op) in enumerate(zip(self.columns, self.ops)):
+            values = columns[col]
+            compare = COMPARATORS[op][0]
+            hold = map(compare, values, repeat(self.clear_thresholds[i]))
+            for row in compress(range(len(values)), hold):
+                value = values[row]
+                if value == value:  # NaN never matches
+                    matched.append((row, i, value, compare(value, self.thresholds[i])))
+        matched.sort()  # same row-major order as the NumPy path
+        return matched
+
+
+class RuleTable:
+    """All rules, compiled per scope, evaluated over many hosts at once."""
+
+    def __init__(self, rules: List[Rule]):
+        self.rules = list(rules)
+        self.gpu = _ScopeTable([r for r in self.rules if r.scope == 'gpu'])
+        self.system = _ScopeTable([r for r in self.rules if r.scope == 'system'])
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'RuleTable':
+        """Compile ``alerts.rules`` if present, else the classic threshold keys."""
+        specs: Optional[List[Dict[str, Any]]] = config.get('rules')
+        if specs:
+            return cls([Rule.from_dict(spec) for spec in specs])
+        return cls(legacy_rules(config))
+
+    def evaluate(self, hosts: List[Dict[str, Any]]) -> List[Tuple[int, Optional[int], Rule, float, bool]]:
+        """Match every rule against every host in one pass per scope.
+
+        Returns ``(host position, gpu index or None, rule, value, breached)``
+        tuples; see ``_ScopeTable.match``. Group precedence is left to the
+        caller, which knows which alerts are already firing.
+        """
+        results = []
+        if self.gpu.rules:
+            per_host = [metrics.get('gpus', ()) for metrics in hosts]
+            gpus = list(chain.from_iterable(per_host))
+            # row -> host position is only looked up for matched rows
+            ends = list(accumulate(map(len, per_host)))
+            for row, i, value, breached in self.gpu.match(gpus):
+                gpu = gpus[row]
+                if 'error' in gpu:
+                    continue
+                results.append((bisect_right(ends, row), gpu.get('index', 0), self.gpu.rules[i], value, breached))
+
+        if self.system.rules:
+            systems = [metrics.get('system') or {} for metrics in hosts]
+            for pos, i, value, breached in self.system.match(systems):
+                results.append((pos, None, self.system.rules[i], value, breached))
+        return results
@@ -1,106 +1,39 @@
-from datetime import datetime
-from typing import Dict, Any, List
+import time
+from typing import Dict, Any, List, Optional
+
+from .lifecycle import AlertTracker
+from .rule_table import RuleTable
 
 
 class AlertEngine:
-    """Evaluates metrics against alert thresholds."""
+    """Evaluates metrics against alert rules.
+    
+    Rules come from ``alerts.rules`` in the config, or from the classic
+    threshold keys when none are declared; see rule_table.py. Alerts go
+    through pending/firing/resolved states (lifecycle.py), so a value
+    hovering at a threshold does not flap.
+    """
     
     def __init__(self, config: Dict[str, Any]):
         self.config = config
+        self.rules = RuleTable.from_config(config)
+        self.tracker = AlertTracker()
         self.active_alerts = []
     
-    def check(self, metrics: Dict[str, Any]) -> List[Dict[str, Any]]:
-        alerts = []
-        hostname = metrics.get('hostname', 'unknown')
-        timestamp = datetime.now().isoformat()
-        
-        for gpu in metrics.get('gpus', []):
-            if 'error' in gpu:
-                continue
-            
-            gpu_index = gpu.get('index', 0)
-            
-            temp = gpu.get('temperature', 0)
-            temp_critical = self.config.get('gpu_temperature_critical', 90)
-            temp_warn = self.config.get('gpu_temperature_warn', 80)
-            
-            if temp >= temp_critical:
-                alerts.append({
-                    'timestamp': timestamp,
-                    'hostname': hostname,
-                    'name': f'gpu_{gpu_index}_temp_critical',
-                    'severity': 'critical',
-                    'message': f'GPU {gpu_index} temperature critical: {temp}°C',
-                })
-            elif temp >= temp_warn:
-                alerts.append({
-                    'timestamp': timestamp,
-                    'hostname': hostname,
-                    'name': f'gpu_{gpu_index}_temp_warn',
-                    'severity': 'warning',
-                    'message': f'GPU {gpu_index} temperature warning: {temp}°C',
-                })
-            
-            mem_used = gpu.get('memory_used', 0)
-            mem_total = gpu.get('memory_total', 1)
-            mem_pct = (mem_used / mem_total * 100) if mem_total > 0 else 0
-            mem_warn = self.config.get('gpu_memory_usage_warn', 90)
-            
-            if mem_pct >= mem_warn:
-                alerts.append({
-                    'timestamp': timestamp,
-                    'hostname': hostname,
-                    'name': f'gpu_{gpu_index}_memory_high',
-                    'severity': 'warning',
-                    'message': f'GPU {gpu_index} memory usage high: {mem_pct:.0f}%',
-                })
-            
-            util = gpu.get('utilization', 0)
-            util_low = self.config.get('gpu_utilization_low', 10)
-            
-            if util < util_low:
-                alerts.append({
-                    'timestamp': timestamp,
-                    'hostname': hostname,
-                    'name': f'gpu_{gpu_index}_idle',
-                    'severity': 'info',
-                    'message': f'GPU {gpu_index} appears idle: {util}% utilization',
-                })
-        
-        sys_metrics = metrics.get('system', {})
-        
-        cpu_pct = sys_metrics.get('cpu_percent', 0)
-        if cpu_pct >= 95:
-            alerts.append({
-                'timestamp': timestamp,
-                'hostname': hostname,
-                'name': 'cpu_high',
-                'severity': 'warning',
-                'message': f'CPU usage very high: {cpu_pct:.0f}%',
-            })
-        
-        mem_pct = sys_metrics.get('memory_percent', 0)
-        if mem_pct >= 95:
-            alerts.append({
-                'timestamp': timestamp,
-                'hostname': hostname,
-                'name': 'memory_high',
-                'severity': 'critical',
-                'message': f'System memory nearly exhausted: {mem_pct:.0f}%',
-            })
-        
-        disk_pct = sys_metrics.get('disk_percent', 0)
-        if disk_pct >= 90:
-            alerts.append({
-                'timestamp': timestamp,
-                'hostname': hostname,
-                'name': 'disk_high',
-                'severity': 'warning',
-                'message': f'Disk space running low: {disk_pct:.0f}%',
-            })
-        
+    def check(self, metrics: Dict[str, Any], now: Optional[float] = None) -> List[Dict[str, Any]]:
+        return self.check_many([metrics], now)
+    
+    def check_many(self, hosts: List[Dict[str, Any]], now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Evaluate every GPU of every host in one pass; returns the firing alerts."""
+        hostnames = [metrics.get('hostname', 'unknown') for metrics in hosts]
+        alerts = self.tracker.update(self.rules.evaluate(hosts), hostnames,
+                                     time.time() if now is None else now)
         self.active_alerts = alerts
         return alerts
     
+    def drain_transitions(self) -> List[Dict[str, Any]]:
+        """Fired/resolved transitions since the last call, for batched persistence."""
+        return self.tracker.drain_transitions()
+    
     def get_active_alerts(self) -> List[Dict[str, Any]]:
         return self.active_alerts
@@ -0,0 +1,136 @@
+"""Bounded in-memory alert event store with cursor reads.
+
+Maintenance:
+- Purpose: one place for alert events of this process: lifecycle
+  transitions from ``AlertEngine`` (fired/resolved) and one-off events such
+  as VRAM cap enforcement. Previously those one-off alerts were appended
+  to ``AlertEngine.active_alerts`` and silently dropped by the next check.
+- Bounds: events live in a ring of ``capacity`` entries; the oldest is
+  evicted first, so an alert storm costs at most ``capacity`` dicts.
+- Ids: every event gets a monotonically increasing ``id``. Clients read
+  with ``since(cursor)`` and pass back the returned cursor to receive only
+  newer events (``/api/alerts?since=``). ``truncated`` tells a client that
+  events after its cursor were already evicted.
+- Indexes: per hostname, GPU index and severity, each an ordered deque of
+  ids. Ids are appended in order, so an evicted id is always at the head of
+  its index deques and eviction is O(1).
+- Debug: ``app.state.alert_store.stats()`` shows size, capacity and the id range.
+"""
+
+import bisect
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+
+class AlertStore:
+    """Ring buffer of alert events indexed by host, GPU and severity."""
+
+    def __init__(self, capacity: int = 10000):
+        self.capacity = max(1, int(capacity))
+        self._events: Deque[Dict[str, Any]] = deque()
+        self._indexes: Dict[str, Dict[Any, Deque[int]]] = {'hostname': {}, 'gpu': {}, 'severity': {}}
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'AlertStore':
+        return cls(capacity=(config.get('alerts', {}) or {}).get('max_events', 10000))
+
+    def add(self, alert: Dict[str, Any], gpu: Optional[int] = None) -> int:
+        """Record one event (copied) and return its id."""
+        event = dict(alert)
+        if gpu is None:
+            gpu = event.get('gpu_index')
+        with self._lock:
+            event_id = event['id'] = self._next_id
+            self._next_id += 1
+            event['gpu_index'] = gpu
+            self._events.append(event)
+            for field, key in self._keys(event):
+                ids = self._indexes[field].get(key)
+                if ids is None:
+                    ids = self._indexes[field][key] = deque()
+                ids.append(event_id)
+            while len(self._events) > self.capacity:
+                self._evict()
+        return event_id
+
+    def extend(self, alerts: List[Dict[str, Any]]) -> int:
+        """Record several events; returns the id of the last one (0 if none)."""
+        last = 0
+        for alert in alerts:
+            last = self.add(alert)
+        return last
+
+    @staticmethod
+    def _keys(event: Dict[str, Any]) -> List[Tuple[str, Any]]:
+        keys = [('hostname', event.get('hostname')), ('severity', event.get('severity'))]
+        if event['gpu_index'] is not None:
+            keys.append(('gpu', event['gpu_index']))
+        return keys
+
+    def _evict(self):
+        event = self._events.popleft()
+        for field, key in self._keys(event):
+            ids = self._indexes[field].get(key)
+            if ids and ids[0] == event['id']:
+                ids.popleft()
+                if not ids:
+                    del self._indexes[field][key]
+
+    @property
+    def cursor(self) -> int:
+        """Id of the newest event (0 when empty); pass to ``since`` to read only what follows."""
+        return self._next_id - 1
+
+    def since(self, cursor: int = 0, hostname: Optional[str] = None, gpu: Optional[int] = None,
+              severity: Optional[str] = None, limit: int = 500) -> Dict[str, Any]:
+        """Events with an id greater than ``cursor``, oldest first, optionally filtered.
+
+        Returns ``{'alerts': [...], 'cursor': int, 'truncated': bool}``; the
+        cursor is the id to pass next time (it only advances past events
+        actually returned, so ``limit`` pages through a backlog).
+        """
+        cursor = max(0, int(cursor))
+        limit = max(1, int(limit))
+        with self._lock:
+            first = self._events[0]['id'] if self._events else self._next_id
+            truncated = cursor < first - 1
+            filters = [(f, k) for f, k in (('hostname', hostname), ('gpu', gpu), ('severity', severity))
+                       if k is not None]
+
+            if not filters:
+                start = max(0, cursor - first + 1)
+                selected = [self._events[i] for i in range(start, min(len(self._events), start + limit))]
+            else:
+                candidates = [self._indexes[f].get(k, ()) for f, k in filters]
+                # Walk the shortest index and check the other filters on the event itself
+                ids = min(candidates, key=len)
+                selected = []
+                for i in range(bisect.bisect_right(ids, cursor), len(ids)):
+                    event = self._events[ids[i] - first]
+                    if all(self._matches(event, f, k) for f, k in filters):
+                        selected.append(event)
+                        if len(selected) >= limit:
+                            break
+
+            next_cursor = selected[-1]['id'] if len(selected) >= limit else max(cursor, self._next_id - 1)
+            return {'alerts': [dict(e) for e in selected], 'cursor': next_cursor, 'truncated': truncated}
+
+    @staticmethod
+    def _matches(event: Dict[str, Any], field: str, key: Any) -> bool:
+        if field == 'gpu':
+            return event['gpu_index'] == key
+        return event.get(field) == key
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'size': len(self._events),
+                'capacity': self.capacity,
+                'first_id': self._events[0]['id'] if self._events else None,
+                'last_id': self._next_id - 1,
+                'hosts': len(self._indexes['hostname']),
+            }
+
@@ -0,0 +1,75 @@
+"""Agent mode: serve the local snapshot to a cluster aggregator.
+
+Maintenance:
+- Purpose: ``health_monitor.py agent`` runs this app on every node listed
+  in ``cluster.nodes``. It owns only a ``CollectionScheduler``: no storage,
+  alerting, dashboard or benchmark routes.
+- Endpoints: ``GET /api/agent/snapshot`` (``agent_payload``, also served
+  by the full web server so it can be polled the same way) and
+  ``GET /api/agent/health``.
+- Auth: when ``cluster.agent_token`` is set, snapshot requests must send it
+  in ``X-Agent-Token``; the aggregator does so from the same config key.
+"""
+
+import hmac
+from typing import Any, Dict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from monitor.collectors.cluster import TOKEN_HEADER
+from monitor.collectors.scheduler import CollectionScheduler, MetricsSnapshot
+from monitor.__version__ import __version__ as _pkg_version
+
+
+def agent_payload(snap: MetricsSnapshot) -> Dict[str, Any]:
+    """The snapshot as one node contributes it to the cluster view."""
+    payload = snap.as_metrics()
+    payload['processes'] = list(snap.processes)
+    payload['age_seconds'] = round(snap.age, 3)
+    return payload
+
+
+def token_rejected(request: Request, config: Dict[str, Any]):
+    """A 401 response when ``cluster.agent_token`` is set and the request lacks it, else None."""
+    token = (config.get('cluster', {}) or {}).get('agent_token')
+    if not token:
+        return None
+    sent = request.headers.get(TOKEN_HEADER, '')
+    if hmac.compare_digest(sent.encode(), str(token).encode()):
+        return None
+    return JSONResponse(status_code=401, content={'status': 'error', 'message': 'Invalid agent token'})
+
+
+def create_agent_app(config: Dict[str, Any]) -> FastAPI:
+    app = FastAPI(title="MyGPU agent", version=_pkg_version)
+    scheduler = CollectionScheduler.from_config(config)
+    app.state.collection_scheduler = scheduler
+
+    @app.on_event("startup")
+    async def startup():
+        await scheduler.start()
+
+    @app.on_event("shutdown")
+    async def shutdown():
+        await scheduler.stop()
+
+    @app.get("/api/agent/snapshot")
+    async def get_agent_snapshot(request: Request):
+        rejected = token_rejected(request, config)
+        if rejected is not None:
+            return rejected
+        snap = await scheduler.get_snapshot()
+        return agent_payload(snap)
+
+    @app.get("/api/agent/health")
+    async def get_agent_health():
+        snap = scheduler.snapshot
+        return {
+            'status': 'ok',
+            'version': _pkg_version,
+            'hostname': snap.hostname if snap else None,
+            'age_seconds': round(snap.age, 3) if snap else None,
+        }
+
+    return app
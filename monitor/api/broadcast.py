@@ -0,0 +1,90 @@
+"""Fan-out of live dashboard frames to push subscribers.
+
+Maintenance:
+- Purpose: serialize each collected snapshot once and hand it to every
+  connected ``/ws/metrics`` or ``/api/stream`` client, so server work per
+  tick does not grow with the number of open dashboards.
+- Backpressure: each subscriber has a one-slot mailbox. A client that is
+  still sending the previous frame simply has its queued frame replaced by
+  the newer one (stale frames are dropped, never queued up); clients that
+  stay stuck longer than ``send_timeout`` are disconnected.
+- Debug: ``stats()`` reports subscriber count, frames published and frames
+  dropped for slow clients.
+"""
+
+import asyncio
+from typing import Any, Dict, Optional, Set
+
+
+class Subscription:
+    """One client's mailbox; holds at most the latest unsent frame."""
+
+    def __init__(self, broadcaster: 'Broadcaster'):
+        self._broadcaster = broadcaster
+        self._frame: Optional[str] = None
+        self._ready = asyncio.Event()
+        self.dropped = 0
+
+    def _offer(self, frame: str):
+        if self._frame is not None:
+            self.dropped += 1
+        self._frame = frame
+        self._ready.set()
+
+    async def next(self) -> str:
+        """Wait for the newest frame not yet delivered to this client."""
+        await self._ready.wait()
+        self._ready.clear()
+        frame, self._frame = self._frame, None
+        return frame
+
+    def close(self):
+        self._broadcaster.unsubscribe(self)
+
+    def __enter__(self) -> 'Subscription':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Broadcaster:
+    """Publish pre-serialized frames to any number of subscribers."""
+
+    def __init__(self, send_timeout: float = 30.0):
+        self.send_timeout = send_timeout
+        self._subscribers: Set[Subscription] = set()
+        self._latest: Optional[str] = None
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self) -> Subscription:
+        """Register a client; it immediately receives the latest frame, if any."""
+        sub = Subscription(self)
+        self._subscribers.add(sub)
+        if self._latest is not None:
+            sub._offer(self._latest)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        if sub in self._subscribers:
+            self._subscribers.discard(sub)
+            self.dropped += sub.dropped
+
+    def publish(self, frame: str):
+        """Hand ``frame`` to every subscriber without waiting on any of them."""
+        self._latest = frame
+        self.published += 1
+        for sub in self._subscribers:
+            sub._offer(frame)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'subscribers': len(self._subscribers),
+            'published': self.published,
+            'dropped': self.dropped + sum(s.dropped for s in self._subscribers),
+        }
@@ -2,20 +2,30 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional
 import json
-import csv
-import io
 import asyncio
+import os
+import shutil
+import tempfile
 import threading
+import time
+import zipfile
 
 import psutil
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.responses import HTMLResponse, StreamingResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.background import BackgroundTask
 
-from monitor.collectors.gpu import GPUCollector
 from monitor.collectors.system import SystemCollector
+from monitor.collectors.scheduler import CollectionScheduler
+from monitor.collectors.cluster import ClusterAggregator, summarize
+from monitor.api.agent import agent_payload, token_rejected
+from monitor.api.broadcast import Broadcaster
 from monitor.storage.sqlite import MetricsStorage
+from monitor.storage import columnar, export
+from monitor.storage.downsample import METHODS as DOWNSAMPLE_METHODS
 from monitor.alerting.rules import AlertEngine
+from monitor.alerting.store import AlertStore
 from monitor import benchmark_router
 from monitor.benchmark import runner as benchmark_runner, config as benchmark_config
 from monitor.__version__ import __version__ as _pkg_version
@@ -56,8 +66,20 @@ def create_app(config: Dict[str, Any]) -> FastAPI:
     
     app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
     
-    storage = MetricsStorage(config['storage']['path'])
+    storage = MetricsStorage.from_config(config)
     alert_engine = AlertEngine(config.get('alerts', {}))
+    # Bounded event feed behind /api/alerts?since=; see monitor/alerting/store.py
+    alert_store = AlertStore.from_config(config)
+    app.state.alert_store = alert_store
+    # Single collection loop shared by every endpoint; see monitor/collectors/scheduler.py
+    scheduler = CollectionScheduler.from_config(config)
+    broadcaster = Broadcaster()
+    app.state.collection_scheduler = scheduler
+    # Polls the agents in cluster.nodes; see monitor/collectors/cluster.py
+    cluster_aggregator = ClusterAggregator.from_config(config)
+    app.state.cluster_aggregator = cluster_aggregator
+    app.state.broadcaster = broadcaster
+    app.state.latest_alerts = []
     
     app.include_router(benchmark_router.router)
     # VRAM cap persistence helpers (simple JSON file next to package)
@@ -117,12 +139,10 @@ def create_app(config: Dict[str, Any]) -> FastAPI:
     async def _vram_recheck_and_terminate_task(gpus_to_check, watchlist_snapshot, caps_snapshot):
         await asyncio.sleep(5)
         try:
-            collector = GPUCollector()
-            gnow = collector.collect()
-            try:
-                procs2 = collector.collect_processes()
-            except Exception:
-                procs2 = []
+            # force a fresh sample: the point of the retry is to see respawned PIDs
+            snap = await scheduler.refresh()
+            gnow = snap.gpus
+            procs2 = snap.processes
             import psutil as _ps
             for gpu2 in gnow:
                 if gpu2.get('error'):
@@ -169,10 +189,11 @@ def create_app(config: Dict[str, Any]) -> FastAPI:
                                             p.kill()
                                         except Exception:
                                             pass
-                                    alert_engine.active_alerts.append({
+                                    alert_store.add({
                                         'timestamp': datetime.now().isoformat(),
-                                        'hostname': 'local',
+                                        'hostname': snap.hostname,
                                         'name': f'pid_{pid}_terminated_after_retry',
+                                        'gpu_index': gi,
                                         'severity': 'info',
                                         'message': f'Auto-terminated PID {pid} (retry) on GPU {gi} due to VRAM cap'
                                     })
@@ -183,24 +204,74 @@ def create_app(config: Dict[str, Any]) -> FastAPI:
         except Exception:
             pass
     
+    def _status_payload(metrics: Dict[str, Any]) -> Dict[str, Any]:
+        alerts = app.state.latest_alerts
+        # Also surface recent benchmark state/errors to the UI so clients can display notifications
+        bench_status = None
+        try:
+            benchmark_instance = benchmark_runner.get_benchmark_instance()
+            bench_status = benchmark_instance.get_status()
+            benchmark_error = None
+            # If benchmark finished with a stop reason containing 'Error' or results contain error, surface it
+            if bench_status and bench_status.get('stop_reason'):
+                benchmark_error = bench_status.get('stop_reason')
+            elif getattr(benchmark_instance, 'results', None) and isinstance(benchmark_instance.results, dict) and benchmark_instance.results.get('error'):
+                benchmark_error = benchmark_instance.results.get('error')
+        except Exception:
+            benchmark_error = None
+
+        return {
+            'status': 'healthy' if not alerts else 'warning',
+            'is_admin': getattr(app.state, 'is_admin', False),
+            'metrics': metrics,
+            'alerts': alerts,
+            'benchmark_status': bench_status,
+            'benchmark_error': benchmark_error,
+        }
+    
+    async def _on_snapshot(snap):
+        # Persist and evaluate alerts once per tick instead of once per request
+        metrics = snap.as_metrics()
+        app.state.latest_alerts = alert_engine.check(metrics)
+        transitions = alert_engine.drain_transitions()
+        alert_store.extend(transitions)
+        storage.queue_alert_transitions(transitions)
+        # Serialize once; every push subscriber gets the same frame
+        broadcaster.publish(json.dumps(_status_payload(metrics), default=str))
+        # Last, so a failing disk cannot stop alerts or the push feed
+        try:
+            await storage.store(metrics)
+        except Exception as e:
+            print(f"Metrics storage error: {e}")
+
+    scheduler.add_listener(_on_snapshot)
+
     @app.on_event("startup")
     async def startup():
         await storage.initialize()
+        await scheduler.start()
+        await cluster_aggregator.start()
         async def _vram_cap_watcher():
             from monitor.alerting.toaster import send_toast
             from datetime import datetime
+            # GPUs over their cap on the previous tick: the alert event is added once per breach
+            over_cap = set()
             while True:
                 try:
                     caps = getattr(app.state, 'vram_caps', {}) or {}
                     if not caps:
+                        over_cap = set()
                         await asyncio.sleep(config.get('monitoring', {}).get('interval_seconds', 5))
                         continue
 
                     try:
-                        collector = GPUCollector()
-                        gpus = collector.collect()
+                        snap = await scheduler.get_snapshot()
+                        gpus = snap.gpus
                     except Exception:
+                        snap = None
                         gpus = []
+                    hostname = snap.hostname if snap else 'local'
+                    was_over_cap, over_cap = over_cap, set()
 
                     for gpu in gpus:
                         if gpu.get('error'):
@@ -235,19 +306,22 @@ def create_app(config: Dict[str, Any]) -> FastAPI:
                                 pass
 
                         if exceeded:
-                            ts = datetime.now().isoformat()
-                            msg = f"GPU {idx} VRAM cap exceeded: {reason}"
-                            alert = {
-                                'timestamp': ts,
-                                'hostname': gpu.get('name', 'local'),
-                                'name': f'gpu_{idx}_vram_cap_exceeded',
-                                'severity': 'warning',
-                                'message': msg,
-                            }
-                            try:
-                                alert_engine.active_alerts.append(alert)
-                            except Exception:
-                                pass
+                            over_cap.add(idx)
+                            if idx not in was_over_cap:
+                                ts = datetime.now().isoformat()
+                                msg = f"GPU {idx} VRAM cap exceeded: {reason}"
+                                alert = {
+                                    'timestamp': ts,
+                                    'hostname': hostname,
+                                    'name': f'gpu_{idx}_vram_cap_exceeded',
+                                    'severity': 'warning',
+                                    'message': msg,
+                                    'gpu_index': idx,
+                                }
+                                try:
+                                    alert_store.add(alert)
+                                except Exception:
+                                    pass
                             # send a prominent red toast for exceeded VRAM
                             try:
                                 send_toast('VRAM Exceeded', f'VRAM of GPU {idx} exceeded ({reason})', duration=8, severity='critical')
@@ -260,7 +334,7 @@ def create_app(config: Dict[str, Any]) -> FastAPI:
                                     if watchlist:
                                         # collect processes and terminate those on this GPU and in watchlist
                                         try:
-                                            proc_list = collector.collect_processes()
+                                            proc_list = snap.processes
                                             for proc in proc_list:
                                                 try:
                                                     pid = int(proc.get('pid'))
@@ -299,10 +373,11 @@ def create_app(config: Dict[str, Any]) -> FastAPI:
                                                         except Exception:
                                                             pass
 
-                                                        alert_engine.active_alerts.append({
+                                                        alert_store.add({
                                                             'timestamp': datetime.now().isoformat(),
-                                                            'hostname': 'local',
+                                                            'hostname': hostname,
                                                             'name': f'pid_{pid}_terminated',
+                                                            'gpu_index': idx,
                                                             'severity': 'info',
                                                             'message': f'Auto-terminated PID {pid} (name={pname}) on GPU {idx} due to VRAM cap'
                                                         })
@@ -327,10 +402,11 @@ def create_app(config: Dict[str, Any]) -> FastAPI:
                                                                                 p_other.wait(timeout=3)
                                                                             except Exception:
                                                                                 p_other.kill()
-                                                                            alert_engine.active_alerts.append({
+                                                                            alert_store.add({
                                                                                 'timestamp': datetime.now().isoformat(),
-                                                                                'hostname': 'local',
+                                                                                'hostname': hostname,
                                                                                 'name': f'pid_{pid2}_terminated',
+                                                                                'gpu_index': idx,
                                                                                 'severity': 'info',
                                                                                 'message': f'Also terminated PID {pid2} (name={pname}) on GPU {idx}'
                                                                             })
@@ -339,10 +415,11 @@ def create_app(config: Dict[str, Any]) -> FastAPI:
                                                                 except Exception:
                                                                     pass
                                                     except Exception:
-                                                        alert_engine.active_alerts.append({
+                                                        alert_store.add({
                                                             'timestamp': datetime.now().isoformat(),
-                                                            'hostname': 'local',
+                                                            'hostname': hostname,
                                                             'name': f'pid_{pid}_terminate_failed',
+                                                            'gpu_index': idx,
                                                             'severity': 'warning',
                                                             'message': f'Failed to terminate PID {pid} on GPU {idx}'
                                                         })
@@ -364,6 +441,8 @@ def create_app(config: Dict[str, Any]) -> FastAPI:
     
     @app.on_event("shutdown")
     async def shutdown():
+        await scheduler.stop()
+        await cluster_aggregator.stop()
         storage.close()
         try:
             t = getattr(app.state, '_vram_watcher_task', None)
@@ -400,16 +479,31 @@ def create_app(config: Dict[str, Any]) -> FastAPI:
     @app.websocket("/ws/simulation")
     async def websocket_simulation(websocket: WebSocket):
         await websocket.accept()
+        from monitor.api import sim_frames
         sim_runner = None
         update_task = None
+        # Clients opt into binary frames (see sim_frames.py) with encoding='binary'
+        # (raw float32) or encoding='quantized' (uint16 keyframes + deltas)
+        stream = {'encoding': 'json', 'max_samples': 500}
+        delta_encoder = sim_frames.DeltaEncoder()
         
         async def send_status_updates():
+            seq = 0
+            pacer = sim_frames.FramePacer()
             while sim_runner and sim_runner.running:
+                delay = pacer.interval
                 try:
                     status = sim_runner.get_status()
                     if sim_runner.stress_worker:
-                        positions, masses, colors, glows = sim_runner.stress_worker.get_particle_sample(max_samples=500)
-                        if positions is not None:
+                        positions, masses, colors, glows = sim_runner.stress_worker.get_particle_sample(max_samples=stream['max_samples'])
+                        sent_at = time.perf_counter()
+                        if positions is not None and stream['encoding'] == 'quantized':
+                            await websocket.send_bytes(delta_encoder.encode(positions, masses, colors, glows, status, seq))
+                            seq += 1
+                        elif positions is not None and stream['encoding'] == 'binary':
+                            await websocket.send_bytes(sim_frames.encode_raw(positions, masses, colors, glows, status, seq))
+                            seq += 1
+                        elif positions is not None:
                             particles_data = []
                             for i in range(len(positions)):
                                 particles_data.append({
@@ -428,9 +522,11 @@ def create_app(config: Dict[str, Any]) -> FastAPI:
                                 'iterations': status.get('iterations', 0),
                                 'particles': particles_data
                             })
+                        # Slow sends mean the client's buffer is backing up: lower the frame rate
+                        delay = pacer.record_send(time.perf_counter() - sent_at)
                 except Exception:
                     break
-                await asyncio.sleep(0.033)
+                await asyncio.sleep(delay)
         
         try:
             while True:
@@ -442,6 +538,15 @@ def create_app(config: Dict[str, Any]) -> FastAPI:
 
                     num_particles = data.get('particles', 100000)
                     backend_mult = data.get('backend', 1)
+                    encoding = data.get('encoding')
+                    stream['encoding'] = encoding if encoding in ('binary', 'quantized') else 'json'
+                    delta_encoder.request_keyframe()
+                    # Binary frames are cheap enough to carry 10x the particles
+                    default_samples = 500 if stream['encoding'] == 'json' else 5000
+                    try:
+                        stream['max_samples'] = max(1, min(int(data.get('max_samples', default_samples)), 50000))
+                    except (TypeError, ValueError):
+                        stream['max_samples'] = default_samples
                     
                     config = benchmark_config.BenchmarkConfig(
                         benchmark_type='particle',
@@ -463,6 +568,10 @@ def create_app(config: Dict[str, Any]) -> FastAPI:
                         update_task.cancel()
                     update_task = asyncio.create_task(send_status_updates())
                 
+                elif data['type'] == 'keyframe':
+                    # Client lost track of the delta chain (e.g. after a dropped frame)
+                    delta_encoder.request_keyframe()
+                
                 elif data['type'] == 'spawn' and sim_runner and sim_runner.stress_worker:
                     x = data.get('x', 500)
                     y = data.get('y', 400)
@@ -497,54 +606,50 @@ def create_app(config: Dict[str, Any]) -> FastAPI:
     
     @app.get("/api/status")
     async def get_status():
-        gpu_collector = GPUCollector()
-        sys_collector = SystemCollector()
-        
-        gpus = gpu_collector.collect()
-        system = sys_collector.collect()
-        
-        metrics = {
-            'timestamp': datetime.now().isoformat(),
-            'hostname': system.get('hostname', 'unknown'),
-            'gpus': gpus,
-            'system': system,
-        }
-        
-        await storage.store(metrics)
+        snap = await scheduler.get_snapshot()
+        return _status_payload(snap.as_metrics())
+    
+    @app.websocket("/ws/metrics")
+    async def websocket_metrics(websocket: WebSocket):
+        """Push every collected snapshot (same payload as /api/status)."""
+        await websocket.accept()
+        with broadcaster.subscribe() as sub:
+            try:
+                while True:
+                    frame = await sub.next()
+                    await asyncio.wait_for(websocket.send_text(frame), broadcaster.send_timeout)
+            except (WebSocketDisconnect, asyncio.TimeoutError):
+                pass
+            except Exception:
+                # Client went away mid-send
+                pass
+    
+    @app.get("/api/stream")
+    async def stream_metrics(request: Request):
+        """Server-Sent Events variant of /ws/metrics for clients behind WebSocket-hostile proxies."""
+        async def events():
+            with broadcaster.subscribe() as sub:
+                while not await request.is_disconnected():
+                    try:
+                        frame = await asyncio.wait_for(sub.next(), 15)
+                    except asyncio.TimeoutError:
+                        yield ': keepalive\n\n'
+                        continue
+                    yield f'data: {frame}\n\n'
         
-        alerts = alert_engine.check(metrics)
-        # Also surface recent benchmark state/errors to the UI so clients can display notifications
-        try:
-            benchmark_instance = benchmark_runner.get_benchmark_instance()
-            bench_status = benchmark_instance.get_status()
-            benchmark_error = None
-            # If benchmark finished with a stop reason containing 'Error' or results contain error, surface it
-            if bench_status and bench_status.get('stop_reason'):
-                benchmark_error = bench_status.get('stop_reason')
-            elif getattr(benchmark_instance, 'results', None) and isinstance(benchmark_instance.results, dict) and benchmark_instance.results.get('error'):
-                benchmark_error = benchmark_instance.results.get('error')
-        except Exception:
-            benchmark_error = None
-
-        return {
-            'status': 'healthy' if not alerts else 'warning',
-            'is_admin': getattr(app.state, 'is_admin', False),
-            'metrics': metrics,
-            'alerts': alerts,
-            'benchmark_status': bench_status if 'bench_status' in locals() else None,
-            'benchmark_error': benchmark_error,
-        }
+        return StreamingResponse(events(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
     
     @app.get("/api/gpus")
     async def get_gpus():
-        collector = GPUCollector()
-        return {'gpus': collector.collect()}
+        snap = await scheduler.get_snapshot()
+        return {'gpus': snap.gpus}
     
     @app.get("/api/processes")
     async def get_processes():
-        collector = GPUCollector()
-        gpus = collector.collect()
-        processes = collector.collect_processes()
+        snap = await scheduler.get_snapshot()
+        gpus = snap.gpus
+        processes = snap.processes
         
         # Calculate total VRAM usage from processes and compute cap exceed status
         gpu_memory_stats = {}
@@ -754,18 +859,16 @@ def create_app(config: Dict[str, Any]) -> FastAPI:
         try:
             if getattr(app.state, 'is_admin', False):
                 from monitor.alerting.toaster import send_toast
-                gcoll = GPUCollector()
                 try:
-                    gpus = gcoll.collect()
+                    snap = await scheduler.get_snapshot()
+                    gpus = snap.gpus
                 except Exception:
+                    snap = None
                     gpus = []
 
                 watchlist = set(getattr(app.state, 'vram_watchlist', []) or [])
                 if watchlist and gpus:
-                    try:
-                        proc_list = gcoll.collect_processes()
-                    except Exception:
-                        proc_list = []
+                    proc_list = snap.processes if snap else []
 
                     import psutil
                     for gpu in gpus:
@@ -837,18 +940,20 @@ def create_app(config: Dict[str, Any]) -> FastAPI:
                                     except Exception:
                                         pass
 
-                                    alert_engine.active_alerts.append({
+                                    alert_store.add({
                                         'timestamp': datetime.now().isoformat(),
-                                        'hostname': 'local',
+                                        'hostname': snap.hostname if snap else 'local',
                                         'name': f'pid_{pid}_terminated',
+                                        'gpu_index': idx,
                                         'severity': 'info',
                                         'message': f'Auto-terminated PID {pid} (name={pname}) on GPU {idx} due to VRAM cap'
                                     })
                                 except Exception:
-                                    alert_engine.active_alerts.append({
+                                    alert_store.add({
                                         'timestamp': datetime.now().isoformat(),
-                                        'hostname': 'local',
+                                        'hostname': snap.hostname if snap else 'local',
                                         'name': f'pid_{pid}_terminate_failed',
+                                        'gpu_index': idx,
                                         'severity': 'warning',
                                         'message': f'Failed to terminate PID {pid} on GPU {idx}'
                                     })
@@ -877,8 +982,8 @@ def create_app(config: Dict[str, Any]) -> FastAPI:
             elif 'cap_percent' in cap_entry and gpu_index in caps:
                 # need GPU total to convert percent->MB; attempt to collect
                 try:
-                    g = GPUCollector()
-                    gpustats = {gg['index']: gg for gg in g.collect() if not gg.get('error')}
+                    snap = await scheduler.get_snapshot()
+                    gpustats = {gg['index']: gg for gg in snap.gpus if not gg.get('error')}
                     total_mb = int(gpustats[gpu_index]['memory_total']) if gpu_index in gpustats else None
                     if total_mb is None:
                         return {'status': 'error', 'error': 'could_not_determine_total_mb'}
@@ -898,8 +1003,7 @@ def create_app(config: Dict[str, Any]) -> FastAPI:
         # Also return immediate vram exceed status so clients can update UI without waiting
         vram_cap_exceeded_now = {}
         try:
-            collector = GPUCollector()
-            gpus_now = collector.collect()
+            gpus_now = (await scheduler.get_snapshot()).gpus
             for gpu in gpus_now:
                 if gpu.get('error'):
                     continue
@@ -1125,8 +1229,41 @@ def create_app(config: Dict[str, Any]) -> FastAPI:
     
     @app.get("/api/system")
     async def get_system():
-        collector = SystemCollector()
-        return {'system': collector.collect()}
+        snap = await scheduler.get_snapshot()
+        return {'system': snap.system}
+
+    @app.get("/api/network")
+    async def get_network():
+        snap = await scheduler.get_snapshot()
+        return {'network': snap.network}
+
+    @app.get("/api/disk")
+    async def get_disk():
+        snap = await scheduler.get_snapshot()
+        return {'disk': snap.disk}
+
+    @app.get("/api/agent/snapshot")
+    async def get_agent_snapshot(request: Request):
+        rejected = token_rejected(request, config)
+        if rejected is not None:
+            return rejected
+        snap = await scheduler.get_snapshot()
+        return agent_payload(snap)
+
+    @app.get("/api/cluster")
+    async def get_cluster():
+        """This host plus the last poll of every node in cluster.nodes."""
+        snap = await scheduler.get_snapshot()
+        view = cluster_aggregator.view
+        local = {'node': snap.hostname, 'url': None, 'status': 'ok', 'latency_ms': 0.0,
+                 'local': True, 'snapshot': agent_payload(snap)}
+        nodes = [local] + list(view['nodes'])
+        return {
+            'cluster': (config.get('cluster', {}) or {}).get('name'),
+            'nodes': nodes,
+            'summary': summarize([n['snapshot'] for n in nodes if n['status'] == 'ok']),
+            'polled_at': view['polled_at'],
+        }
 
     @app.get("/api/launch_args")
     async def get_launch_args():
@@ -1168,11 +1305,17 @@ def create_app(config: Dict[str, Any]) -> FastAPI:
             return {'elevated': False, 'error': str(e)}
     
     @app.get("/api/alerts")
-    async def get_alerts():
-        return {'alerts': alert_engine.get_active_alerts()}
+    async def get_alerts(since: Optional[int] = None, hostname: Optional[str] = None,
+                         gpu: Optional[int] = None, severity: Optional[str] = None, limit: int = 500):
+        # Without a cursor: the currently firing alerts, plus the cursor to poll events from
+        if since is None:
+            return {'alerts': alert_engine.get_active_alerts(), 'cursor': alert_store.cursor}
+        return alert_store.since(since, hostname=hostname, gpu=gpu, severity=severity,
+                                 limit=min(max(1, limit), 5000))
     
     @app.get("/api/history")
-    async def get_history(hours: str = "1", metric: str = "gpu_0_utilization"):
+    async def get_history(hours: str = "1", metric: str = "gpu_0_utilization", max_points: int = 1000,
+                          points: Optional[int] = None, downsample: str = "lttb"):
         try:
             if hours == "lifetime":
                 h_val = 100000 # ~11 years
@@ -1180,12 +1323,31 @@ def create_app(config: Dict[str, Any]) -> FastAPI:
                 h_val = int(hours)
         except Exception:
             h_val = 1
-            
-        metrics = await storage.query(metric_name=metric, hours=h_val)
+        
+        if downsample not in DOWNSAMPLE_METHODS:
+            return {'status': 'error', 'error': 'invalid_downsample'}
+        
+        # Long ranges are served from rollups so the whole range fits the budget;
+        # points= (typically the chart width) further reduces it with LTTB or min/max
+        if points is not None:
+            points = max(2, min(points, 10000))
+            metrics = await storage.query(metric_name=metric, hours=h_val, points=points,
+                                          downsample=downsample)
+        else:
+            metrics = await storage.query(metric_name=metric, hours=h_val,
+                                          max_points=max(1, min(max_points, 20000)))
+        data = []
+        for m in metrics:
+            point = {'timestamp': m['timestamp'], 'value': m['metric_value']}
+            if 'resolution' in m:
+                point['min'] = m['min']
+                point['max'] = m['max']
+            data.append(point)
         return {
             'metric': metric,
             'hours': hours,
-            'data': [{'timestamp': m['timestamp'], 'value': m['metric_value']} for m in metrics]
+            'resolution': metrics[0].get('resolution', 'raw') if metrics else 'raw',
+            'data': data
         }
     
     @app.get("/api/history/available")
@@ -1219,31 +1381,61 @@ def create_app(config: Dict[str, Any]) -> FastAPI:
         else:
             return {'status': 'error', 'message': 'Update failed'}
     
-    @app.get("/api/export/json")
-    async def export_json(hours: int = 24):
-        metrics = await storage.query(hours=hours)
+    def _export_response(fmt: str, hours: Optional[float], hostname: Optional[str],
+                         metric: Optional[str]) -> StreamingResponse:
+        # Rows are read in chunks from a read-only cursor and encoded as they arrive;
+        # hours=0 exports everything still stored
+        rows = storage.iter_rows(hours=hours, hostname=hostname, metric_name=metric)
         return StreamingResponse(
-            io.BytesIO(json.dumps(metrics, indent=2).encode()),
-            media_type="application/json",
-            headers={"Content-Disposition": f"attachment; filename=metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"}
+            export.ENCODERS[fmt](rows),
+            media_type=export.MEDIA_TYPES[fmt],
+            headers={"Content-Disposition": f"attachment; filename=metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"}
         )
     
+    @app.get("/api/export/json")
+    async def export_json(hours: Optional[float] = 24, hostname: Optional[str] = None, metric: Optional[str] = None):
+        return _export_response('json', hours, hostname, metric)
+    
+    @app.get("/api/export/ndjson")
+    async def export_ndjson(hours: Optional[float] = 24, hostname: Optional[str] = None, metric: Optional[str] = None):
+        return _export_response('ndjson', hours, hostname, metric)
+    
     @app.get("/api/export/csv")
-    async def export_csv(hours: int = 24):
-        metrics = await storage.query(hours=hours)
-        
-        output = io.StringIO()
-        if metrics:
-            writer = csv.DictWriter(output, fieldnames=metrics[0].keys())
-            writer.writeheader()
-            writer.writerows(metrics)
-        
-        return StreamingResponse(
-            io.BytesIO(output.getvalue().encode()),
-            media_type="text/csv",
-            headers={"Content-Disposition": f"attachment; filename=metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"}
+    async def export_csv(hours: Optional[float] = 24, hostname: Optional[str] = None, metric: Optional[str] = None):
+        return _export_response('csv', hours, hostname, metric)
+    
+    @app.get("/api/export/columnar")
+    async def export_columnar(format: Optional[str] = None, hours: Optional[float] = 24,
+                              hostname: Optional[str] = None, metric: Optional[str] = None):
+        """Zip of one Parquet/Arrow/npz file per series; see monitor/storage/columnar.py."""
+        try:
+            zip_path, manifest = await asyncio.to_thread(
+                columnar.export_archive, storage, format, hours=hours, hostname=hostname, metric_name=metric)
+        except ValueError as e:
+            return {'status': 'error', 'error': str(e)}
+        return FileResponse(
+            zip_path, media_type='application/zip',
+            filename=f"metrics_{manifest['format']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+            background=BackgroundTask(shutil.rmtree, os.path.dirname(zip_path), True),
         )
     
+    @app.post("/api/import/columnar")
+    async def import_columnar(request: Request, hostname: Optional[str] = None):
+        """Backfill from a zip produced by /api/export/columnar (request body is the zip)."""
+        if not getattr(app.state, 'is_admin', False):
+            return {"status": "error", "message": "Admin privileges required"}
+        fd, path = tempfile.mkstemp(suffix='.zip')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                async for chunk in request.stream():
+                    f.write(chunk)
+            summary = await columnar.import_history(storage, path, hostname)
+        except (ValueError, KeyError, OSError, zipfile.BadZipFile) as e:
+            return {'status': 'error', 'error': str(e)}
+        finally:
+            os.remove(path)
+        return {'status': 'success', **summary}
+    
     @app.post("/api/shutdown")
     async def shutdown_server():
         """Gracefully shutdown the server."""
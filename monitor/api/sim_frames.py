@@ -0,0 +1,200 @@
+"""Binary wire format for ``/ws/simulation`` particle frames.
+
+Maintenance:
+- Purpose: ship particle samples as contiguous little-endian arrays taken
+  straight from the NumPy output of ``get_particle_sample`` instead of one
+  JSON object per particle. Decoder: ``static/sim_frames.js``.
+- Layout: a 32-byte header (``HEADER``) followed by per-encoding arrays.
+  Wider element types always come first so typed-array views stay aligned.
+  - raw: positions f32[n*2] (x, y interleaved), masses f32[n], glows f32[n],
+    colors u8[n*3] (RGB 0-255)
+  - quantized keyframe: masses f32[n], positions u16[n*2] (0..65535 across
+    the 1000x800 sim space), glows u8[n], colors u8[n*3]
+  - delta8 / delta16: position deltas i8/i16[n*2] against the previous
+    frame's quantized positions, glows u8[n], colors u8[n*3]; masses are
+    carried over from the last keyframe
+- Deltas are taken against what the client already reconstructed, so
+  quantization error never accumulates. ``DeltaEncoder`` emits a keyframe
+  every ``keyframe_interval`` frames, whenever the particle count or the
+  masses change (stride sampling can shift onto different particles while
+  the count stays the same), and when the client asks for one
+  (``{'type': 'keyframe'}``).
+- ``FramePacer`` stretches the frame interval when sends start taking a
+  large share of it (the socket is backing up) and recovers when they
+  speed up again.
+- Debug: ``decode_frame`` is the Python mirror of the raw JS decoder; bump
+  ``VERSION`` whenever an existing layout changes.
+"""
+
+import struct
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b'SIMF'
+VERSION = 1
+
+ENCODING_RAW = 0
+ENCODING_KEYFRAME = 1
+ENCODING_DELTA8 = 2
+ENCODING_DELTA16 = 3
+
+# Simulation space covered by quantized positions
+SIM_WIDTH = 1000.0
+SIM_HEIGHT = 800.0
+_QMAX = 65535
+
+# magic, version, encoding, reserved, seq, count, fps, gpu util, iterations
+HEADER = struct.Struct('<4sBBHIIffQ')
+
+
+def _header(encoding: int, count: int, status: Dict[str, Any], seq: int) -> bytes:
+    return HEADER.pack(
+        MAGIC, VERSION, encoding, 0, seq & 0xFFFFFFFF, count,
+        float(status.get('fps', 0) or 0),
+        float(status.get('gpu_util', 0) or 0),
+        int(status.get('iterations', 0) or 0),
+    )
+
+
+def encode_raw(positions, masses, colors, glows, status: Dict[str, Any], seq: int = 0) -> bytes:
+    """Pack one frame; ``colors`` are 0-1 floats as returned by the sampler."""
+    return b''.join((
+        _header(ENCODING_RAW, len(positions), status, seq),
+        np.ascontiguousarray(positions, dtype='<f4').tobytes(),
+        np.ascontiguousarray(masses, dtype='<f4').tobytes(),
+        np.ascontiguousarray(glows, dtype='<f4').tobytes(),
+        _colors_u8(colors).tobytes(),
+    ))
+
+
+def _colors_u8(colors) -> np.ndarray:
+    colors = np.asarray(colors, dtype=np.float32).reshape(-1, 3)
+    return (np.clip(colors, 0.0, 1.0) * 255 + 0.5).astype(np.uint8)
+
+
+def _unit_u8(values) -> np.ndarray:
+    return (np.clip(np.asarray(values, dtype=np.float32), 0.0, 1.0) * 255 + 0.5).astype(np.uint8)
+
+
+def quantize_positions(positions) -> np.ndarray:
+    """Map sim-space (x, y) floats onto uint16, flattened as x0, y0, x1, y1, ..."""
+    scale = np.array([_QMAX / SIM_WIDTH, _QMAX / SIM_HEIGHT], dtype=np.float32)
+    q = np.asarray(positions, dtype=np.float32).reshape(-1, 2) * scale + 0.5
+    return np.clip(q, 0, _QMAX).astype(np.uint16).reshape(-1)
+
+
+class DeltaEncoder:
+    """Per-connection state for the quantized keyframe + delta encoding."""
+
+    def __init__(self, keyframe_interval: int = 30):
+        self.keyframe_interval = max(1, int(keyframe_interval))
+        self._prev: Optional[np.ndarray] = None
+        # masses of the last keyframe, which the client reuses for deltas
+        self._masses: Optional[np.ndarray] = None
+        self._since_key = 0
+
+    def request_keyframe(self):
+        self._prev = None
+        self._masses = None
+
+    def encode(self, positions, masses, colors, glows, status: Dict[str, Any],
+               seq: int = 0) -> bytes:
+        q = quantize_positions(positions)
+        masses = np.ascontiguousarray(masses, dtype='<f4')
+        count = len(q) // 2
+        tail = (_unit_u8(glows).tobytes(), _colors_u8(colors).tobytes())
+        prev = self._prev
+        self._prev = q
+
+        if (prev is not None and len(prev) == len(q) and self._since_key < self.keyframe_interval
+                and np.array_equal(masses, self._masses)):
+            delta = q.astype(np.int32) - prev.astype(np.int32)
+            span = int(np.abs(delta).max()) if len(delta) else 0
+            if span <= 0x7F:
+                self._since_key += 1
+                return b''.join((_header(ENCODING_DELTA8, count, status, seq),
+                                 delta.astype('<i1').tobytes()) + tail)
+            if span <= 0x7FFF:
+                self._since_key += 1
+                return b''.join((_header(ENCODING_DELTA16, count, status, seq),
+                                 delta.astype('<i2').tobytes()) + tail)
+
+        self._since_key = 0
+        self._masses = masses.copy()
+        return b''.join((
+            _header(ENCODING_KEYFRAME, count, status, seq),
+            masses.tobytes(),
+            q.astype('<u2').tobytes(),
+        ) + tail)
+
+
+class FramePacer:
+    """Adaptive frame interval driven by how long each send takes."""
+
+    def __init__(self, min_interval: float = 1 / 30, max_interval: float = 0.5):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+
+    def record_send(self, seconds: float) -> float:
+        """Update the interval after a send; returns how long to sleep next."""
+        if seconds > self.interval * 0.5:
+            # Socket buffer is filling: back off before frames pile up
+            self.interval = min(self.max_interval, max(self.interval * 1.5, seconds * 2))
+        elif seconds < self.interval * 0.1:
+            self.interval = max(self.min_interval, self.interval * 0.9)
+        return max(0.0, self.interval - seconds)
+
+
+def decode_quantized(data: bytes, prev: Optional[Tuple[np.ndarray, np.ndarray]] = None
+                     ) -> Optional[Dict[str, Any]]:
+    """Decode a keyframe or delta frame; ``prev`` is (quantized positions, masses) of the last frame."""
+    if len(data) < HEADER.size:
+        return None
+    magic, version, encoding, _, seq, count, fps, gpu, iterations = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        return None
+    offset = HEADER.size
+    if encoding == ENCODING_KEYFRAME:
+        masses = np.frombuffer(data, dtype='<f4', count=count, offset=offset)
+        offset += count * 4
+        q = np.frombuffer(data, dtype='<u2', count=count * 2, offset=offset).copy()
+        offset += count * 4
+    elif encoding in (ENCODING_DELTA8, ENCODING_DELTA16) and prev is not None and len(prev[0]) == count * 2:
+        dtype, width = ('<i1', 1) if encoding == ENCODING_DELTA8 else ('<i2', 2)
+        delta = np.frombuffer(data, dtype=dtype, count=count * 2, offset=offset)
+        offset += count * 2 * width
+        q = (prev[0].astype(np.int32) + delta).astype(np.uint16)
+        masses = prev[1]
+    else:
+        return None
+    glows = np.frombuffer(data, dtype=np.uint8, count=count, offset=offset)
+    offset += count
+    colors = np.frombuffer(data, dtype=np.uint8, count=count * 3, offset=offset).reshape(count, 3)
+    positions = q.reshape(count, 2) * np.array([SIM_WIDTH / _QMAX, SIM_HEIGHT / _QMAX])
+    return {
+        'seq': seq, 'fps': fps, 'gpu': gpu, 'iterations': iterations, 'encoding': encoding,
+        'q': q, 'positions': positions, 'masses': masses, 'glows': glows, 'colors': colors,
+    }
+
+
+def decode_frame(data: bytes) -> Optional[Dict[str, Any]]:
+    """Decode a raw frame back into arrays (used for debugging and benchmarks)."""
+    if len(data) < HEADER.size:
+        return None
+    magic, version, encoding, _, seq, count, fps, gpu, iterations = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or encoding != ENCODING_RAW:
+        return None
+    offset = HEADER.size
+    positions = np.frombuffer(data, dtype='<f4', count=count * 2, offset=offset).reshape(count, 2)
+    offset += count * 8
+    masses = np.frombuffer(data, dtype='<f4', count=count, offset=offset)
+    offset += count * 4
+    glows = np.frombuffer(data, dtype='<f4', count=count, offset=offset)
+    offset += count * 4
+    colors = np.frombuffer(data, dtype=np.uint8, count=count * 3, offset=offset).reshape(count, 3)
+    return {
+        'seq': seq, 'fps': fps, 'gpu': gpu, 'iterations': iterations,
+        'positions': positions, 'masses': masses, 'glows': glows, 'colors': colors,
+    }
@@ -10,6 +10,8 @@ let selectedBenchType = 'gemm';
 let selectedMode = 'quick';
 let benchmarkPollInterval = null;
 let lastUpdateTs = 0;
+let metricsSocket = null;
+let metricsSocketRetry = 1000;
 window.isAdmin = false;
 
 // Tabs Logic
@@ -48,7 +50,8 @@ function updateTicker() {
 
     if (countdown <= 0) {
         countdown = 5;
-        fetchStatus();
+        // Live metrics arrive over /ws/metrics; only poll while the push feed is down
+        if (!metricsSocket || metricsSocket.readyState !== WebSocket.OPEN) fetchStatus();
 
         // Background updates for active tabs
         const activeTab = document.querySelector('.tab-content.active');
@@ -70,17 +73,20 @@ function updateTicker() {
     }
 }
 
+function applyStatus(data) {
+    updateDashboard(data);
+    if (data.is_admin !== undefined) window.isAdmin = data.is_admin;
+
+    // Server provided timestamp
+    if (data.timestamp && typeof window.setLastUpdate === 'function') {
+        window.setLastUpdate(data.timestamp);
+    }
+}
+
 async function fetchStatus() {
     try {
         const response = await fetch('/api/status');
-        const data = await response.json();
-        updateDashboard(data);
-        if (data.is_admin !== undefined) window.isAdmin = data.is_admin;
-
-        // Server provided timestamp
-        if (data.timestamp && typeof window.setLastUpdate === 'function') {
-            window.setLastUpdate(data.timestamp);
-        }
+        applyStatus(await response.json());
     } catch (error) {
         console.error('Error fetching status:', error);
         const gpuList = document.getElementById('gpu-list');
@@ -88,6 +94,29 @@ async function fetchStatus() {
     }
 }
 
+// Push feed: the server sends one frame per collection tick to every open dashboard
+function connectMetricsStream() {
+    const proto = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+    metricsSocket = new WebSocket(`${proto}//${window.location.host}/ws/metrics`);
+
+    metricsSocket.onopen = () => {
+        metricsSocketRetry = 1000;
+    };
+    metricsSocket.onmessage = (event) => {
+        try {
+            applyStatus(JSON.parse(event.data));
+            countdown = 5;
+        } catch (error) {
+            console.error('Bad metrics frame:', error);
+        }
+    };
+    metricsSocket.onclose = () => {
+        // Ticker falls back to polling until the reconnect succeeds
+        setTimeout(connectMetricsStream, metricsSocketRetry);
+        metricsSocketRetry = Math.min(metricsSocketRetry * 2, 30000);
+    };
+}
+
 // Charting Logic - Using Apache ECharts for superior history rendering
 function initHistoryChart(data, metricLabel, unit) {
     const chartDom = document.getElementById('historyChart');
@@ -612,6 +641,7 @@ function injectAdminButton() {
 // App Initialization
 async function init() {
     await fetchStatus();
+    connectMetricsStream();
     checkFeatures();
     injectAdminButton();
     refreshInterval = setInterval(updateTicker, 1000);
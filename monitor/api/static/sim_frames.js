@@ -0,0 +1,131 @@
+// sim_frames.js - Decoder for binary /ws/simulation frames
+// Mirrors monitor/api/sim_frames.py: 32-byte little-endian header, then
+// raw:      positions f32[n*2], masses f32[n], glows f32[n], colors u8[n*3]
+// keyframe: masses f32[n], positions u16[n*2], glows u8[n], colors u8[n*3]
+// delta:    position deltas i8/i16[n*2], glows u8[n], colors u8[n*3]
+
+const SIM_FRAME_HEADER_SIZE = 32;
+const SIM_FRAME_MAGIC = 0x464D4953; // 'SIMF' read as little-endian uint32
+const SIM_FRAME_VERSION = 1;
+const SIM_ENCODING_RAW = 0;
+const SIM_ENCODING_KEYFRAME = 1;
+const SIM_ENCODING_DELTA8 = 2;
+const SIM_ENCODING_DELTA16 = 3;
+const SIM_QMAX = 65535;
+const SIM_WIDTH = 1000;
+const SIM_HEIGHT = 800;
+
+function decodeSimulationFrame(buffer) {
+    const view = new DataView(buffer);
+    if (buffer.byteLength < SIM_FRAME_HEADER_SIZE || view.getUint32(0, true) !== SIM_FRAME_MAGIC) return null;
+    if (view.getUint8(4) !== SIM_FRAME_VERSION || view.getUint8(5) !== SIM_ENCODING_RAW) return null;
+
+    const count = view.getUint32(12, true);
+    let offset = SIM_FRAME_HEADER_SIZE;
+    const positions = new Float32Array(buffer, offset, count * 2);
+    offset += count * 8;
+    const masses = new Float32Array(buffer, offset, count);
+    offset += count * 4;
+    const glows = new Float32Array(buffer, offset, count);
+    offset += count * 4;
+    const colors = new Uint8Array(buffer, offset, count * 3);
+
+    return {
+        seq: view.getUint32(8, true),
+        fps: view.getFloat32(16, true),
+        gpu: view.getFloat32(20, true),
+        // iterations is a uint64; Number is exact up to 2^53
+        iterations: Number(view.getBigUint64(24, true)),
+        count, positions, masses, glows, colors
+    };
+}
+
+// Convert a legacy JSON frame's particle list into the same struct-of-arrays shape
+function simulationFrameFromJson(particles) {
+    const count = particles.length;
+    const frame = {
+        count,
+        positions: new Float32Array(count * 2),
+        masses: new Float32Array(count),
+        glows: new Float32Array(count),
+        colors: new Uint8Array(count * 3)
+    };
+    particles.forEach((p, i) => {
+        frame.positions[i * 2] = p.x;
+        frame.positions[i * 2 + 1] = p.y;
+        frame.masses[i] = p.mass;
+        frame.glows[i] = p.glow;
+        frame.colors[i * 3] = p.color[0] * 255;
+        frame.colors[i * 3 + 1] = p.color[1] * 255;
+        frame.colors[i * 3 + 2] = p.color[2] * 255;
+    });
+    return frame;
+}
+
+// Stateful decoder for every encoding; delta frames are applied to the last
+// reconstructed quantized positions. When the chain breaks (missed frame,
+// count change without a keyframe) decode() returns null and needsKeyframe
+// is set once so the caller can ask the server for a fresh keyframe.
+function createSimulationDecoder() {
+    let q = null;          // Uint16Array of the last quantized positions
+    let masses = null;
+    let lastSeq = -1;
+    let awaitingKeyframe = false;
+    const decoder = { needsKeyframe: false };
+
+    decoder.decode = (buffer) => {
+        const view = new DataView(buffer);
+        if (buffer.byteLength < SIM_FRAME_HEADER_SIZE || view.getUint32(0, true) !== SIM_FRAME_MAGIC) return null;
+        if (view.getUint8(4) !== SIM_FRAME_VERSION) return null;
+        const encoding = view.getUint8(5);
+        if (encoding === SIM_ENCODING_RAW) return decodeSimulationFrame(buffer);
+
+        const seq = view.getUint32(8, true);
+        const count = view.getUint32(12, true);
+        let offset = SIM_FRAME_HEADER_SIZE;
+
+        if (encoding === SIM_ENCODING_KEYFRAME) {
+            masses = new Float32Array(buffer.slice(offset, offset + count * 4));
+            offset += count * 4;
+            q = new Uint16Array(buffer.slice(offset, offset + count * 4));
+            offset += count * 4;
+        } else if (encoding === SIM_ENCODING_DELTA8 || encoding === SIM_ENCODING_DELTA16) {
+            if (!q || q.length !== count * 2 || seq !== ((lastSeq + 1) >>> 0)) {
+                // Ask once; later deltas are dropped until the keyframe arrives
+                decoder.needsKeyframe = !awaitingKeyframe;
+                awaitingKeyframe = true;
+                return null;
+            }
+            const delta = encoding === SIM_ENCODING_DELTA8
+                ? new Int8Array(buffer, offset, count * 2)
+                : new Int16Array(buffer.slice(offset, offset + count * 4));
+            offset += delta.byteLength;
+            for (let i = 0; i < delta.length; i++) q[i] += delta[i];
+        } else {
+            return null;
+        }
+        lastSeq = seq;
+        awaitingKeyframe = false;
+        decoder.needsKeyframe = false;
+
+        const positions = new Float32Array(count * 2);
+        for (let i = 0; i < count; i++) {
+            positions[i * 2] = q[i * 2] * (SIM_WIDTH / SIM_QMAX);
+            positions[i * 2 + 1] = q[i * 2 + 1] * (SIM_HEIGHT / SIM_QMAX);
+        }
+        const glowBytes = new Uint8Array(buffer, offset, count);
+        const glows = new Float32Array(count);
+        for (let i = 0; i < count; i++) glows[i] = glowBytes[i] / 255;
+        offset += count;
+
+        return {
+            seq,
+            fps: view.getFloat32(16, true),
+            gpu: view.getFloat32(20, true),
+            iterations: Number(view.getBigUint64(24, true)),
+            count, positions, masses, glows,
+            colors: new Uint8Array(buffer, offset, count * 3)
+        };
+    };
+    return decoder;
+}
@@ -102,7 +102,10 @@ async function loadHistory() {
     const metric = document.getElementById('metric-select').value;
     const hours = document.getElementById('hours-select').value;
     try {
-        const response = await fetch(`/api/history?metric=${metric}&hours=${hours}`);
+        // One point per horizontal pixel is all the chart can show; spikes are kept server-side
+        const chartEl = document.getElementById('historyChart');
+        const points = Math.max(200, Math.min(4000, (chartEl && chartEl.clientWidth) || 1000));
+        const response = await fetch(`/api/history?metric=${metric}&hours=${hours}&points=${points}&downsample=minmax`);
         const data = await response.json();
         const unit = metric.includes('temp') ? '°C' : metric.includes('util') ? '%' : metric.includes('mem') ? 'MB' : 'W';
         initHistoryChart(data, document.getElementById('metric-select').selectedOptions[0].text, unit);
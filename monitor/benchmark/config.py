@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import List, Optional
 
 
 @dataclass
@@ -18,6 +19,12 @@ class BenchmarkConfig:
     target_gpu_util: int = 98
     backend_multiplier: int = 1  # Multiplier for offscreen GPU computation stress (1-100)
     preferred_backend: str = 'auto'  # 'auto', 'cupy', 'torch', or 'cpu'
+    devices: Optional[List[int]] = None  # GPU indices to run on concurrently (None = GPU 0)
+    
+    @property
+    def device_list(self) -> List[int]:
+        """GPU indices this run targets, in order, without duplicates."""
+        return list(dict.fromkeys(self.devices)) if self.devices else [0]
     
     @classmethod
     def from_mode(cls, mode: str, benchmark_type: str = "gemm") -> 'BenchmarkConfig':
@@ -70,3 +77,35 @@ class BenchmarkConfig:
             matrix_size=matrix_size,
             num_particles=num_particles
         )
+
+
+def parse_devices(spec: str, available: Optional[List[int]] = None) -> Optional[List[int]]:
+    """Parse a GPU selection such as ``"0,2,5"``, ``"0-3"`` or ``"all"``.
+    
+    Returns None for an empty spec (the default single GPU). ``all`` expands to
+    ``available``; indices not in ``available`` (when given) raise ValueError.
+    """
+    spec = (spec or '').strip().lower()
+    if not spec:
+        return None
+    if spec == 'all':
+        if not available:
+            raise ValueError('no GPUs detected')
+        return sorted(available)
+    
+    devices: List[int] = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = (int(x) for x in part.split('-', 1))
+            devices.extend(range(start, end + 1))
+        else:
+            devices.append(int(part))
+    devices = list(dict.fromkeys(devices))
+    if available is not None:
+        missing = [d for d in devices if d not in available]
+        if missing:
+            raise ValueError(f"GPU index not found: {', '.join(map(str, missing))}")
+    return devices or None
@@ -1,68 +1,97 @@
 import time
 import subprocess
-import threading
 from typing import Dict, Any, Optional, List
 
+from monitor.collectors.gpu_sampler import GPUSampler, SamplerSubscription, get_sampler
+
+# (benchmark sample key, shared sampler field)
+SAMPLE_FIELDS = (
+    ('utilization', 'utilization'),
+    ('memory_used_mb', 'memory_used'),
+    ('memory_total_mb', 'memory_total'),
+    ('temperature_c', 'temperature'),
+    ('power_w', 'power'),
+)
 
 class GPUMetricsSampler:
-    """Handles GPU metrics collection via nvidia-smi in a separate thread."""
+    """Benchmark view of the shared GPU sampler (see monitor/collectors/gpu_sampler.py).
+
+    Subscribing raises the shared sampler to 100ms for the duration of the
+    run; readings come from its buffer, so no extra driver queries are made.
+    """
     
-    def __init__(self):
+    def __init__(self, sampler: Optional[GPUSampler] = None, device_index: int = 0):
         """Initialize metrics sampler."""
         self.nvidia_smi_error_count = 0
         self.max_consecutive_errors = 5
-        self._current_util = 0.0
-        self._lock = threading.Lock()
-        self._running = False
-        self._thread = None
+        self.sampler = sampler or get_sampler()
+        self.device_index = device_index
+        self._subscription: Optional[SamplerSubscription] = None
         self.sample_interval = 0.1  # 100ms between samples for real-time feel
+        self._gpu_info: Optional[Dict[str, Any]] = None
     
     def start(self):
-        """Start the background metrics collection thread."""
-        if self._running:
-            return
-        
-        self._running = True
-        self._thread = threading.Thread(target=self._sampling_loop, daemon=True)
-        self._thread.start()
+        """Subscribe to the shared sampler at the benchmark rate."""
+        if self._subscription is None:
+            self._subscription = self.sampler.subscribe(self.sample_interval)
     
     def stop(self):
-        """Stop the background metrics collection thread."""
-        self._running = False
-        if self._thread:
-            self._thread.join(timeout=2.0)
+        """Release the benchmark rate; the sampler falls back to other subscribers."""
+        if self._subscription is not None:
+            self._subscription.close()
+            self._subscription = None
     
-    def _sampling_loop(self):
-        """Background thread that continuously samples GPU metrics."""
-        while self._running:
-            try:
-                result = subprocess.run(
-                    ['nvidia-smi', '--query-gpu=utilization.gpu',
-                     '--format=csv,noheader,nounits'],
-                    capture_output=True, text=True, timeout=1
-                )
-                
-                if result.returncode == 0:
-                    util_str = result.stdout.strip()
-                    if util_str and util_str != '[N/A]':
-                        util_val = float(util_str)
-                        with self._lock:
-                            self._current_util = util_val
-                        self.nvidia_smi_error_count = 0
-                else:
-                    self.nvidia_smi_error_count += 1
-            except Exception:
-                self.nvidia_smi_error_count += 1
-            
-            time.sleep(self.sample_interval)
+    def _device_sample(self, sample_if_stale: bool = True) -> Optional[Dict[str, Any]]:
+        gpus = self.sampler.latest(max_age=1.0) if self._subscription else self.sampler.latest()
+        if not gpus and sample_if_stale:
+            # Not started (or sampler stalled): take a reading directly
+            gpus = self.sampler.sample_once()
+        for gpu in gpus:
+            if gpu.get('index') == self.device_index:
+                self.nvidia_smi_error_count = 0
+                return gpu
+        self.nvidia_smi_error_count += 1
+        return None
     
     def get_current_util(self) -> float:
-        """Get current GPU utilization (thread-safe)."""
-        with self._lock:
-            return self._current_util
+        """Get current GPU utilization from the latest shared sample."""
+        gpu = self._device_sample(sample_if_stale=False)
+        return float(gpu.get('utilization', 0)) if gpu else 0.0
     
     def get_gpu_info(self) -> Dict[str, Any]:
-        """Get GPU information via nvidia-smi."""
+        """Get static GPU information (NVML's cached device table, else nvidia-smi)."""
+        if self._gpu_info is None:
+            info = self._gpu_info_nvml() or self._gpu_info_smi()
+            if 'error' in info:
+                return info
+            self._gpu_info = info
+        return dict(self._gpu_info)
+    
+    def _gpu_info_nvml(self) -> Optional[Dict[str, Any]]:
+        session = self.sampler.session
+        if not session.ensure_initialized():
+            return None
+        device = next((d for d in session.devices() if d.index == self.device_index), None)
+        if device is None:
+            return None
+        nvml = session.nvml
+        info = {
+            'name': device.name,
+            'memory_total_mb': device.memory_total / (1024**2),
+            'driver_version': '',
+            'pcie_gen': '',
+            'pcie_width': '',
+        }
+        try:
+            version = nvml.nvmlSystemGetDriverVersion()
+            info['driver_version'] = version.decode() if isinstance(version, bytes) else str(version)
+            info['pcie_gen'] = str(nvml.nvmlDeviceGetCurrPcieLinkGeneration(device.handle))
+            info['pcie_width'] = str(nvml.nvmlDeviceGetCurrPcieLinkWidth(device.handle))
+        except Exception:
+            pass
+        return info
+    
+    def _gpu_info_smi(self) -> Dict[str, Any]:
         try:
             result = subprocess.run(
                 ['nvidia-smi', '--query-gpu=name,memory.total,driver_version,pcie.link.gen.current,pcie.link.width.current',
@@ -85,30 +114,40 @@ class GPUMetricsSampler:
             return {'error': str(e)}
     
     def sample_metrics(self) -> Dict[str, Any]:
-        """Collect a single sample of GPU metrics via nvidia-smi (for logging/storage)."""
-        try:
-            result = subprocess.run(
-                ['nvidia-smi', '--query-gpu=utilization.gpu,memory.used,memory.total,temperature.gpu,power.draw',
-                 '--format=csv,noheader,nounits'],
-                capture_output=True, text=True, timeout=1
-            )
-            
-            if result.returncode != 0:
-                return {'error': 'nvidia-smi failed', 'timestamp': time.time()}
-            
-            parts = [p.strip() for p in result.stdout.strip().split(',')]
-            util_val = float(parts[0]) if parts[0] != '[N/A]' else 0
-            
-            return {
-                'timestamp': time.time(),
-                'utilization': util_val,
-                'memory_used_mb': float(parts[1]) if parts[1] != '[N/A]' else 0,
-                'memory_total_mb': float(parts[2]) if parts[2] != '[N/A]' else 0,
-                'temperature_c': float(parts[3]) if parts[3] != '[N/A]' else 0,
-                'power_w': float(parts[4]) if parts[4] != '[N/A]' else 0,
-            }
-        except Exception as e:
-            return {'error': str(e), 'timestamp': time.time()}
+        """Latest GPU metrics sample from the shared sampler (for logging/storage)."""
+        gpu = self._device_sample()
+        if gpu is None:
+            return {'error': 'no GPU sample available', 'timestamp': time.time()}
+        sample = {'timestamp': gpu.get('timestamp', time.time())}
+        for key, field in SAMPLE_FIELDS:
+            sample[key] = float(gpu.get(field, 0) or 0)
+        return sample
+    
+    def sample_devices(self, indices: List[int]) -> Dict[str, Any]:
+        """Latest sample of several GPUs as per-device vectors.
+        
+        The vectors sit under ``per_device``, aligned with its ``devices``
+        list (GPUs missing from the sampler's last tick are left out). The
+        top-level fields are node-level scalars (see ``aggregate_sample``) so
+        single-GPU consumers such as the web UI keep working.
+        """
+        gpus = self.sampler.latest(max_age=1.0) if self._subscription else self.sampler.latest()
+        if not gpus:
+            gpus = self.sampler.sample_once()
+        by_index = {gpu.get('index'): gpu for gpu in gpus}
+        present = [i for i in indices if i in by_index]
+        if not present:
+            self.nvidia_smi_error_count += 1
+            return {'error': 'no GPU sample available', 'timestamp': time.time()}
+        self.nvidia_smi_error_count = 0
+        
+        sample: Dict[str, Any] = {
+            'timestamp': max(by_index[i].get('timestamp', 0) for i in present) or time.time(),
+            'devices': present,
+        }
+        for key, field in SAMPLE_FIELDS:
+            sample[key] = [float(by_index[i].get(field, 0) or 0) for i in present]
+        return aggregate_sample(sample)
     
     def should_sample(self, elapsed: float) -> bool:
         """Check if it's time to take a new sample (for logging)."""
@@ -116,8 +155,20 @@ class GPUMetricsSampler:
         return True  # Let caller decide when to sample
     
     def check_stop_conditions(self, sample: Dict[str, Any], config) -> Optional[str]:
-        """Check if any stop condition is met."""
+        """Check if any stop condition is met.
+        
+        Multi-GPU samples (with ``per_device`` vectors) are checked device by
+        device, so one hot GPU stops the run even if the node average is fine.
+        """
         # Don't stop on nvidia-smi errors - simulation can run without metrics
+        per_device = sample.get('per_device')
+        if per_device:
+            for pos, index in enumerate(per_device['devices']):
+                device = {key: per_device[key][pos] for key, _ in SAMPLE_FIELDS}
+                reason = self.check_stop_conditions(device, config)
+                if reason:
+                    return f"GPU {index}: {reason}"
+            return None
         
         if config.temp_limit_c > 0 and sample.get('temperature_c', 0) >= config.temp_limit_c:
             return f"Temperature limit reached ({sample['temperature_c']}C >= {config.temp_limit_c}C)"
@@ -129,3 +180,23 @@ class GPUMetricsSampler:
             return f"Memory limit reached ({sample['memory_used_mb']}MB >= {config.memory_limit_mb}MB)"
         
         return None
+
+
+def aggregate_sample(sample: Dict[str, Any]) -> Dict[str, Any]:
+    """Collapse a per-device vector sample into node-level scalars.
+    
+    The vectors move under ``per_device``; the top-level fields become the
+    mean utilization, the hottest temperature and the summed memory and power.
+    """
+    per_device = {'devices': sample['devices']}
+    per_device.update({key: sample[key] for key, _ in SAMPLE_FIELDS})
+    n = len(sample['devices'])
+    return {
+        'timestamp': sample['timestamp'],
+        'utilization': round(sum(per_device['utilization']) / n, 2),
+        'memory_used_mb': round(sum(per_device['memory_used_mb']), 2),
+        'memory_total_mb': sum(per_device['memory_total_mb']),
+        'temperature_c': max(per_device['temperature_c']),
+        'power_w': round(sum(per_device['power_w']), 2),
+        'per_device': per_device,
+    }
@@ -1,3 +1,4 @@
+import threading
 import time
 from typing import Dict, Any, List, Optional
 from datetime import datetime
@@ -5,7 +6,7 @@ from datetime import datetime
 from .config import BenchmarkConfig
 from .storage import BaselineStorage
 from .workloads import GPUStressWorker
-from .metrics_sampler import GPUMetricsSampler
+from .metrics_sampler import GPUMetricsSampler, SAMPLE_FIELDS
 
 
 class GPUBenchmark:
@@ -23,6 +24,8 @@ class GPUBenchmark:
         self.results: Dict[str, Any] = {}
         self.baseline_storage = BaselineStorage(db_path)
         self.stress_worker: Optional[GPUStressWorker] = None
+        self.stress_workers: List[GPUStressWorker] = []
+        self._worker_errors: Dict[int, str] = {}
         self.iteration_times: List[float] = []
         self.completed_full = False
         self.db_path = db_path
@@ -33,6 +36,11 @@ class GPUBenchmark:
         """Get GPU information."""
         return self.metrics_sampler.get_gpu_info()
     
+    def available_devices(self) -> List[int]:
+        """Indices of the GPUs the shared sampler currently sees."""
+        gpus = self.metrics_sampler.sampler.latest() or self.metrics_sampler.sampler.sample_once()
+        return [gpu['index'] for gpu in gpus]
+    
     def get_status(self) -> Dict[str, Any]:
         """Get current benchmark status."""
         render_fps = getattr(self, 'render_fps', 0.0)
@@ -44,7 +52,7 @@ class GPUBenchmark:
             # Update with real-time GPU util if available
             latest_sample['utilization'] = gpu_util
         
-        current_iteration = self.stress_worker.iterations if self.stress_worker else 0
+        current_iteration = self._total_iterations()
         is_running = getattr(self, 'running', False)
         
         # Determine backend in use: prefer explicit worker method, else configured preference
@@ -69,9 +77,15 @@ class GPUBenchmark:
             'gpu_util': gpu_util,
             'results': self.results if not is_running else None,  # Include results when idle
             'stop_reason': self.stop_reason if not is_running else None,
-            'backend': backend_in_use or (getattr(self, 'config', None).preferred_backend if getattr(self, 'config', None) else 'auto')
+            'backend': backend_in_use or (getattr(self, 'config', None).preferred_backend if getattr(self, 'config', None) else 'auto'),
+            'devices': [w.device_index for w in self.stress_workers],
         }
     
+    def _total_iterations(self) -> int:
+        if len(self.stress_workers) > 1:
+            return sum(w.iterations for w in self.stress_workers)
+        return self.stress_worker.iterations if self.stress_worker else 0
+    
     def get_samples(self) -> list:
         """Get all collected samples for real-time graphing."""
         return getattr(self, 'samples', []).copy()
@@ -301,6 +315,129 @@ class GPUBenchmark:
         
         return self._calculate_results()
     
+    def run_multi_gpu_benchmark(self) -> Dict[str, Any]:
+        """Drive one stress worker per GPU concurrently and sample them all.
+        
+        Each worker runs in its own thread bound to its device; the calling
+        thread samples every device at ``sample_interval_ms`` and applies the
+        stop conditions per device. Visualization and auto-scaling are
+        single-GPU features and are not used here.
+        """
+        self.running = True
+        self.start_time = time.time()
+        self.metrics_sampler.start()
+        
+        devices = [w.device_index for w in self.stress_workers]
+        sample_interval = self.config.sample_interval_ms / 1000.0
+        stop_event = threading.Event()
+        iteration_times: Dict[int, List[float]] = {d: [] for d in devices}
+        threads = [
+            threading.Thread(target=self._drive_worker, args=(w, stop_event, iteration_times[w.device_index]),
+                             daemon=True, name=f'bench-gpu{w.device_index}')
+            for w in self.stress_workers
+        ]
+        for thread in threads:
+            thread.start()
+        
+        try:
+            while True:
+                elapsed = time.time() - self.start_time
+                
+                if elapsed >= self.config.duration_seconds:
+                    self.stop_reason = "Duration completed"
+                    self.completed_full = True
+                    break
+                
+                if self._worker_errors:
+                    index, error = next(iter(self._worker_errors.items()))
+                    self.stop_reason = f"Error: GPU {index}: {error}"
+                    break
+                
+                sample = self.metrics_sampler.sample_devices(devices)
+                sample['elapsed_sec'] = round(elapsed, 2)
+                sample['iterations'] = self._total_iterations()
+                self.samples.append(sample)
+                
+                if 'error' not in sample:
+                    stop = self.metrics_sampler.check_stop_conditions(sample, self.config)
+                    if stop:
+                        self.stop_reason = stop
+                        break
+                
+                if self.should_stop:
+                    self.stop_reason = "User stopped"
+                    break
+                
+                self.progress = int((elapsed / self.config.duration_seconds) * 100)
+                time.sleep(max(0.0, min(sample_interval, self.config.duration_seconds - elapsed)))
+        
+        except Exception as e:
+            print(f"[ERROR] Benchmark loop exception: {e}")
+            import traceback
+            traceback.print_exc()
+            self.stop_reason = f"Error: {str(e)}"
+        finally:
+            stop_event.set()
+            for thread in threads:
+                thread.join(timeout=30)
+        
+        self.iteration_times = [t for d in devices for t in iteration_times[d]]
+        return self._calculate_results()
+    
+    def _drive_worker(self, worker: GPUStressWorker, stop_event: threading.Event, iteration_times: List[float]):
+        """Worker thread body: run iterations on one GPU until told to stop."""
+        try:
+            worker.bind_device()
+            while not stop_event.is_set():
+                iteration_times.append(worker.run_iteration())
+                if worker._method == 'passive':
+                    # Nothing to run on this GPU; don't spin
+                    stop_event.wait(0.1)
+        except Exception as e:
+            self._worker_errors[worker.device_index] = str(e)
+    
+    def _performance_stats(self, elapsed_sec: float) -> Dict[str, Any]:
+        """Worker performance stats, summed across GPUs for multi-GPU runs."""
+        if len(self.stress_workers) <= 1:
+            return self.stress_worker.get_performance_stats(elapsed_sec)
+        
+        per_worker = [w.get_performance_stats(elapsed_sec) for w in self.stress_workers]
+        stats: Dict[str, Any] = {
+            'iterations': sum(p['iterations'] for p in per_worker),
+            'workload_type': per_worker[0]['workload_type'],
+        }
+        # Peaks are per-GPU and not simultaneous, so they are not summed
+        for key in ('total_flops', 'tflops', 'avg_tflops', 'gflops',
+                    'total_steps', 'steps_per_second', 'particles_updated_per_second'):
+            values = [p[key] for p in per_worker if key in p]
+            if values:
+                stats[key] = round(sum(values), 3)
+        return stats
+    
+    def _per_device_results(self, valid_samples: List[Dict[str, Any]], elapsed_sec: float) -> List[Dict[str, Any]]:
+        """Per-GPU breakdown of a multi-GPU run."""
+        results = []
+        for worker in self.stress_workers:
+            device = {
+                'index': worker.device_index,
+                'iterations_completed': worker.iterations,
+                'performance': worker.get_performance_stats(elapsed_sec),
+            }
+            for key, _ in SAMPLE_FIELDS:
+                values = []
+                for sample in valid_samples:
+                    per_device = sample.get('per_device') or {}
+                    if worker.device_index in per_device.get('devices', ()):
+                        values.append(per_device[key][per_device['devices'].index(worker.device_index)])
+                if values:
+                    device[key] = {
+                        'min': round(min(values), 2),
+                        'max': round(max(values), 2),
+                        'avg': round(sum(values) / len(values), 2),
+                    }
+            results.append(device)
+        return results
+    
     def _calculate_results(self) -> Dict[str, Any]:
         """Calculate benchmark results from samples."""
         elapsed_sec = time.time() - self.start_time if self.start_time else 0
@@ -338,7 +475,7 @@ class GPUBenchmark:
             'completed_full': self.completed_full,
             'workload_type': self.stress_worker.workload_type,
             'benchmark_type': self.config.benchmark_type,
-            'iterations_completed': self.stress_worker.iterations,
+            'iterations_completed': self._total_iterations(),
             'avg_iteration_time_ms': round(avg_iter_time, 2),
             'iterations_per_second': round(1000 / avg_iter_time, 2) if avg_iter_time > 0 else 0,
             'utilization': calc_stats('utilization'),
@@ -348,9 +485,14 @@ class GPUBenchmark:
             'backend': getattr(self.stress_worker, '_method', 'unknown'),
         }
         
-        perf_stats = self.stress_worker.get_performance_stats(elapsed_sec)
+        perf_stats = self._performance_stats(elapsed_sec)
         results['performance'] = perf_stats
         
+        if len(self.stress_workers) > 1:
+            results['workload_type'] = f"{self.stress_worker.workload_type} x{len(self.stress_workers)} GPUs"
+            results['devices'] = [w.device_index for w in self.stress_workers]
+            results['per_device'] = self._per_device_results(valid_samples, elapsed_sec)
+        
         temp_range = results['temperature_c']['max'] - results['temperature_c']['min']
         stability_score = max(0, 100 - int(temp_range * 5))
         thermal_score = max(0, min(100, int((90 - results['temperature_c']['max']) * 5)))
@@ -406,12 +548,27 @@ class GPUBenchmark:
         self.running = True
         self.progress = 0
         self.stop_reason = None
-        
-        self.stress_worker = GPUStressWorker(
-            benchmark_type=config.benchmark_type,
-            config=config,
-            visualize=visualize
-        )
+        self._worker_errors = {}
+        
+        devices = config.device_list
+        multi_gpu = len(devices) > 1
+        if multi_gpu and visualize:
+            print("[WARNING] Visualization is single-GPU only - running multi-GPU benchmark without it")
+            visualize = False
+        if self.metrics_sampler.device_index != devices[0]:
+            self.metrics_sampler = GPUMetricsSampler(device_index=devices[0])
+        
+        # Workers are set up here, one per GPU; multi-GPU runs drive each from its own thread
+        self.stress_workers = [
+            GPUStressWorker(
+                benchmark_type=config.benchmark_type,
+                config=config,
+                visualize=visualize,
+                device_index=device
+            )
+            for device in devices
+        ]
+        self.stress_worker = self.stress_workers[0]
         
         try:
             gpu_info = self.get_gpu_info()
@@ -427,18 +584,25 @@ class GPUBenchmark:
                     'memory_limit_mb': config.memory_limit_mb,
                     'matrix_size': config.matrix_size if config.benchmark_type == 'gemm' else None,
                     'num_particles': config.num_particles if config.benchmark_type == 'particle' else None,
+                    'devices': devices,
                 },
                 'gpu_info': gpu_info,
                 'status': 'running',
             }
             
             run_mode = 'simulation' if visualize else 'benchmark'
+            if multi_gpu:
+                # Keep multi-GPU baselines apart from single-GPU ones
+                run_mode = f"{run_mode}-{len(devices)}gpu"
             if 'name' in gpu_info:
                 baseline = self.baseline_storage.get_baseline(gpu_info['name'], config.benchmark_type, run_mode)
                 if baseline:
                     self.results['baseline'] = baseline
             
-            results = self.run_stress_benchmark(visualize=visualize)
+            if multi_gpu:
+                results = self.run_multi_gpu_benchmark()
+            else:
+                results = self.run_stress_benchmark(visualize=visualize)
             self.results.update(results)
             self.results['status'] = 'completed'
             self.results['run_mode'] = run_mode
@@ -457,9 +621,9 @@ class GPUBenchmark:
         finally:
             self.metrics_sampler.stop()
             
-            if self.stress_worker:
+            for worker in self.stress_workers:
                 try:
-                    self.stress_worker.cleanup()
+                    worker.cleanup()
                 except Exception:
                     pass
             self.running = False
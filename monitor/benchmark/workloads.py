@@ -14,8 +14,10 @@ from .backend_stress import BackendStressManager
 class GPUStressWorker:
     """GPU stress workload using cupy or torch libraries."""
     
-    def __init__(self, benchmark_type: str = "gemm", config: Optional[BenchmarkConfig] = None, visualize: bool = False):
+    def __init__(self, benchmark_type: str = "gemm", config: Optional[BenchmarkConfig] = None, visualize: bool = False,
+                 device_index: int = 0):
         self.iterations = 0
+        self.device_index = device_index
         self.benchmark_type = benchmark_type
         self.config = config or BenchmarkConfig()
         self.visualize = visualize
@@ -43,6 +45,7 @@ class GPUStressWorker:
                 import cupy as cp
                 self._method = 'cupy'
                 self._cp = cp
+                self.bind_device()
                 self._setup_cupy()
                 self._initialized = True
                 return True
@@ -56,6 +59,7 @@ class GPUStressWorker:
                 if torch.cuda.is_available():
                     self._method = 'torch'
                     self._torch = torch
+                    self.bind_device()
                     self._setup_torch()
                     self._initialized = True
                     return True
@@ -88,6 +92,18 @@ class GPUStressWorker:
         self._method = 'passive'
         self.workload_type = "Passive Monitoring (cupy/torch not available - run your own GPU workload)"
     
+    def bind_device(self):
+        """Make ``device_index`` the current CUDA device for the calling thread.
+        
+        Both cupy and torch keep the current device per thread, so a worker
+        driven from its own thread must call this there before running
+        iterations (setup already does it for the constructing thread).
+        """
+        if self._method == 'cupy':
+            self._cp.cuda.Device(self.device_index).use()
+        elif self._method == 'torch':
+            self._torch.cuda.set_device(self.device_index)
+    
     def _setup_cupy(self):
         """Setup workload using cupy."""
         cp = self._cp
@@ -132,7 +148,7 @@ class GPUStressWorker:
     def _setup_torch(self):
         """Setup workload using torch."""
         torch = self._torch
-        device = torch.device('cuda')
+        device = torch.device('cuda', self.device_index)
         n = self.config.matrix_size if self.benchmark_type == "gemm" else self.config.num_particles
         
         if self.benchmark_type == "gemm":
@@ -394,7 +410,7 @@ class GPUStressWorker:
                 self._gpu_arrays['B'] = cp.random.rand(new_size, new_size, dtype=cp.float32)
             elif self._method == 'torch':
                 torch = self._torch
-                device = torch.device('cuda')
+                device = torch.device('cuda', self.device_index)
                 self._gpu_arrays['A'] = torch.randn(new_size, new_size, device=device, dtype=torch.float32)
                 self._gpu_arrays['B'] = torch.randn(new_size, new_size, device=device, dtype=torch.float32)
             
@@ -2,6 +2,7 @@ import threading
 from fastapi import APIRouter
 
 from monitor.benchmark import BenchmarkConfig, get_benchmark_instance
+from monitor.benchmark.config import parse_devices
 
 router = APIRouter(
     prefix="/api/benchmark",
@@ -25,13 +26,19 @@ async def start_benchmark(
     auto_scale: bool = False,
     visualize: bool = False,
     backend_multiplier: int = 1,
-    preferred_backend: str = 'auto'
+    preferred_backend: str = 'auto',
+    gpus: str = ''
 ):
     global benchmark_thread
     with benchmark_lock:
         if benchmark_instance.running:
             return {'status': 'already_running', 'progress': benchmark_instance.progress}
         
+        try:
+            devices = parse_devices(gpus, benchmark_instance.available_devices() if gpus else None)
+        except ValueError as e:
+            return {'status': 'error', 'error': str(e)}
+        
         bench_config = BenchmarkConfig(
             mode=mode,
             benchmark_type=benchmark_type,
@@ -44,7 +51,8 @@ async def start_benchmark(
             auto_scale=auto_scale,
             target_gpu_util=98,
             backend_multiplier=backend_multiplier,
-            preferred_backend=preferred_backend
+            preferred_backend=preferred_backend,
+            devices=devices
         )
         
         def run_benchmark():
@@ -7,6 +7,7 @@ from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeEl
 from rich.table import Table
 
 from monitor.benchmark import GPUBenchmark, BenchmarkConfig
+from monitor.benchmark.config import parse_devices
 
 console = Console()
 
@@ -25,7 +26,8 @@ console = Console()
 @click.option('--save-baseline', is_flag=True, help='Save results as baseline (auto-saved if completed)')
 @click.option('--compare-baseline', is_flag=True, help='Compare with existing baseline')
 @click.option('--visualize', '-v', is_flag=True, help='Show particle visualization window (particles only, requires pygame)')
-def benchmark_cli(bench_type, mode, duration, matrix_size, particles, temp_limit, power_limit, save_baseline, compare_baseline, visualize):
+@click.option('--gpus', default='', help='GPUs to run on concurrently, e.g. "0,1", "0-3" or "all" (default: GPU 0)')
+def benchmark_cli(bench_type, mode, duration, matrix_size, particles, temp_limit, power_limit, save_baseline, compare_baseline, visualize, gpus):
     """Run GPU benchmarks and simulations from the terminal.
 
 Implementation: see monitor/benchmark/ for the workload implementations and configs.
@@ -33,6 +35,13 @@ Implementation: see monitor/benchmark/ for the workload implementations and conf
     from health_monitor import BANNER
     console.print(BANNER, style="bold cyan")
 
+    bench = GPUBenchmark()
+    try:
+        devices = parse_devices(gpus, bench.available_devices() if gpus else None)
+    except ValueError as e:
+        console.print(f"[red]Invalid --gpus:[/red] {e}")
+        return
+
     auto_scale = (mode == 'stress')
     config = BenchmarkConfig(
         mode=mode,
@@ -44,20 +53,22 @@ Implementation: see monitor/benchmark/ for the workload implementations and conf
         power_limit_w=power_limit,
         auto_scale=auto_scale,
         target_gpu_util=98,
+        devices=devices,
     )
 
-    bench = GPUBenchmark()
-
     gpu_info = bench.get_gpu_info()
     console.print(f"\n[cyan]GPU:[/cyan] {gpu_info.get('name', 'Unknown')}")
     console.print(f"[cyan]Memory:[/cyan] {gpu_info.get('memory_total_mb', 0):.0f} MB")
     console.print(f"[cyan]Driver:[/cyan] {gpu_info.get('driver_version', 'Unknown')}")
+    if len(config.device_list) > 1:
+        console.print(f"[cyan]GPUs:[/cyan] {', '.join(map(str, config.device_list))} (one worker per GPU)")
 
     console.print(f"[cyan]Mode:[/cyan] {'STRESS (auto-scaling to push GPU limits)' if auto_scale else 'FIXED (using predefined sizes)'}")
 
     baseline = None
     if compare_baseline:
-        baseline = bench.get_baseline(bench_type)
+        run_mode = f"benchmark-{len(config.device_list)}gpu" if len(config.device_list) > 1 else 'benchmark'
+        baseline = bench.get_baseline(bench_type, run_mode)
         if baseline:
             console.print(f"\n[green]Baseline found:[/green] {baseline['timestamp']}")
             console.print(f"  Benchmark: {baseline.get('benchmark_type', bench_type)}")
@@ -192,6 +203,21 @@ Implementation: see monitor/benchmark/ for the workload implementations and conf
 
     console.print(table)
 
+    if results.get('per_device'):
+        device_table = Table(title="Per-GPU Results", show_header=True, header_style="bold magenta")
+        for column in ("GPU", "Iterations", "Util avg", "Temp max", "Power avg", "Memory avg"):
+            device_table.add_column(column, justify="right")
+        for device in results['per_device']:
+            device_table.add_row(
+                str(device['index']),
+                f"{device['iterations_completed']:,}",
+                f"{device.get('utilization', {}).get('avg', 0):.1f}%",
+                f"{device.get('temperature_c', {}).get('max', 0)}°C",
+                f"{device.get('power_w', {}).get('avg', 0):.1f}W",
+                f"{device.get('memory_used_mb', {}).get('avg', 0):.0f} MB",
+            )
+        console.print(device_table)
+
     if results.get('saved_as_baseline'):
         console.print(f"\n[green]Results saved as new baseline[/green]")
     elif results.get('completed_full'):
@@ -0,0 +1,232 @@
+"""Cluster aggregator: poll remote agents and merge their snapshots.
+
+Maintenance:
+- Purpose: one dashboard for every node in ``cluster.nodes``. Each node
+  runs ``health_monitor.py agent`` (or the full web server); both serve
+  the local snapshot at ``GET /api/agent/snapshot``.
+- Polling: every ``monitoring.interval_seconds`` all nodes are fetched
+  concurrently. Each node has its own ``requests.Session`` holding one
+  keep-alive connection, so steady-state polls skip TCP setup. The
+  blocking calls run on a dedicated thread pool (one thread per node, up
+  to ``_MAX_WORKERS``) so the event loop and the default executor are
+  never tied up by a slow node.
+- Timeouts: ``cluster.node_timeout_seconds`` (per node override:
+  ``timeout``) bounds both the HTTP call and the wait for it. A node that
+  misses it is reported as ``timeout`` with its last good snapshot marked
+  ``stale``; the other nodes are unaffected. Its call is not re-issued
+  until it returns, so a hung node holds at most one worker.
+- Nodes: strings (``host``, ``host:port``, ``http://host:port``) or dicts
+  ``{hostname, port, url, name, timeout}``; the port defaults to
+  ``cluster.agent_port``. ``cluster.agent_token`` is sent as
+  ``X-Agent-Token`` when set.
+- View: ``ClusterAggregator.view`` is the last merged result: per-node
+  entries plus a summary over the nodes that answered; ``/api/cluster``
+  adds the local node.
+- Debug: ``python scripts/bench_cluster.py`` starts local agents on
+  consecutive ports and times poll rounds.
+"""
+
+import asyncio
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+
+SNAPSHOT_PATH = '/api/agent/snapshot'
+
+TOKEN_HEADER = 'X-Agent-Token'
+
+DEFAULT_AGENT_PORT = 8091
+
+# Upper bound on concurrent node fetches
+_MAX_WORKERS = 64
+
+
+@dataclass(frozen=True)
+class NodeConfig:
+    name: str
+    url: str
+    timeout: float
+
+
+def parse_nodes(nodes: Iterable[Union[str, Dict[str, Any]]], default_port: int = DEFAULT_AGENT_PORT,
+                default_timeout: float = 2.0) -> List[NodeConfig]:
+    """Normalize ``cluster.nodes`` entries; entries without a host are skipped."""
+    parsed = []
+    for node in nodes or []:
+        if isinstance(node, str):
+            node = {'url': node} if '://' in node else {'hostname': node}
+        url = node.get('url')
+        label = node.get('hostname') or node.get('host')
+        if not url:
+            if not label:
+                continue
+            host = str(label).strip()
+            if ':' in host and not host.startswith('['):
+                host, port = host.rsplit(':', 1)
+            else:
+                port = node.get('port', default_port)
+            url = f'http://{host}:{port}'
+            # several agents on one host stay distinguishable
+            label = host if int(port) == int(default_port) else f'{host}:{port}'
+        url = str(url).rstrip('/')
+        name = str(node.get('name') or label or url.split('://', 1)[-1])
+        parsed.append(NodeConfig(name, url, float(node.get('timeout', default_timeout))))
+    return parsed
+
+
+def summarize(snapshots: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Cluster-wide totals over node snapshots (``MetricsSnapshot.as_metrics()`` shape)."""
+    gpus = [g for snap in snapshots for g in snap.get('gpus', []) if 'error' not in g]
+    systems = [snap.get('system') or {} for snap in snapshots]
+    cpu = [s['cpu_percent'] for s in systems if isinstance(s.get('cpu_percent'), (int, float))]
+    return {
+        'nodes': len(snapshots),
+        'gpus': len(gpus),
+        'gpu_utilization_avg': round(sum(g.get('utilization', 0) for g in gpus) / len(gpus), 1) if gpus else None,
+        'gpu_memory_used_mb': sum(g.get('memory_used', 0) for g in gpus),
+        'gpu_memory_total_mb': sum(g.get('memory_total', 0) for g in gpus),
+        'gpu_power_w': round(sum(g.get('power', 0) or 0 for g in gpus), 1),
+        'cpu_percent_avg': round(sum(cpu) / len(cpu), 1) if cpu else None,
+    }
+
+
+def _consume(future: asyncio.Future):
+    if not future.cancelled():
+        future.exception()
+
+
+class ClusterAggregator:
+    """Polls ``cluster.nodes`` concurrently and keeps the merged view."""
+
+    def __init__(self, nodes: List[NodeConfig], interval_seconds: float = 5.0,
+                 token: Optional[str] = None):
+        self.nodes = nodes
+        self.interval_seconds = max(0.5, float(interval_seconds))
+        self.token = token
+        self._sessions: Dict[str, Any] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # node url -> (monotonic time, snapshot) of the last successful poll
+        self._last_good: Dict[str, tuple] = {}
+        # node url -> fetch that outlived its timeout and still holds a worker
+        self._inflight: Dict[str, Future] = {}
+        self._view: Dict[str, Any] = {'nodes': [], 'summary': summarize([]), 'polled_at': None}
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'ClusterAggregator':
+        cluster = config.get('cluster', {}) or {}
+        monitoring = config.get('monitoring', {}) or {}
+        nodes = parse_nodes(cluster.get('nodes') or [],
+                            default_port=cluster.get('agent_port', DEFAULT_AGENT_PORT),
+                            default_timeout=cluster.get('node_timeout_seconds', 2.0))
+        return cls(nodes, interval_seconds=monitoring.get('interval_seconds', 5),
+                   token=cluster.get('agent_token'))
+
+    @property
+    def view(self) -> Dict[str, Any]:
+        return self._view
+
+    async def start(self):
+        if not self.nodes or not REQUESTS_AVAILABLE:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        for session in self._sessions.values():
+            session.close()
+        self._sessions.clear()
+        self._inflight.clear()
+        if self._executor is not None:
+            # in-flight calls end within their HTTP timeout
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+            try:
+                await self.poll()
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                pass
+            await asyncio.sleep(max(0.0, self.interval_seconds - (time.monotonic() - started)))
+
+    async def poll(self) -> Dict[str, Any]:
+        """Fetch every node once, concurrently, and publish the merged view."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=max(1, min(_MAX_WORKERS, len(self.nodes))),
+                                                thread_name_prefix='cluster-poll')
+        entries = await asyncio.gather(*(self._poll_node(node) for node in self.nodes))
+        live = [e['snapshot'] for e in entries if e['status'] == 'ok']
+        self._view = {
+            'nodes': entries,
+            'summary': summarize(live),
+            'polled_at': time.time(),
+        }
+        return self._view
+
+    async def _poll_node(self, node: NodeConfig) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {'node': node.name, 'url': node.url}
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        future = self._inflight.get(node.url)
+        if future is not None and future.done():
+            del self._inflight[node.url]
+            future = None
+        try:
+            if future is not None:
+                # not re-issued until the previous call returns
+                raise asyncio.TimeoutError
+            future = self._executor.submit(self._fetch, node)
+            waiter = asyncio.wrap_future(future, loop=loop)
+            # a call that outlives the timeout fails later with nobody awaiting it
+            waiter.add_done_callback(_consume)
+            snapshot = await asyncio.wait_for(asyncio.shield(waiter), node.timeout)
+            entry.update(status='ok', snapshot=snapshot)
+            self._last_good[node.url] = (time.monotonic(), snapshot)
+        except asyncio.TimeoutError:
+            self._inflight[node.url] = future
+            entry.update(status='timeout', error=f'no answer within {node.timeout:g}s')
+        except Exception as e:
+            entry.update(status='error', error=str(e))
+        entry['latency_ms'] = round((time.monotonic() - started) * 1000, 1)
+
+        if entry['status'] != 'ok' and node.url in self._last_good:
+            seen, snapshot = self._last_good[node.url]
+            entry.update(snapshot=snapshot, stale=True, last_seen_seconds=round(time.monotonic() - seen, 1))
+        return entry
+
+    def _session(self, node: NodeConfig):
+        session = self._sessions.get(node.url)
+        if session is None:
+            session = requests.Session()
+            # one persistent connection per node, no hidden retries past the timeout
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            if self.token:
+                session.headers[TOKEN_HEADER] = str(self.token)
+            self._sessions[node.url] = session
+        return session
+
+    def _fetch(self, node: NodeConfig) -> Dict[str, Any]:
+        response = self._session(node).get(node.url + SNAPSHOT_PATH, timeout=node.timeout)
+        response.raise_for_status()
+        return response.json()
@@ -0,0 +1,238 @@
+"""Per-device disk I/O and per-mount usage.
+
+Maintenance:
+- Purpose: show whether training jobs are stalled on storage: throughput,
+  IOPS, latency and utilization per block device, and space left on the
+  mounts that matter (NVMe scratch, NFS homes, ...).
+- Devices: counters come from ``/proc/diskstats`` (``procfs.py``) or
+  ``psutil.disk_io_counters(perdisk=True)``; each device keeps its
+  previous counters with a ``time.monotonic()`` stamp. Per interval:
+  ``read/write_bytes_per_sec``, ``read/write_iops``,
+  ``read/write_latency_ms`` (time spent on requests completed in the
+  interval divided by their number, like iostat's await) and
+  ``util_percent`` (share of the interval with I/O in flight; Linux only).
+  A device's first sample, or one whose counters went backwards (reset),
+  only sets the baseline.
+- Device selection: ``devices`` takes fnmatch patterns
+  (``monitoring.disk_devices``); without it, whole disks are reported
+  (names under ``/sys/block``) minus loop/ram/zram/optical devices, so
+  partitions do not double count.
+- Mounts: ``mounts`` lists paths, or ``{path, name, timeout}`` dicts
+  (``monitoring.disk_mounts``, default ``['/']``). statfs on a network
+  mount can hang for minutes when the server is gone, so each call runs on
+  a small pool of daemon threads and is waited for at most its timeout
+  (``monitoring.disk_statfs_timeout_seconds``, default 1 s). A mount whose
+  previous call has not returned is not asked again until it does: it is
+  reported with ``error: 'timeout'`` without waiting again, and holds at
+  most one worker. A hung mount therefore delays only the first tick.
+- Debug: ``DiskCollector(mounts=['/', '/mnt/nfs']).collect()`` twice.
+"""
+
+import fnmatch
+import os
+import queue
+import shutil
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .procfs import ProcReader, get_reader
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+# Devices never worth reporting when no explicit patterns are configured
+_DEFAULT_EXCLUDE = ('loop*', 'ram*', 'zram*', 'sr*', 'fd*')
+
+_SECTOR_BYTES = 512
+
+# Upper bound on statfs worker threads
+_MAX_STATFS_WORKERS = 8
+
+
+class _DaemonPool:
+    """Worker threads that never block interpreter exit, unlike ThreadPoolExecutor."""
+
+    def __init__(self, workers: int, name: str = 'statfs'):
+        self._queue: 'queue.Queue[tuple]' = queue.Queue()
+        for i in range(max(1, workers)):
+            threading.Thread(target=self._run, name=f'{name}-{i}', daemon=True).start()
+
+    def submit(self, fn, *args) -> Future:
+        future: Future = Future()
+        self._queue.put((fn, args, future))
+        return future
+
+    def _run(self):
+        while True:
+            fn, args, future = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+
+def _usage(path: str) -> Dict[str, Any]:
+    if PSUTIL_AVAILABLE:
+        usage = psutil.disk_usage(path)
+        total, used, free, percent = usage.total, usage.used, usage.free, usage.percent
+    else:
+        usage = shutil.disk_usage(path)
+        total, used, free = usage.total, usage.used, usage.free
+        percent = round(used / total * 100, 1) if total else 0.0
+    return {
+        'total_gb': total / (1024**3),
+        'used_gb': used / (1024**3),
+        'free_gb': free / (1024**3),
+        'percent': percent,
+    }
+
+
+def mount_label(path: str) -> str:
+    """Series-friendly name for a mountpoint: '/' -> 'root', '/mnt/nfs' -> 'mnt_nfs'."""
+    return path.strip('/').replace('/', '_') or 'root'
+
+
+class DiskCollector:
+    """Collects per-device I/O rates and per-mount usage."""
+
+    def __init__(self, proc: Optional[ProcReader] = None, use_procfs: bool = True,
+                 devices: Optional[Iterable[str]] = None,
+                 mounts: Optional[Iterable[Union[str, Dict[str, Any]]]] = None,
+                 statfs_timeout: float = 1.0, sys_block: str = '/sys/block'):
+        self._proc = (proc or get_reader()) if use_procfs else None
+        self.devices = tuple(devices or ())
+        self.sys_block = sys_block
+        self.mounts: List[Dict[str, Any]] = []
+        for mount in (['/'] if mounts is None else mounts):
+            if isinstance(mount, str):
+                mount = {'path': mount}
+            path = str(mount['path'])
+            self.mounts.append({
+                'path': path,
+                'name': str(mount.get('name') or mount_label(path)),
+                'timeout': float(mount.get('timeout', statfs_timeout)),
+            })
+        # name -> (monotonic time, counters)
+        self._prev: Dict[str, Tuple[float, Tuple[int, ...]]] = {}
+        self._selected: Dict[str, bool] = {}
+        self._pool: Optional[_DaemonPool] = None
+        # path -> statfs call that has not returned yet
+        self._inflight: Dict[str, Future] = {}
+
+    def collect(self) -> Dict[str, Any]:
+        metrics: Dict[str, Any] = {'devices': [], 'mounts': []}
+        try:
+            metrics['devices'] = self._collect_devices()
+        except Exception as e:
+            metrics['devices_error'] = str(e)
+        metrics['mounts'] = self._collect_mounts()
+        return metrics
+
+    def _counters(self) -> Dict[str, Tuple[int, ...]]:
+        """Device name -> (reads, read_bytes, read_ms, writes, write_bytes, write_ms, busy_ms or None)."""
+        if self._proc is not None:
+            try:
+                return {name: (c[0], c[1] * _SECTOR_BYTES, c[2], c[3], c[4] * _SECTOR_BYTES, c[5], c[6])
+                        for name, c in self._proc.diskstats().items()}
+            except (OSError, ValueError, IndexError):
+                pass
+        if not PSUTIL_AVAILABLE:
+            return {}
+        counters = psutil.disk_io_counters(perdisk=True) or {}
+        return {name: (c.read_count, c.read_bytes, c.read_time, c.write_count, c.write_bytes,
+                       c.write_time, getattr(c, 'busy_time', None))
+                for name, c in counters.items()}
+
+    def _is_selected(self, name: str) -> bool:
+        selected = self._selected.get(name)
+        if selected is None:
+            if self.devices:
+                selected = any(fnmatch.fnmatchcase(name, p) for p in self.devices)
+            else:
+                selected = (not any(fnmatch.fnmatchcase(name, p) for p in _DEFAULT_EXCLUDE)
+                            and (not os.path.isdir(self.sys_block)
+                                 or os.path.exists(os.path.join(self.sys_block, name))))
+            self._selected[name] = selected
+        return selected
+
+    def _collect_devices(self) -> List[Dict[str, Any]]:
+        io = self._counters()
+        now = time.monotonic()
+        for name in list(self._prev):
+            if name not in io:
+                del self._prev[name]
+                self._selected.pop(name, None)
+
+        devices = []
+        for name, counters in io.items():
+            if not self._is_selected(name):
+                continue
+            device: Dict[str, Any] = {'name': name}
+            device.update(zip(('reads', 'read_bytes', 'read_ms', 'writes', 'write_bytes', 'write_ms'), counters))
+            prev = self._prev.get(name)
+            self._prev[name] = (now, counters)
+            if prev is not None:
+                device.update(self._rates(now - prev[0], prev[1], counters))
+            devices.append(device)
+        return devices
+
+    @staticmethod
+    def _rates(elapsed: float, before: Tuple[int, ...], after: Tuple[int, ...]) -> Dict[str, float]:
+        if elapsed <= 0:
+            return {}
+        deltas = [None if a is None or b is None else a - b for a, b in zip(after, before)]
+        if any(d is not None and d < 0 for d in deltas):
+            # counters reset (device re-attached): this interval only sets the baseline
+            return {}
+        reads, read_bytes, read_ms, writes, write_bytes, write_ms, busy_ms = deltas
+        rates = {
+            'read_bytes_per_sec': read_bytes / elapsed,
+            'write_bytes_per_sec': write_bytes / elapsed,
+            'read_iops': reads / elapsed,
+            'write_iops': writes / elapsed,
+            'read_latency_ms': read_ms / reads if reads else 0.0,
+            'write_latency_ms': write_ms / writes if writes else 0.0,
+        }
+        if busy_ms is not None:
+            rates['util_percent'] = min(100.0, busy_ms / (elapsed * 1000) * 100)
+        return rates
+
+    def _collect_mounts(self) -> List[Dict[str, Any]]:
+        if not self.mounts:
+            return []
+        if self._pool is None:
+            self._pool = _DaemonPool(min(_MAX_STATFS_WORKERS, len(self.mounts)))
+
+        started = time.monotonic()
+        pending = []
+        for mount in self.mounts:
+            future = self._inflight.get(mount['path'])
+            # a call left over from an earlier tick already had its chance to finish
+            timeout = 0.0 if future is not None else mount['timeout']
+            if future is None:
+                future = self._pool.submit(_usage, mount['path'])
+                self._inflight[mount['path']] = future
+            pending.append((mount, future, timeout))
+
+        results = []
+        for mount, future, timeout in pending:
+            entry: Dict[str, Any] = {'path': mount['path'], 'name': mount['name']}
+            try:
+                remaining = timeout - (time.monotonic() - started)
+                entry.update(future.result(timeout=max(0.0, remaining)))
+                del self._inflight[mount['path']]
+            except FutureTimeout:
+                # keep the call: it is not re-issued until it returns
+                entry['error'] = 'timeout'
+            except Exception as e:
+                del self._inflight[mount['path']]
+                entry['error'] = str(e)
+            results.append(entry)
+        return results
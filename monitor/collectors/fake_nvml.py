@@ -0,0 +1,166 @@
+"""In-process stand-in for the subset of ``pynvml`` used by the collectors.
+
+Maintenance:
+- Purpose: exercise the NVML code paths on machines without an NVIDIA GPU.
+  Enable with ``MYGPU_FAKE_NVML=<gpu count>`` or pass this module to
+  ``NVMLSession(nvml=fake_nvml)`` directly.
+- Debug: ``call_counts`` records how often each entry point was hit, which
+  makes it easy to check that static attributes are not re-queried per tick.
+"""
+
+import math
+import time
+from collections import Counter
+from types import SimpleNamespace
+from typing import Dict, List, Tuple
+
+NVML_TEMPERATURE_GPU = 0
+
+call_counts: Counter = Counter()
+
+_initialized = 0
+_devices: List[Dict] = []
+_processes: Dict[int, List[Tuple[int, int]]] = {}
+
+
+class NVMLError(Exception):
+    """Mirror of ``pynvml.NVMLError`` so callers can catch it generically."""
+
+
+def configure(device_count: int = 1, name: str = 'NVIDIA Fake GPU',
+              memory_total_mb: int = 24576, power_limit_w: float = 300.0):
+    """Reset the fake driver to ``device_count`` identical devices."""
+    global _devices
+    call_counts.clear()
+    _processes.clear()
+    _devices = [
+        {
+            'index': i,
+            'name': f'{name} {i}' if device_count > 1 else name,
+            'uuid': f'GPU-00000000-0000-0000-0000-{i:012d}',
+            'memory_total': int(memory_total_mb) * 1024 ** 2,
+            'power_limit_mw': int(power_limit_w * 1000),
+        }
+        for i in range(int(device_count))
+    ]
+
+
+def set_processes(index: int, processes: List[Tuple[int, int]]):
+    """Set ``(pid, used_gpu_memory_bytes)`` pairs reported for a device."""
+    _processes[int(index)] = list(processes)
+
+
+def _check_init():
+    if _initialized <= 0:
+        raise NVMLError('Uninitialized')
+
+
+def _device(handle) -> Dict:
+    _check_init()
+    try:
+        return _devices[handle.index]
+    except (AttributeError, IndexError):
+        raise NVMLError('Invalid Argument')
+
+
+def _wave(index: int, period: float, lo: float, hi: float) -> float:
+    phase = (time.time() / period) + index
+    return lo + (hi - lo) * (0.5 + 0.5 * math.sin(phase))
+
+
+def nvmlInit():
+    global _initialized
+    call_counts['nvmlInit'] += 1
+    if not _devices:
+        configure()
+    _initialized += 1
+
+
+def nvmlShutdown():
+    global _initialized
+    call_counts['nvmlShutdown'] += 1
+    _check_init()
+    _initialized -= 1
+
+
+def nvmlDeviceGetCount() -> int:
+    call_counts['nvmlDeviceGetCount'] += 1
+    _check_init()
+    return len(_devices)
+
+
+def nvmlDeviceGetHandleByIndex(index: int):
+    call_counts['nvmlDeviceGetHandleByIndex'] += 1
+    _check_init()
+    if not 0 <= index < len(_devices):
+        raise NVMLError('Invalid Argument')
+    return SimpleNamespace(index=index)
+
+
+def nvmlDeviceGetName(handle) -> str:
+    call_counts['nvmlDeviceGetName'] += 1
+    return _device(handle)['name']
+
+
+def nvmlDeviceGetUUID(handle) -> str:
+    call_counts['nvmlDeviceGetUUID'] += 1
+    return _device(handle)['uuid']
+
+
+def nvmlDeviceGetPowerManagementLimit(handle) -> int:
+    call_counts['nvmlDeviceGetPowerManagementLimit'] += 1
+    return _device(handle)['power_limit_mw']
+
+
+def nvmlDeviceGetMemoryInfo(handle):
+    call_counts['nvmlDeviceGetMemoryInfo'] += 1
+    dev = _device(handle)
+    total = dev['memory_total']
+    used = int(total * _wave(dev['index'], 60.0, 0.05, 0.6))
+    used += sum(mem for _, mem in _processes.get(dev['index'], []))
+    used = min(used, total)
+    return SimpleNamespace(total=total, used=used, free=total - used)
+
+
+def nvmlDeviceGetUtilizationRates(handle):
+    call_counts['nvmlDeviceGetUtilizationRates'] += 1
+    dev = _device(handle)
+    gpu = int(round(_wave(dev['index'], 20.0, 0, 100)))
+    return SimpleNamespace(gpu=gpu, memory=gpu // 2)
+
+
+def nvmlDeviceGetTemperature(handle, sensor: int) -> int:
+    call_counts['nvmlDeviceGetTemperature'] += 1
+    dev = _device(handle)
+    return int(round(_wave(dev['index'], 45.0, 35, 82)))
+
+
+def nvmlDeviceGetPowerUsage(handle) -> int:
+    call_counts['nvmlDeviceGetPowerUsage'] += 1
+    dev = _device(handle)
+    return int(_wave(dev['index'], 30.0, 0.1, 0.9) * dev['power_limit_mw'])
+
+
+def nvmlSystemGetDriverVersion() -> str:
+    call_counts['nvmlSystemGetDriverVersion'] += 1
+    _check_init()
+    return '550.00'
+
+
+def nvmlDeviceGetCurrPcieLinkGeneration(handle) -> int:
+    call_counts['nvmlDeviceGetCurrPcieLinkGeneration'] += 1
+    _device(handle)
+    return 4
+
+
+def nvmlDeviceGetCurrPcieLinkWidth(handle) -> int:
+    call_counts['nvmlDeviceGetCurrPcieLinkWidth'] += 1
+    _device(handle)
+    return 16
+
+
+def nvmlDeviceGetComputeRunningProcesses(handle):
+    call_counts['nvmlDeviceGetComputeRunningProcesses'] += 1
+    dev = _device(handle)
+    return [SimpleNamespace(pid=pid, usedGpuMemory=mem)
+            for pid, mem in _processes.get(dev['index'], [])]
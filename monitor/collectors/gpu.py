@@ -1,55 +1,60 @@
 import subprocess
 import os
-import csv
-import io
-from typing import List, Dict, Any
-import importlib
-import importlib.util
-import warnings
+from typing import List, Dict, Any, Optional
 
-_pynvml_mod = None
+from .nvml_session import NVMLSession, get_session
+from .process_cache import ProcessCache, get_process_cache
+from .smi_stream import get_stream
 
-for _name in ('nvidia_ml_py.pynvml', 'nvidia_ml_py'):
-    try:
-        _pynvml_mod = importlib.import_module(_name)
-        break
-    except ModuleNotFoundError:
-        # Not installed, try next candidate
-        continue
-    except Exception:
-        # Any other import error (e.g. runtime error inside module) should not crash import path
-        _pynvml_mod = None
-        break
+PYNVML_AVAILABLE = get_session().available
 
-PYNVML_AVAILABLE = _pynvml_mod is not None
-if PYNVML_AVAILABLE:
-    pynvml = _pynvml_mod
+# Queries served by persistent nvidia-smi streams (see smi_stream.py)
+_SMI_GPU_FIELDS = 'index,name,uuid,utilization.gpu,memory.used,memory.total,temperature.gpu,power.draw'
+_SMI_APPS_FIELDS = 'gpu_uuid,pid,used_memory,process_name'
+_SMI_ACCOUNTED_FIELDS = 'pid,gpu_util,mem_util'
 
-try:
-    import psutil
-    PSUTIL_AVAILABLE = True
-except ImportError:
-    PSUTIL_AVAILABLE = False
+def smi_gpu_rows(interval_ms: int = 1000) -> Optional[List[List[str]]]:
+    """Latest rows of the shared ``--query-gpu`` stream (None while unavailable)."""
+    return get_stream('query-gpu', _SMI_GPU_FIELDS, interval_ms).wait()
+
+
+def parse_smi_gpu_rows(rows: List[List[str]]) -> List[Dict[str, Any]]:
+    """Turn ``_SMI_GPU_FIELDS`` CSV rows into the same dicts the NVML path returns."""
+    gpus = []
+    for parts in rows:
+        if len(parts) >= 8:
+            mem_used = float(parts[4]) if parts[4] != '[N/A]' else 0
+            mem_total = float(parts[5]) if parts[5] != '[N/A]' else 0
+            gpus.append({
+                'index': int(parts[0]),
+                'name': parts[1],
+                'uuid': parts[2],
+                'utilization': int(float(parts[3])) if parts[3] != '[N/A]' else 0,
+                'memory_used': mem_used,
+                'memory_total': mem_total,
+                'memory_free': mem_total - mem_used,
+                'temperature': int(float(parts[6])) if parts[6] != '[N/A]' else 0,
+                'power': float(parts[7]) if parts[7] != '[N/A]' else 0,
+            })
+    return gpus
 
 
 class GPUCollector:
-    """Collects GPU metrics via NVML or nvidia-smi fallback."""
+    """Collects GPU metrics via NVML or nvidia-smi fallback.
+
+    NVML state lives in the shared ``NVMLSession``, so constructing a
+    collector is cheap and never re-runs ``nvmlInit``. Without NVML the
+    nvidia-smi queries are read from long-lived ``-lms`` streams instead of
+    forking a process per call. Per-PID metadata comes from the shared
+    ``ProcessCache`` rather than a fresh lookup per process per tick.
+    """
     
-    def __init__(self):
-        self.nvml_initialized = False
-        if PYNVML_AVAILABLE:
-            try:
-                pynvml.nvmlInit()
-                self.nvml_initialized = True
-            except Exception:
-                pass
-    
-    def __del__(self):
-        if self.nvml_initialized:
-            try:
-                pynvml.nvmlShutdown()
-            except Exception:
-                pass
+    def __init__(self, session: Optional[NVMLSession] = None, smi_interval_ms: int = 1000,
+                 process_cache: Optional[ProcessCache] = None):
+        self.session = session or get_session()
+        self.process_cache = process_cache or get_process_cache()
+        self.nvml_initialized = self.session.ensure_initialized()
+        self.smi_interval_ms = smi_interval_ms
     
     def collect(self) -> List[Dict[str, Any]]:
         if self.nvml_initialized:
@@ -67,50 +72,40 @@ class GPUCollector:
         
         processes = []
         try:
-            device_count = pynvml.nvmlDeviceGetCount()
-            for i in range(device_count):
-                handle = pynvml.nvmlDeviceGetHandleByIndex(i)
-                gpu_name = pynvml.nvmlDeviceGetName(handle)
-                
+            nvml = self.session.nvml
+            for device in self.session.devices():
                 try:
-                    procs = pynvml.nvmlDeviceGetComputeRunningProcesses(handle)
+                    procs = nvml.nvmlDeviceGetComputeRunningProcesses(device.handle)
                     for proc in procs:
-                        proc_info = {
-                            'gpu_index': i,
-                            'gpu_name': gpu_name,
+                        processes.append({
+                            'gpu_index': device.index,
+                            'gpu_name': device.name,
                             'pid': proc.pid,
                             'gpu_memory_mb': proc.usedGpuMemory / (1024**2) if proc.usedGpuMemory else 0,
                             'gpu_utilization': utilization_map.get(proc.pid, {}).get('gpu_util', None),
                             'name': 'Unknown',
                             'username': 'Unknown',
-                        }
-                        
-                        if PSUTIL_AVAILABLE:
-                            try:
-                                p = psutil.Process(proc.pid)
-                                proc_info['name'] = p.name()
-                                proc_info['username'] = p.username()
-                                proc_info['cpu_percent'] = p.cpu_percent()
-                                proc_info['memory_mb'] = p.memory_info().rss / (1024**2)
-                                proc_info['cmdline'] = ' '.join(p.cmdline()[:3])
-                            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                                pass
-                        else:
-                            try:
-                                uname = self._resolve_username(proc.pid)
-                                if uname:
-                                    proc_info['username'] = uname
-                            except Exception:
-                                pass
-                        
-                        processes.append(proc_info)
+                        })
                 except Exception:
                     pass
         except Exception:
             pass
         
+        self._attach_metadata(processes)
         return processes
     
+    def _attach_metadata(self, processes: List[Dict[str, Any]]):
+        """Merge cached per-PID metadata (name, user, cmdline, CPU, RSS) into ``processes``."""
+        try:
+            metadata = self.process_cache.lookup(p['pid'] for p in processes)
+        except Exception:
+            return
+        for proc_info in processes:
+            for key, value in metadata.get(proc_info['pid'], {}).items():
+                # Keep what the driver reported (e.g. nvidia-smi's full process name)
+                if proc_info.get(key, 'Unknown') == 'Unknown':
+                    proc_info[key] = value
+    
     def _get_process_utilization(self) -> Dict[int, Dict[str, Any]]:
         """Get per-process GPU utilization using nvidia-smi accounting mode.
         
@@ -120,16 +115,11 @@ class GPUCollector:
         utilization_map = {}
         
         try:
-            # Try to query accounted apps (requires accounting mode enabled)
-            result = subprocess.run(
-                ['nvidia-smi', '--query-accounted-apps=pid,gpu_util,mem_util',
-                 '--format=csv,noheader,nounits'],
-                capture_output=True, text=True, timeout=5
-            )
-            
-            if result.returncode == 0 and result.stdout.strip():
-                reader = csv.reader(io.StringIO(result.stdout))
-                for row in reader:
+            # Try to query accounted apps (requires accounting mode enabled); a
+            # rejected query backs off inside the stream rather than re-forking
+            rows = get_stream('query-accounted-apps', _SMI_ACCOUNTED_FIELDS, self.smi_interval_ms).rows()
+            if rows:
+                for row in rows:
                     if len(row) >= 2:
                         try:
                             pid = int(row[0].strip())
@@ -152,165 +142,83 @@ class GPUCollector:
             utilization_map = {}
         
         try:
-            result = subprocess.run(
-                ['nvidia-smi', '--query-compute-apps=gpu_uuid,pid,used_memory,process_name',
-                 '--format=csv,noheader,nounits'],
-                capture_output=True, text=True, timeout=10
-            )
+            rows = get_stream('query-compute-apps', _SMI_APPS_FIELDS, self.smi_interval_ms).wait()
+            if rows is None:
+                result = subprocess.run(
+                    ['nvidia-smi', f'--query-compute-apps={_SMI_APPS_FIELDS}',
+                     '--format=csv,noheader,nounits'],
+                    capture_output=True, text=True, timeout=10
+                )
+                
+                if result.returncode != 0:
+                    return []
+                rows = [[p.strip() for p in line.split(',')]
+                        for line in result.stdout.strip().split('\n') if line]
             
-            if result.returncode != 0:
-                return []
+            # Map GPU UUIDs to indices from the GPU stream when it is running
+            uuid_index = {}
+            for row in get_stream('query-gpu', _SMI_GPU_FIELDS, self.smi_interval_ms).rows() or []:
+                if len(row) >= 3:
+                    uuid_index[row[2]] = int(row[0])
             
             processes = []
-            for line in result.stdout.strip().split('\n'):
-                if not line:
-                    continue
-                parts = [p.strip() for p in line.split(',')]
+            for parts in rows:
                 if len(parts) >= 4:
                     pid = int(parts[1])
                     proc_info = {
-                        'gpu_index': 0,
+                        'gpu_index': uuid_index.get(parts[0], 0),
                         'pid': pid,
                         'gpu_memory_mb': float(parts[2]) if parts[2] != '[N/A]' else 0,
-                        'name': parts[3],
+                        'name': ','.join(parts[3:]),
                         'gpu_utilization': utilization_map.get(pid, {}).get('gpu_util', None),
                     }
-                    try:
-                        if PSUTIL_AVAILABLE:
-                            p = psutil.Process(pid)
-                            proc_info['username'] = p.username()
-                        else:
-                            uname = self._resolve_username(pid)
-                            if uname:
-                                proc_info['username'] = uname
-                            else:
-                                proc_info['username'] = 'Unknown'
-                    except Exception:
-                        proc_info['username'] = 'Unknown'
-
+                    proc_info['username'] = 'Unknown'
                     processes.append(proc_info)
+            
+            self._attach_metadata(processes)
             return processes
         except Exception:
             return []
     
     def _collect_nvml(self) -> List[Dict[str, Any]]:
         gpus = []
-        device_count = pynvml.nvmlDeviceGetCount()
+        try:
+            devices = self.session.devices()
+        except Exception as e:
+            self.session.invalidate()
+            return [{'error': str(e)}]
         
-        for i in range(device_count):
+        failed = 0
+        for device in devices:
             try:
-                handle = pynvml.nvmlDeviceGetHandleByIndex(i)
-                
-                mem = pynvml.nvmlDeviceGetMemoryInfo(handle)
-                
-                try:
-                    util = pynvml.nvmlDeviceGetUtilizationRates(handle)
-                    gpu_util = util.gpu
-                except Exception:
-                    gpu_util = 0
-                
-                try:
-                    temp = pynvml.nvmlDeviceGetTemperature(handle, pynvml.NVML_TEMPERATURE_GPU)
-                except Exception:
-                    temp = 0
-                
-                try:
-                    power = pynvml.nvmlDeviceGetPowerUsage(handle) / 1000  # mW to W
-                except Exception:
-                    power = 0
-                
-                try:
-                    procs = pynvml.nvmlDeviceGetComputeRunningProcesses(handle)
-                    num_procs = len(procs)
-                except Exception:
-                    num_procs = 0
-                
-                gpus.append({
-                    'index': i,
-                    'name': pynvml.nvmlDeviceGetName(handle),
-                    'utilization': gpu_util,
-                    'memory_used': mem.used / (1024**2),  # MB
-                    'memory_total': mem.total / (1024**2),
-                    'memory_free': mem.free / (1024**2),
-                    'temperature': temp,
-                    'power': power,
-                    'processes': num_procs,
-                })
-                
+                gpus.append(self.session.sample(device))
             except Exception as e:
-                gpus.append({'index': i, 'error': str(e)})
+                failed += 1
+                gpus.append({'index': device.index, 'error': str(e)})
+        
+        if devices and failed == len(devices):
+            # Every cached handle failed (driver reload, GPU reset): re-enumerate next tick
+            self.session.invalidate()
         
         return gpus
     
     def _collect_nvidia_smi(self) -> List[Dict[str, Any]]:
         try:
-            result = subprocess.run(
-                ['nvidia-smi', '--query-gpu=index,name,utilization.gpu,memory.used,memory.total,'
-                 'temperature.gpu,power.draw',
-                 '--format=csv,noheader,nounits'],
-                capture_output=True, text=True, timeout=10
-            )
-            
-            if result.returncode != 0:
-                return [{'error': 'nvidia-smi failed'}]
-            
-            gpus = []
-            for line in result.stdout.strip().split('\n'):
-                if not line:
-                    continue
-                    
-                parts = [p.strip() for p in line.split(',')]
-                if len(parts) >= 7:
-                    mem_used = float(parts[3]) if parts[3] != '[N/A]' else 0
-                    mem_total = float(parts[4]) if parts[4] != '[N/A]' else 0
-                    gpus.append({
-                        'index': int(parts[0]),
-                        'name': parts[1],
-                        'utilization': int(parts[2]) if parts[2] != '[N/A]' else 0,
-                        'memory_used': mem_used,
-                        'memory_total': mem_total,
-                        'memory_free': mem_total - mem_used,
-                        'temperature': int(parts[5]) if parts[5] != '[N/A]' else 0,
-                        'power': float(parts[6]) if parts[6] != '[N/A]' else 0,
-                    })
+            rows = smi_gpu_rows(self.smi_interval_ms)
+            if rows is None:
+                # Stream unavailable (e.g. driver without -lms): one-shot query
+                result = subprocess.run(
+                    ['nvidia-smi', f'--query-gpu={_SMI_GPU_FIELDS}',
+                     '--format=csv,noheader,nounits'],
+                    capture_output=True, text=True, timeout=10
+                )
+                
+                if result.returncode != 0:
+                    return [{'error': 'nvidia-smi failed'}]
+                rows = [[p.strip() for p in line.split(',')]
+                        for line in result.stdout.strip().split('\n') if line]
             
-            return gpus
+            return parse_smi_gpu_rows(rows)
             
         except Exception as e:
             return [{'error': str(e)}]
-    
-    def _resolve_username(self, pid: int) -> str:
-        """Attempt to resolve the username owning a PID using OS utilities.
-
-        Uses `ps` on POSIX and PowerShell/WMI on Windows as a fallback when
-        psutil is not available or cannot access the process.
-        Returns empty string if resolution fails.
-        """
-        try:
-            import platform
-            import subprocess
-            system = platform.system()
-            if system == 'Windows':
-                # Use WMI via PowerShell to get the process owner
-                # This is a fallback when psutil is not available
-                cmd = [
-                    'powershell', '-NoProfile', '-NonInteractive',
-                    '-Command',
-                    f"(Get-WmiObject -Class Win32_Process -Filter \"ProcessId={pid}\").GetOwner().User"
-                ]
-                proc = subprocess.run(cmd, capture_output=True, text=True, timeout=3)
-                out = (proc.stdout or '').strip()
-                return out if out else ''
-            elif system == 'Darwin':
-                # macOS: use ps -o user= -p PID
-                cmd = ['ps', '-o', 'user=', '-p', str(pid)]
-                proc = subprocess.run(cmd, capture_output=True, text=True, timeout=2)
-                return (proc.stdout or '').strip()
-            else:
-                # Linux/POSIX: use ps -o user= -p PID
-                cmd = ['ps', '-o', 'user=', '-p', str(pid)]
-                proc = subprocess.run(cmd, capture_output=True, text=True, timeout=2)
-                return (proc.stdout or '').strip()
-        except Exception:
-            pass
-        return ''
@@ -0,0 +1,169 @@
+"""Process-wide high-rate GPU sampler shared by the monitor and benchmarks.
+
+Maintenance:
+- Purpose: one background thread samples every GPU (NVML first, the
+  persistent nvidia-smi stream otherwise) and keeps a ring buffer of recent
+  samples per device. The collection scheduler and the benchmark runner
+  read from it instead of each polling the driver on their own.
+- Rate: each subscriber asks for an interval; the thread runs at the
+  fastest one requested and drops back when that subscription closes.
+  With no subscribers it idles.
+- Debug: ``get_sampler().stats()`` shows the current interval, subscriber
+  count, source and how many ticks were taken.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from .gpu import parse_smi_gpu_rows, smi_gpu_rows
+from .nvml_session import NVMLSession, get_session
+
+
+class SamplerSubscription:
+    """Handle returned by ``GPUSampler.subscribe``; close it to release the rate."""
+
+    def __init__(self, sampler: 'GPUSampler', interval: float):
+        self.sampler = sampler
+        self.interval = interval
+
+    def close(self):
+        self.sampler.unsubscribe(self)
+
+    def __enter__(self) -> 'SamplerSubscription':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class GPUSampler:
+    """Background sampler with per-GPU ring-buffered history."""
+
+    def __init__(self, session: Optional[NVMLSession] = None, history_seconds: float = 600.0,
+                 max_history: int = 6000):
+        self.session = session or get_session()
+        self.history_seconds = history_seconds
+        self.max_history = max_history
+        self.ticks = 0
+        self.source = 'none'
+        self._subs: List[SamplerSubscription] = []
+        self._history: Dict[int, Deque[Dict[str, Any]]] = {}
+        self._latest: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def interval(self) -> Optional[float]:
+        subs = self._subs
+        return min(s.interval for s in subs) if subs else None
+
+    def subscribe(self, interval: float = 1.0) -> SamplerSubscription:
+        """Request samples at least every ``interval`` seconds until the handle is closed."""
+        sub = SamplerSubscription(self, max(0.02, float(interval)))
+        with self._lock:
+            self._subs.append(sub)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True, name='gpu-sampler')
+                self._thread.start()
+        self._wake.set()
+        return sub
+
+    def unsubscribe(self, sub: SamplerSubscription):
+        with self._lock:
+            if sub in self._subs:
+                self._subs.remove(sub)
+        self._wake.set()
+
+    def latest(self, max_age: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Most recent sample of every GPU ([] if none, or older than ``max_age`` seconds)."""
+        latest = self._latest
+        if max_age is not None and latest and time.time() - latest[0].get('timestamp', 0) > max_age:
+            return []
+        return latest
+
+    def history(self, index: int, seconds: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Buffered samples for one GPU, oldest first, optionally only the last ``seconds``."""
+        with self._lock:
+            samples = list(self._history.get(index, ()))
+        if seconds is not None:
+            cutoff = time.time() - seconds
+            samples = [s for s in samples if s['timestamp'] >= cutoff]
+        return samples
+
+    def sample_once(self) -> List[Dict[str, Any]]:
+        """Take one sample of every GPU and record it (also used by the thread)."""
+        now = time.time()
+        gpus = self._sample_nvml()
+        if gpus is None:
+            rows = smi_gpu_rows(max(50, int((self.interval or 1.0) * 1000)))
+            gpus = parse_smi_gpu_rows(rows) if rows else []
+            self.source = 'nvidia-smi' if gpus else 'none'
+        else:
+            self.source = 'nvml'
+
+        for gpu in gpus:
+            gpu['timestamp'] = now
+
+        with self._lock:
+            for gpu in gpus:
+                buf = self._history.get(gpu['index'])
+                if buf is None:
+                    buf = self._history[gpu['index']] = deque(maxlen=self.max_history)
+                buf.append(gpu)
+                while buf and now - buf[0]['timestamp'] > self.history_seconds:
+                    buf.popleft()
+            self._latest = gpus
+            self.ticks += 1
+        return gpus
+
+    def _sample_nvml(self) -> Optional[List[Dict[str, Any]]]:
+        if not self.session.ensure_initialized():
+            return None
+        devices = self.session.devices()
+        gpus = []
+        for device in devices:
+            try:
+                gpus.append(self.session.sample(device, processes=False))
+            except Exception:
+                continue
+        if devices and not gpus:
+            self.session.invalidate()
+        return gpus
+
+    def _run(self):
+        while True:
+            interval = self.interval
+            if interval is None:
+                with self._lock:
+                    if not self._subs:
+                        self._thread = None
+                        return
+                continue
+            started = time.monotonic()
+            try:
+                self.sample_once()
+            except Exception:
+                pass
+            self._wake.clear()
+            self._wake.wait(max(0.0, interval - (time.monotonic() - started)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {'interval': self.interval, 'subscribers': len(self._subs),
+                'source': self.source, 'ticks': self.ticks}
+
+
+_sampler: Optional[GPUSampler] = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler() -> GPUSampler:
+    """Get or create the process-wide GPU sampler."""
+    global _sampler
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                _sampler = GPUSampler()
+    return _sampler
@@ -1,7 +1,37 @@
+"""Network interface metrics.
+
+Maintenance:
+- Purpose: per-interface link info, counters and rates for the dashboard
+  and for storage (``*_per_sec`` keys become ``network`` series).
+- Link info (addresses, speed, MTU, up/down) changes rarely and is the
+  expensive part (psutil queries every interface with ioctls), so it is
+  cached for ``_LINK_TTL_SECONDS`` and refreshed early when an interface
+  appears or disappears. Counters are read on every ``collect()``: from
+  ``/proc/net/dev`` through ``procfs.py`` on Linux, else from psutil.
+- Rates: each interface keeps its previous counters (``NET_FIELDS``) and
+  a ``time.monotonic()`` stamp; ``<field>_per_sec`` is the difference over
+  the elapsed time. An interface's first sample only sets the baseline, so
+  it has no rate keys yet.
+- Counter decreases: a 32-bit counter that wrapped (old value in the
+  upper half of the 32-bit range, same ifindex) gets 2**32 added back.
+  Anything else (interface re-created under the same name, or counters
+  reset) skips the interval and restarts the baseline rather than
+  reporting a bogus spike.
+- Interface churn: interfaces that disappear are forgotten, so a
+  re-added one starts with a fresh baseline. ``exclude`` takes fnmatch
+  patterns (``monitoring.network_exclude``) for interfaces not worth
+  reporting, such as loopback or per-container veths.
+- Debug: ``NetworkCollector(use_procfs=False)`` forces psutil counters.
+"""
+
+import fnmatch
 import subprocess
 import socket
 import platform
-from typing import Dict, Any, List, Optional
+import time
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from .procfs import NET_FIELDS, ProcReader, get_reader
 
 try:
     import psutil
@@ -9,14 +39,38 @@ try:
 except ImportError:
     PSUTIL_AVAILABLE = False
 
+# How long interface addresses and link state are reused
+_LINK_TTL_SECONDS = 10.0
+
+_WRAP_32 = 2 ** 32
+
+
+def _ifindex(name: str) -> Optional[int]:
+    try:
+        return socket.if_nametoindex(name)
+    except (OSError, AttributeError):
+        return None
+
 
 class NetworkCollector:
     """Collects network metrics via psutil."""
     
+    def __init__(self, proc: Optional[ProcReader] = None, use_procfs: bool = True,
+                 exclude: Optional[Iterable[str]] = None):
+        self._proc = (proc or get_reader()) if use_procfs else None
+        self.exclude = tuple(exclude or ())
+        # name -> (monotonic time, counters in NET_FIELDS order, ifindex)
+        self._prev: Dict[str, Tuple[float, Tuple[int, ...], Optional[int]]] = {}
+        self._hostname = socket.gethostname()
+        # name -> static part of the interface dict, for interfaces that are up
+        self._links: Dict[str, Dict[str, Any]] = {}
+        self._links_at = 0.0
+        self._links_seen: frozenset = frozenset()
+    
     def collect(self) -> Dict[str, Any]:
         metrics = {
             'interfaces': [],
-            'hostname': socket.gethostname(),
+            'hostname': self._hostname,
         }
         
         if PSUTIL_AVAILABLE:
@@ -24,33 +78,92 @@ class NetworkCollector:
         
         return metrics
     
+    def _counters(self) -> Dict[str, Tuple[int, ...]]:
+        """Interface name -> counters in ``NET_FIELDS`` order."""
+        if self._proc is not None:
+            try:
+                return self._proc.net_dev()
+            except (OSError, ValueError, IndexError):
+                pass
+        return {name: tuple(getattr(c, field) for field in NET_FIELDS)
+                for name, c in psutil.net_io_counters(pernic=True).items()}
+    
+    def _rates(self, name: str, counters: Tuple[int, ...], now: float) -> Optional[Dict[str, float]]:
+        """Per-second rates since the previous sample of ``name``; None while there is no baseline."""
+        prev = self._prev.get(name)
+        if prev is None:
+            self._prev[name] = (now, counters, _ifindex(name))
+            return None
+        then, before, index = prev
+        elapsed = now - then
+        if elapsed <= 0:
+            return None
+        rates = {}
+        for field, old, new in zip(NET_FIELDS, before, counters):
+            delta = new - old
+            if delta < 0:
+                current_index = _ifindex(name)
+                if current_index != index or not _WRAP_32 // 2 <= old < _WRAP_32:
+                    # re-created interface or reset counters: start over
+                    self._prev[name] = (now, counters, current_index)
+                    return None
+                delta += _WRAP_32
+            rates[f'{field}_per_sec'] = delta / elapsed
+        self._prev[name] = (now, counters, index)
+        return rates
+    
+    def _excluded(self, name: str) -> bool:
+        return any(fnmatch.fnmatchcase(name, pattern) for pattern in self.exclude)
+    
+    def _link_info(self, names: frozenset) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        if now - self._links_at < _LINK_TTL_SECONDS and names == self._links_seen:
+            return self._links
+        
+        addrs = psutil.net_if_addrs()
+        stats = psutil.net_if_stats()
+        links = {}
+        for name, addr_list in addrs.items():
+            if name in stats and stats[name].isup:
+                link = {
+                    'name': name,
+                    'speed_mbps': stats[name].speed,
+                    'mtu': stats[name].mtu,
+                    'is_up': stats[name].isup,
+                }
+                
+                for addr in addr_list:
+                    if addr.family == socket.AF_INET:
+                        link['ipv4'] = addr.address
+                        break
+                
+                links[name] = link
+        
+        self._links = links
+        self._links_at = now
+        self._links_seen = names
+        return links
+    
     def _collect_interfaces(self) -> List[Dict[str, Any]]:
         interfaces = []
         
         try:
-            addrs = psutil.net_if_addrs()
-            stats = psutil.net_if_stats()
-            io = psutil.net_io_counters(pernic=True)
+            io = self._counters()
+            now = time.monotonic()
+            for name in list(self._prev):
+                if name not in io:
+                    del self._prev[name]
             
-            for name, addr_list in addrs.items():
-                if name in stats and stats[name].isup:
-                    iface = {
-                        'name': name,
-                        'speed_mbps': stats[name].speed,
-                        'mtu': stats[name].mtu,
-                        'is_up': stats[name].isup,
-                    }
-                    
-                    for addr in addr_list:
-                        if addr.family == socket.AF_INET:
-                            iface['ipv4'] = addr.address
-                            break
-                    
-                    if name in io:
-                        iface['bytes_sent'] = io[name].bytes_sent
-                        iface['bytes_recv'] = io[name].bytes_recv
-                    
-                    interfaces.append(iface)
+            for name, link in self._link_info(frozenset(io)).items():
+                if self._excluded(name):
+                    continue
+                iface = dict(link)
+                if name in io:
+                    iface.update(zip(NET_FIELDS, io[name]))
+                    rates = self._rates(name, io[name], now)
+                    if rates:
+                        iface.update(rates)
+                interfaces.append(iface)
                     
         except Exception:
             pass
@@ -0,0 +1,207 @@
+"""Process-wide NVML session with cached device handles.
+
+Maintenance:
+- Purpose: call ``nvmlInit`` once per process, cache handles and static
+  attributes (name, UUID, total memory, power limit) per device, and leave
+  only the dynamic counters to be queried on every tick.
+- Debug: set ``MYGPU_FAKE_NVML=<gpu count>`` to route everything through
+  ``monitor.collectors.fake_nvml``; ``get_session().devices()`` lists what
+  was enumerated. ``invalidate()`` forces re-enumeration (e.g. after a
+  driver reload or hot-plug).
+"""
+
+import atexit
+import importlib
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+
+def _load_nvml_module():
+    """Return the NVML bindings module, the fake driver, or None."""
+    fake = os.environ.get('MYGPU_FAKE_NVML', '').strip()
+    if fake and fake != '0':
+        from . import fake_nvml
+        fake_nvml.configure(device_count=int(fake) if fake.isdigit() else 1)
+        return fake_nvml
+
+    for name in ('pynvml', 'nvidia_ml_py.pynvml', 'nvidia_ml_py'):
+        try:
+            mod = importlib.import_module(name)
+        except ModuleNotFoundError:
+            # Not installed, try next candidate
+            continue
+        except Exception:
+            # Any other import error (e.g. runtime error inside module) should not crash import path
+            return None
+        if hasattr(mod, 'nvmlInit'):
+            return mod
+    return None
+
+
+def _text(value) -> str:
+    # Older pynvml releases return bytes for names/UUIDs
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    return str(value)
+
+
+@dataclass(frozen=True)
+class NVMLDevice:
+    """Static, per-device attributes cached for the life of the session."""
+
+    index: int
+    handle: Any
+    name: str
+    uuid: str
+    memory_total: int  # bytes
+    power_limit_w: Optional[float] = None
+
+
+class NVMLSession:
+    """Owns NVML initialization and the cached device table.
+
+    NVML itself is thread-safe; the lock only guards init and enumeration
+    so concurrent collectors never race to build the device table.
+    """
+
+    def __init__(self, nvml=None):
+        self.nvml = nvml
+        self.initialized = False
+        self._init_failed = False
+        self._devices: Optional[List[NVMLDevice]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return self.nvml is not None
+
+    def ensure_initialized(self) -> bool:
+        """Initialize NVML on first use; later calls are a cheap flag check."""
+        if self.initialized or self._init_failed or self.nvml is None:
+            return self.initialized
+        with self._lock:
+            if not self.initialized and not self._init_failed:
+                try:
+                    self.nvml.nvmlInit()
+                    self.initialized = True
+                except Exception:
+                    self._init_failed = True
+        return self.initialized
+
+    def devices(self) -> List[NVMLDevice]:
+        """Return cached devices, enumerating them on first use."""
+        devices = self._devices
+        if devices is not None:
+            return devices
+        if not self.ensure_initialized():
+            return []
+        with self._lock:
+            if self._devices is None:
+                self._devices = self._enumerate()
+            return self._devices
+
+    def invalidate(self):
+        """Drop the device cache so the next call re-enumerates."""
+        with self._lock:
+            self._devices = None
+
+    def _enumerate(self) -> List[NVMLDevice]:
+        nvml = self.nvml
+        devices = []
+        for i in range(nvml.nvmlDeviceGetCount()):
+            handle = nvml.nvmlDeviceGetHandleByIndex(i)
+            try:
+                uuid = _text(nvml.nvmlDeviceGetUUID(handle))
+            except Exception:
+                uuid = ''
+            try:
+                memory_total = int(nvml.nvmlDeviceGetMemoryInfo(handle).total)
+            except Exception:
+                memory_total = 0
+            try:
+                power_limit_w = nvml.nvmlDeviceGetPowerManagementLimit(handle) / 1000
+            except Exception:
+                power_limit_w = None
+            devices.append(NVMLDevice(
+                index=i,
+                handle=handle,
+                name=_text(nvml.nvmlDeviceGetName(handle)),
+                uuid=uuid,
+                memory_total=memory_total,
+                power_limit_w=power_limit_w,
+            ))
+        return devices
+
+    def sample(self, device: NVMLDevice, processes: bool = True) -> Dict[str, Any]:
+        """Query the dynamic counters for one device (the per-tick cost).
+
+        ``processes=False`` skips the compute-process listing, the most
+        expensive call here, for high-rate sampling.
+        """
+        nvml = self.nvml
+        handle = device.handle
+
+        mem = nvml.nvmlDeviceGetMemoryInfo(handle)
+
+        try:
+            gpu_util = nvml.nvmlDeviceGetUtilizationRates(handle).gpu
+        except Exception:
+            gpu_util = 0
+
+        try:
+            temp = nvml.nvmlDeviceGetTemperature(handle, nvml.NVML_TEMPERATURE_GPU)
+        except Exception:
+            temp = 0
+
+        try:
+            power = nvml.nvmlDeviceGetPowerUsage(handle) / 1000  # mW to W
+        except Exception:
+            power = 0
+
+        sample = {
+            'index': device.index,
+            'name': device.name,
+            'uuid': device.uuid,
+            'utilization': gpu_util,
+            'memory_used': mem.used / (1024**2),  # MB
+            'memory_total': device.memory_total / (1024**2),
+            'memory_free': mem.free / (1024**2),
+            'temperature': temp,
+            'power': power,
+            'power_limit': device.power_limit_w,
+        }
+
+        if processes:
+            try:
+                sample['processes'] = len(nvml.nvmlDeviceGetComputeRunningProcesses(handle))
+            except Exception:
+                sample['processes'] = 0
+
+        return sample
+
+    def shutdown(self):
+        with self._lock:
+            if self.initialized:
+                try:
+                    self.nvml.nvmlShutdown()
+                except Exception:
+                    pass
+            self.initialized = False
+            self._devices = None
+
+
+_session: Optional[NVMLSession] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> NVMLSession:
+    """Get or create the process-wide NVML session."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = NVMLSession(_load_nvml_module())
+                atexit.register(_session.shutdown)
+    return _session
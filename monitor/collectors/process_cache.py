@@ -0,0 +1,198 @@
+"""Per-PID metadata cache for GPU process listings.
+
+Maintenance:
+- Purpose: GPU process lists are rebuilt every tick, but the processes on
+  them are mostly long-lived. This cache keeps one ``psutil.Process`` per
+  process across ticks, reads static fields (name, user, cmdline) once and
+  refreshes only CPU percent and RSS.
+- Identity: entries are keyed by ``(pid, create_time)`` so a recycled PID
+  never inherits the previous owner's name or user; ``is_running()`` checks
+  the same pair on every hit.
+- CPU percent: psutil reports usage since the previous call on the same
+  ``Process`` object, so keeping the object alive is what makes it
+  meaningful. A newly seen process reports ``None`` until its second tick.
+- Eviction: ``lookup`` takes the complete PID list of the tick; anything
+  not on it, or no longer running, is dropped.
+- Without psutil: usernames of all new PIDs are resolved with a single
+  ``ps`` (PowerShell on Windows) call and cached until the PID leaves the
+  list, instead of one subprocess per PID per tick.
+- Debug: ``get_process_cache().stats()`` shows entry count, hits, misses
+  and evictions.
+"""
+
+import platform
+import subprocess
+import threading
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+
+class ProcessCache:
+    """Long-lived process metadata keyed by ``(pid, create_time)``."""
+
+    def __init__(self):
+        self._entries: Dict[Tuple[int, float], Dict[str, Any]] = {}
+        self._keys: Dict[int, Tuple[int, float]] = {}
+        self._usernames: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, pids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Metadata for every PID in ``pids``, the full process list of this tick.
+
+        Each value has ``name``, ``username`` and ``cmdline`` plus, with
+        psutil, ``cpu_percent`` and ``memory_mb``. PIDs that vanished are
+        omitted; cached PIDs not in ``pids`` are evicted.
+        """
+        pids = set(pids)
+        with self._lock:
+            if not PSUTIL_AVAILABLE:
+                return self._lookup_usernames(pids)
+
+            for pid in [p for p in self._keys if p not in pids]:
+                self._drop(pid)
+            result = {}
+            for pid in pids:
+                info = self._refresh(pid)
+                if info is not None:
+                    result[pid] = info
+            return result
+
+    def _refresh(self, pid: int) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(self._keys.get(pid))
+        if entry is not None:
+            try:
+                if not entry['proc'].is_running():
+                    # Exited, or the PID now belongs to a different process
+                    self._drop(pid)
+                    entry = None
+            except Exception:
+                self._drop(pid)
+                entry = None
+
+        if entry is None:
+            self.misses += 1
+            entry = self._create(pid)
+            if entry is None:
+                return None
+            primed = False
+        else:
+            self.hits += 1
+            primed = True
+
+        info = dict(entry['static'])
+        proc = entry['proc']
+        try:
+            with proc.oneshot():
+                cpu = proc.cpu_percent(None)
+                info['memory_mb'] = proc.memory_info().rss / (1024**2)
+            info['cpu_percent'] = cpu if primed else None
+        except psutil.NoSuchProcess:
+            self._drop(pid)
+        except psutil.AccessDenied:
+            pass
+        return info
+
+    def _create(self, pid: int) -> Optional[Dict[str, Any]]:
+        try:
+            proc = psutil.Process(pid)
+            create_time = proc.create_time()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+
+        static = {'name': 'Unknown', 'username': 'Unknown'}
+        with proc.oneshot():
+            for field, read in (('name', proc.name), ('username', proc.username),
+                                ('cmdline', lambda: ' '.join(proc.cmdline()[:3]))):
+                try:
+                    static[field] = read()
+                except psutil.NoSuchProcess:
+                    return None
+                except Exception:
+                    pass
+
+        entry = {'proc': proc, 'static': static}
+        key = (pid, create_time)
+        self._entries[key] = entry
+        self._keys[pid] = key
+        return entry
+
+    def _drop(self, pid: int):
+        key = self._keys.pop(pid, None)
+        if key is not None and self._entries.pop(key, None) is not None:
+            self.evictions += 1
+
+    def _lookup_usernames(self, pids: Set[int]) -> Dict[int, Dict[str, Any]]:
+        for pid in [p for p in self._usernames if p not in pids]:
+            del self._usernames[pid]
+            self.evictions += 1
+        new = sorted(p for p in pids if p not in self._usernames)
+        self.hits += len(pids) - len(new)
+        self.misses += len(new)
+        if new:
+            resolved = resolve_usernames(new)
+            for pid in new:
+                # Cache failures too, so an unresolvable PID costs one call, not one per tick
+                self._usernames[pid] = resolved.get(pid, '')
+        return {pid: {'username': self._usernames[pid] or 'Unknown'} for pid in pids}
+
+    def stats(self) -> Dict[str, int]:
+        return {'entries': len(self._entries) + len(self._usernames), 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions}
+
+
+def resolve_usernames(pids: Iterable[int]) -> Dict[int, str]:
+    """Owners of ``pids`` via one OS utility call (used when psutil is missing).
+
+    Uses ``ps`` on POSIX and PowerShell/WMI on Windows. PIDs that could not
+    be resolved are left out.
+    """
+    pids = [int(p) for p in pids]
+    if not pids:
+        return {}
+    try:
+        if platform.system() == 'Windows':
+            pid_filter = ' OR '.join(f'ProcessId={pid}' for pid in pids)
+            cmd = [
+                'powershell', '-NoProfile', '-NonInteractive', '-Command',
+                f"Get-WmiObject -Class Win32_Process -Filter \"{pid_filter}\" | "
+                "ForEach-Object { \"$($_.ProcessId) $($_.GetOwner().User)\" }",
+            ]
+            timeout = 5
+        else:
+            cmd = ['ps', '-o', 'pid=,user=', '-p', ','.join(map(str, pids))]
+            timeout = 2
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except Exception:
+        return {}
+
+    owners = {}
+    for line in (proc.stdout or '').splitlines():
+        parts = line.split(None, 1)
+        if len(parts) == 2:
+            try:
+                owners[int(parts[0])] = parts[1].strip()
+            except ValueError:
+                continue
+    return owners
+
+
+_cache: Optional[ProcessCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_process_cache() -> ProcessCache:
+    """Get or create the process-wide PID metadata cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ProcessCache()
+    return _cache
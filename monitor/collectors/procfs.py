@@ -0,0 +1,213 @@
+"""Linux fast path: read host counters straight from ``/proc``.
+
+Maintenance:
+- Purpose: sample CPU, memory, load, network and disk counters at 10 Hz or
+  more without psutil's per-call object layer. Each file is opened once and
+  re-read with ``os.pread(fd, size, 0)`` (procfs regenerates the content on
+  every read from offset 0), so a sample costs one syscall per file.
+- Parsing works on ``bytes`` without decoding. CPU times are written into
+  a caller-owned ``array('d')`` (``CPU_FIELDS`` per core), so steady-state
+  sampling allocates no per-core objects; callers keep two arrays and swap
+  them to get deltas.
+- CPU frequency comes from ``scaling_cur_freq`` of each cpufreq policy
+  under ``/sys/devices/system/cpu/cpufreq``; ``cpu_freq_mhz()`` returns
+  None when there are none (common in VMs).
+- Fixtures: ``ProcReader(root)`` reads ``<root>/stat``, ``<root>/meminfo``,
+  ``<root>/loadavg``, ``<root>/net/dev`` and ``<root>/diskstats``, so a
+  directory of captured files can stand in for ``/proc``
+  (``cpufreq_root`` does the same for sysfs). Missing files make the
+  matching method raise ``OSError``; callers fall back to psutil.
+- Availability: ``PROCFS_AVAILABLE`` is True on Linux with a readable
+  ``/proc/stat``. ``get_reader()`` returns the shared reader for ``/proc``
+  (methods only ``pread`` and parse, so threads can share it).
+- Debug: ``python monitor/collectors/procfs.py [root]`` prints one parsed
+  sample.
+"""
+
+import glob
+import os
+import sys
+import threading
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+# /proc/stat per-CPU columns, in file order (seconds once scaled by CLK_TCK)
+CPU_FIELDS = ('user', 'nice', 'system', 'idle', 'iowait', 'irq', 'softirq', 'steal', 'guest', 'guest_nice')
+
+# /proc/net/dev counters kept per interface
+NET_FIELDS = ('bytes_recv', 'packets_recv', 'errin', 'dropin',
+              'bytes_sent', 'packets_sent', 'errout', 'dropout')
+_NET_COLUMNS = (0, 1, 2, 3, 8, 9, 10, 11)
+
+# /proc/diskstats counters kept per device (sectors are 512 bytes regardless of the device)
+DISK_FIELDS = ('reads', 'read_sectors', 'read_ms', 'writes', 'write_sectors', 'write_ms', 'busy_ms')
+_DISK_COLUMNS = (3, 5, 6, 7, 9, 10, 12)
+
+# matched at the start of a line, so 'Cached:' does not hit 'SwapCached:'
+_MEMINFO_KEYS = {b'\nMemTotal:': 'total', b'\nMemFree:': 'free', b'\nMemAvailable:': 'available',
+                 b'\nBuffers:': 'buffers', b'\nCached:': 'cached', b'\nSReclaimable:': 'sreclaimable'}
+
+PROCFS_AVAILABLE = sys.platform.startswith('linux') and os.access('/proc/stat', os.R_OK)
+
+try:
+    _CLK_TCK = float(os.sysconf('SC_CLK_TCK'))
+except (AttributeError, ValueError, OSError):
+    _CLK_TCK = 100.0
+
+
+class ProcFile:
+    """One pre-opened procfs file, re-read from offset 0."""
+
+    def __init__(self, path: str, size: int = 4096):
+        self.path = path
+        self._size = size
+        self._fd: Optional[int] = None
+        try:
+            self._fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            # retried (and raised) on read
+            pass
+
+    def read(self) -> bytes:
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDONLY)
+        while True:
+            data = os.pread(self._fd, self._size, 0)
+            if len(data) < self._size:
+                return data
+            # content may have been cut off: grow and read again
+            self._size *= 2
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class ProcReader:
+    """Parsers for the procfs files the collectors sample."""
+
+    def __init__(self, root: str = '/proc', cpufreq_root: str = '/sys/devices/system/cpu/cpufreq'):
+        self.root = root
+        self.cpufreq_root = cpufreq_root
+        self._freq: Optional[List[ProcFile]] = None
+        self._stat = ProcFile(os.path.join(root, 'stat'))
+        self._meminfo = ProcFile(os.path.join(root, 'meminfo'))
+        self._loadavg = ProcFile(os.path.join(root, 'loadavg'), 256)
+        self._net_dev = ProcFile(os.path.join(root, 'net', 'dev'))
+        self._diskstats = ProcFile(os.path.join(root, 'diskstats'))
+
+    def cpu_times(self, out: array) -> int:
+        """Fill ``out`` with per-CPU times in seconds (``CPU_FIELDS`` per CPU); returns the CPU count.
+
+        ``out`` is resized only when the number of online CPUs changes.
+        Older kernels without steal/guest columns leave them at 0.
+        """
+        width = len(CPU_FIELDS)
+        cores = 0
+        for line in self._stat.read().split(b'\n'):
+            if not line.startswith(b'cpu'):
+                # per-CPU lines come first
+                if cores:
+                    break
+                continue
+            if line[3:4] == b' ':
+                # the aggregate line; the sum of the per-CPU lines is used instead
+                continue
+            values = line.split()[1:width + 1]
+            base = cores * width
+            if len(out) < base + width:
+                out.extend(bytes(8 * width))
+            for i, value in enumerate(values):
+                out[base + i] = int(value) / _CLK_TCK
+            for i in range(len(values), width):
+                out[base + i] = 0.0
+            cores += 1
+        if len(out) > cores * width:
+            del out[cores * width:]
+        return cores
+
+    def meminfo(self) -> Dict[str, int]:
+        """``total``, ``available``, ``used``, ``free``, ``buffers`` and ``cached`` in bytes."""
+        # a leading newline lets the first line match like the others
+        data = b'\n' + self._meminfo.read()
+        mem = {}
+        for needle, key in _MEMINFO_KEYS.items():
+            start = data.find(needle)
+            if start < 0:
+                mem[key] = 0
+                continue
+            start += len(needle)
+            mem[key] = int(data[start:data.index(b'k', start)]) * 1024
+        if not mem['available']:
+            # kernels before 3.14
+            mem['available'] = mem['free'] + mem['buffers'] + mem['cached']
+        mem['cached'] += mem.pop('sreclaimable')
+        # same definition as psutil
+        mem['used'] = mem['total'] - mem['available']
+        return mem
+
+    def cpu_freq_mhz(self) -> Optional[float]:
+        """Mean current frequency over the cpufreq policies, or None without cpufreq."""
+        if self._freq is None:
+            self._freq = [ProcFile(path, 64) for path in
+                          sorted(glob.glob(os.path.join(self.cpufreq_root, 'policy[0-9]*', 'scaling_cur_freq')))]
+        if not self._freq:
+            return None
+        # kHz
+        return sum(int(f.read()) for f in self._freq) / len(self._freq) / 1000
+
+    def loadavg(self) -> Tuple[float, float, float]:
+        one, five, fifteen = self._loadavg.read().split()[:3]
+        return float(one), float(five), float(fifteen)
+
+    def net_dev(self) -> Dict[str, Tuple[int, ...]]:
+        """Interface name -> counters in ``NET_FIELDS`` order."""
+        counters = {}
+        for line in self._net_dev.read().split(b'\n')[2:]:
+            name, sep, rest = line.partition(b':')
+            if not sep:
+                continue
+            columns = rest.split()
+            counters[name.strip().decode()] = tuple([int(columns[i]) for i in _NET_COLUMNS])
+        return counters
+
+    def diskstats(self) -> Dict[str, Tuple[int, ...]]:
+        """Block device name -> counters in ``DISK_FIELDS`` order."""
+        counters = {}
+        for line in self._diskstats.read().split(b'\n'):
+            columns = line.split()
+            if len(columns) < 14:
+                continue
+            counters[columns[2].decode()] = tuple([int(columns[i]) for i in _DISK_COLUMNS])
+        return counters
+
+    def close(self):
+        for f in (self._stat, self._meminfo, self._loadavg, self._net_dev, self._diskstats, *(self._freq or ())):
+            f.close()
+
+
+_reader: Optional[ProcReader] = None
+_reader_lock = threading.Lock()
+
+
+def get_reader() -> Optional[ProcReader]:
+    """The shared reader for ``/proc``, or None when the fast path is unavailable."""
+    global _reader
+    if not PROCFS_AVAILABLE:
+        return None
+    with _reader_lock:
+        if _reader is None:
+            _reader = ProcReader()
+    return _reader
+
+
+if __name__ == '__main__':
+    reader = ProcReader(sys.argv[1] if len(sys.argv) > 1 else '/proc')
+    times = array('d')
+    print('cpus', reader.cpu_times(times), list(times[:len(CPU_FIELDS)]))
+    print('cpu MHz', reader.cpu_freq_mhz())
+    print('meminfo', reader.meminfo())
+    print('loadavg', reader.loadavg())
+    print('net/dev', reader.net_dev())
+    print('diskstats', reader.diskstats())
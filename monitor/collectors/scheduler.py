@@ -0,0 +1,242 @@
+"""Shared background collection loop for the web API.
+
+Maintenance:
+- Purpose: sample GPU/system metrics once per ``monitoring.interval_seconds``
+  and publish an immutable snapshot that every endpoint reads from, so the
+  cost of a request no longer depends on how many clients are polling.
+- GPU readings come from the shared ``GPUSampler`` (gpu_sampler.py), which
+  the scheduler subscribes to at its own interval while running; the
+  collector is only queried directly when the sampler has nothing fresh.
+- Network and disk: ``NetworkCollector`` and ``DiskCollector`` keep
+  counters between ticks, so the snapshot carries per-second rates from
+  the second tick on. Mount usage is bounded by per-mount statfs timeouts
+  (see disk.py), so a hung NFS server cannot stall a tick.
+- Debug: inspect ``app.state.collection_scheduler.snapshot`` (age is exposed
+  via ``MetricsSnapshot.age``); listeners run once per published snapshot.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .disk import DiskCollector
+from .gpu import GPUCollector
+from .gpu_sampler import GPUSampler, SamplerSubscription, get_sampler
+from .network import NetworkCollector
+from .system import SystemCollector
+
+
+@dataclass(frozen=True)
+class MetricsSnapshot:
+    """Point-in-time view of the local host. Treat contents as read-only."""
+
+    timestamp: str
+    collected_at: float  # time.monotonic() when collection finished
+    hostname: str
+    gpus: Tuple[Dict[str, Any], ...] = ()
+    system: Dict[str, Any] = field(default_factory=dict)
+    processes: Tuple[Dict[str, Any], ...] = ()
+    network: Dict[str, Any] = field(default_factory=dict)
+    disk: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def age(self) -> float:
+        """Seconds since this snapshot was collected."""
+        return time.monotonic() - self.collected_at
+
+    def as_metrics(self) -> Dict[str, Any]:
+        """Return the legacy ``metrics`` dict consumed by storage and alerting."""
+        return {
+            'timestamp': self.timestamp,
+            'hostname': self.hostname,
+            'gpus': list(self.gpus),
+            'system': self.system,
+            'network': self.network,
+            'disk': self.disk,
+        }
+
+
+SnapshotListener = Callable[[MetricsSnapshot], Awaitable[None]]
+
+
+class CollectionScheduler:
+    """Owns the collectors and refreshes a shared snapshot on a fixed interval.
+
+    Concurrent refresh requests are coalesced onto a single in-flight
+    collection, and the blocking collectors run in a worker thread so the
+    event loop is never stalled by NVML, nvidia-smi or psutil.
+    """
+
+    def __init__(self, interval_seconds: float = 5.0,
+                 max_staleness_seconds: Optional[float] = None,
+                 gpu_collector: Optional[GPUCollector] = None,
+                 system_collector: Optional[SystemCollector] = None,
+                 gpu_sampler: Optional[GPUSampler] = None,
+                 network_collector: Optional[NetworkCollector] = None,
+                 disk_collector: Optional[DiskCollector] = None):
+        self.interval_seconds = max(0.1, float(interval_seconds))
+        if max_staleness_seconds is None:
+            max_staleness_seconds = self.interval_seconds * 2
+        self.max_staleness_seconds = float(max_staleness_seconds)
+        self.gpu_collector = gpu_collector or GPUCollector()
+        self.system_collector = system_collector or SystemCollector()
+        self.network_collector = network_collector or NetworkCollector()
+        self.disk_collector = disk_collector or DiskCollector()
+        self.gpu_sampler = gpu_sampler or get_sampler()
+        self._sampler_sub: Optional[SamplerSubscription] = None
+        self._snapshot: Optional[MetricsSnapshot] = None
+        self._listeners: List[SnapshotListener] = []
+        self._inflight: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'CollectionScheduler':
+        monitoring = config.get('monitoring', {}) or {}
+        return cls(
+            interval_seconds=monitoring.get('interval_seconds', 5),
+            max_staleness_seconds=monitoring.get('max_staleness_seconds'),
+            network_collector=NetworkCollector(exclude=monitoring.get('network_exclude')),
+            disk_collector=DiskCollector(
+                devices=monitoring.get('disk_devices'),
+                mounts=monitoring.get('disk_mounts'),
+                statfs_timeout=monitoring.get('disk_statfs_timeout_seconds', 1.0),
+            ),
+        )
+
+    @property
+    def snapshot(self) -> Optional[MetricsSnapshot]:
+        """Most recently published snapshot (may be None before the first tick)."""
+        return self._snapshot
+
+    def add_listener(self, callback: SnapshotListener):
+        """Register an async callback invoked once per published snapshot."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: SnapshotListener):
+        try:
+            self._listeners.remove(callback)
+        except ValueError:
+            pass
+
+    async def start(self):
+        if self._sampler_sub is None:
+            self._sampler_sub = self.gpu_sampler.subscribe(self.interval_seconds)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._sampler_sub is not None:
+            self._sampler_sub.close()
+            self._sampler_sub = None
+        task, self._task = self._task, None
+        if task:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    async def get_snapshot(self, max_age: Optional[float] = None) -> MetricsSnapshot:
+        """Return the shared snapshot, refreshing it only if older than ``max_age``."""
+        if max_age is None:
+            max_age = self.max_staleness_seconds
+        snap = self._snapshot
+        if snap is None or snap.age > max_age:
+            return await self.refresh()
+        return snap
+
+    async def refresh(self) -> MetricsSnapshot:
+        """Collect now; callers arriving during a collection share its result."""
+        if self._inflight is not None:
+            return await asyncio.shield(self._inflight)
+
+        loop = asyncio.get_running_loop()
+        self._inflight = loop.create_future()
+        try:
+            snap = await asyncio.to_thread(self._collect)
+            self._snapshot = snap
+            self._inflight.set_result(snap)
+        except asyncio.CancelledError:
+            self._inflight.cancel()
+            raise
+        except Exception as e:
+            self._inflight.set_exception(e)
+            # Mark retrieved so a failed tick with no waiters is not logged
+            self._inflight.exception()
+            raise
+        finally:
+            self._inflight = None
+
+        await self._notify(snap)
+        return snap
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                # keep the loop alive; endpoints fall back to on-demand refresh
+                pass
+            delay = self.interval_seconds - (time.monotonic() - started)
+            await asyncio.sleep(max(0.0, delay))
+
+    async def _notify(self, snap: MetricsSnapshot):
+        for callback in list(self._listeners):
+            try:
+                await callback(snap)
+            except Exception:
+                pass
+
+    def _collect(self) -> MetricsSnapshot:
+        gpus = None
+        if self._sampler_sub is not None:
+            sampled = self.gpu_sampler.latest(max_age=self.interval_seconds * 2)
+            if sampled:
+                gpus = [dict(g) for g in sampled]
+
+        if gpus is None:
+            try:
+                gpus = self.gpu_collector.collect()
+            except Exception as e:
+                gpus = [{'error': str(e)}]
+
+        try:
+            system = self.system_collector.collect()
+        except Exception as e:
+            system = {'error': str(e)}
+
+        try:
+            network = self.network_collector.collect()
+        except Exception as e:
+            network = {'error': str(e)}
+
+        try:
+            disk = self.disk_collector.collect()
+        except Exception as e:
+            disk = {'error': str(e)}
+
+        try:
+            processes = self.gpu_collector.collect_processes()
+        except Exception:
+            processes = []
+
+        # The sampler skips the per-GPU process listing; derive the counts here
+        for gpu in gpus:
+            if 'index' in gpu and 'processes' not in gpu:
+                gpu['processes'] = sum(1 for p in processes if p.get('gpu_index') == gpu['index'])
+
+        return MetricsSnapshot(
+            timestamp=datetime.now().isoformat(),
+            collected_at=time.monotonic(),
+            hostname=system.get('hostname', 'unknown'),
+            gpus=tuple(gpus),
+            system=system,
+            processes=tuple(processes),
+            network=network,
+            disk=disk,
+        )
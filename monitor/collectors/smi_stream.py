@@ -0,0 +1,198 @@
+"""Long-lived ``nvidia-smi`` query streams for hosts without NVML bindings.
+
+Maintenance:
+- Purpose: instead of forking ``nvidia-smi`` on every tick, keep one
+  ``nvidia-smi --query-... --format=csv,noheader,nounits -lms <interval>``
+  process per distinct query and parse its CSV output incrementally on a
+  reader thread. Callers read the most recent complete burst of rows.
+- Bursts: nvidia-smi prints all rows of one sample back to back, then goes
+  quiet until the next interval. A gap longer than half the interval ends a
+  burst. A query that reports nothing (e.g. no compute apps) simply goes
+  quiet, which reads as an empty burst once two intervals pass.
+- Lifecycle: streams start on first read, stop after ``idle_timeout``
+  seconds without readers, and are restarted with backoff if nvidia-smi
+  exits (a query the driver rejects backs off for ``retry_after`` seconds).
+  Idleness is checked by a watchdog thread per process on a timer, not per
+  output line, so a query that prints nothing is stopped too.
+- Debug: put ``scripts/fake-nvidia-smi`` first on ``PATH`` to run the
+  whole path without a GPU; ``get_stream(...).stats()`` shows spawn and
+  line counts.
+"""
+
+import atexit
+import csv
+import shutil
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class SmiStream:
+    """One persistent nvidia-smi process for a fixed query."""
+
+    def __init__(self, query: str, fields: str, interval_ms: int = 1000,
+                 idle_timeout: float = 60.0, retry_after: float = 30.0):
+        self.query = query
+        self.fields = fields
+        self.interval_ms = max(50, int(interval_ms))
+        self.idle_timeout = idle_timeout
+        self.retry_after = retry_after
+        self.spawns = 0
+        self.lines = 0
+        self._proc: Optional[subprocess.Popen] = None
+        self._thread: Optional[threading.Thread] = None
+        # process the watchdog stopped for lack of readers (not a failure)
+        self._idle_proc: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+        self._burst: List[List[str]] = []
+        self._latest: Optional[List[List[str]]] = None
+        self._last_line = 0.0
+        self._last_read = 0.0
+        self._failed_at = 0.0
+
+    @property
+    def command(self) -> List[str]:
+        return ['nvidia-smi', f'--{self.query}={self.fields}',
+                '--format=csv,noheader,nounits', '-lms', str(self.interval_ms)]
+
+    def rows(self) -> Optional[List[List[str]]]:
+        """Latest complete burst of CSV rows, [] if nothing was reported, None if unavailable."""
+        now = time.monotonic()
+        self._last_read = now
+        if not self._ensure_running(now):
+            return None
+
+        interval = self.interval_ms / 1000
+        with self._lock:
+            # time since the last row, or since the process started
+            quiet = now - self._last_line
+            if self._burst and quiet > interval / 2:
+                self._latest, self._burst = self._burst, []
+            if quiet > 2 * interval + 1.0:
+                # Still running but silent: the query currently has no rows
+                self._latest = []
+            return self._latest
+
+    def wait(self, timeout: float = 2.0) -> Optional[List[List[str]]]:
+        """Like ``rows`` but gives a freshly started stream time for its first burst."""
+        deadline = time.monotonic() + timeout
+        while True:
+            rows = self.rows()
+            if rows is not None or time.monotonic() >= deadline or self._failed_at:
+                return rows
+            time.sleep(min(0.05, self.interval_ms / 4000))
+
+    def _ensure_running(self, now: float) -> bool:
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            return True
+        with self._lock:
+            if self._proc is not None and self._proc.poll() is None:
+                return True
+            if self._failed_at and now - self._failed_at < self.retry_after:
+                return False
+            if shutil.which('nvidia-smi') is None:
+                self._failed_at = now
+                return False
+            try:
+                self._proc = subprocess.Popen(
+                    self.command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                    stdin=subprocess.DEVNULL, text=True, bufsize=1,
+                )
+            except Exception:
+                self._failed_at = now
+                return False
+            self.spawns += 1
+            self._failed_at = 0.0
+            self._burst, self._latest, self._last_line = [], None, now
+            self._thread = threading.Thread(target=self._reader, args=(self._proc,),
+                                            daemon=True, name=f'smi-{self.query}')
+            self._thread.start()
+            threading.Thread(target=self._watchdog, args=(self._proc,),
+                             daemon=True, name=f'smi-{self.query}-idle').start()
+            return True
+
+    def _watchdog(self, proc: subprocess.Popen):
+        period = max(0.05, min(1.0, self.idle_timeout / 4))
+        while True:
+            try:
+                proc.wait(timeout=period)
+                return
+            except subprocess.TimeoutExpired:
+                pass
+            if time.monotonic() - self._last_read > self.idle_timeout:
+                self._idle_proc = proc
+                # the reader sees EOF and cleans up
+                self._terminate(proc)
+                return
+
+    def _reader(self, proc: subprocess.Popen):
+        interval = self.interval_ms / 1000
+        try:
+            for line in proc.stdout:
+                now = time.monotonic()
+                line = line.strip()
+                if not line:
+                    continue
+                row = [p.strip() for p in next(csv.reader([line]))]
+                with self._lock:
+                    if self._burst and now - self._last_line > interval / 2:
+                        self._latest, self._burst = self._burst, []
+                    self._burst.append(row)
+                    self._last_line = now
+                    self.lines += 1
+        except Exception:
+            pass
+        finally:
+            self._terminate(proc)
+            if self._idle_proc is not proc and self._proc is proc and proc.returncode != 0:
+                # Query rejected (unsupported field, accounting disabled...): back off
+                self._failed_at = time.monotonic()
+
+    @staticmethod
+    def _terminate(proc: subprocess.Popen):
+        if proc.poll() is None:
+            try:
+                proc.terminate()
+                proc.wait(timeout=2)
+            except Exception:
+                try:
+                    proc.kill()
+                except Exception:
+                    pass
+
+    def stop(self):
+        proc = self._proc
+        self._proc = None
+        if proc is not None:
+            self._terminate(proc)
+
+    def stats(self) -> Dict[str, int]:
+        return {'spawns': self.spawns, 'lines': self.lines,
+                'running': int(self._proc is not None and self._proc.poll() is None)}
+
+
+_streams: Dict[Tuple[str, str, int], SmiStream] = {}
+_streams_lock = threading.Lock()
+
+
+def get_stream(query: str, fields: str, interval_ms: int = 1000) -> SmiStream:
+    """Get or create the shared stream for ``query``/``fields`` at ``interval_ms``."""
+    key = (query, fields, int(interval_ms))
+    stream = _streams.get(key)
+    if stream is None:
+        with _streams_lock:
+            stream = _streams.get(key)
+            if stream is None:
+                stream = SmiStream(query, fields, interval_ms)
+                _streams[key] = stream
+    return stream
+
+
+def stop_all():
+    for stream in list(_streams.values()):
+        stream.stop()
+
+
+atexit.register(stop_all)
@@ -1,7 +1,36 @@
+"""Host CPU, memory, disk and load metrics.
+
+Maintenance:
+- Purpose: one cheap, non-blocking ``collect()`` per sampling interval.
+- CPU: utilization is computed from the difference between two
+  ``psutil.cpu_times(percpu=True)`` readings, the previous one kept on the
+  instance, so nothing sleeps (``cpu_percent(interval=0.1)`` used to add
+  100 ms to every call). Keep one collector per sampling loop: the first
+  ``collect()`` of an instance has no previous reading and reports the
+  average since boot, and calls less than a clock tick apart repeat the
+  last reading.
+- Breakdown: ``cpu_user/system/iowait/steal_percent`` share the same
+  denominator as ``cpu_percent``; ``cpu_percent_per_core`` lists each
+  logical CPU. ``cpu_percent`` counts iowait as idle, as psutil does, and
+  excludes guest time, which is already part of user time.
+- Static fields (hostname, platform, CPU count, boot time, and the CPU
+  frequency on hosts without cpufreq) are read once per instance.
+- Linux fast path: CPU times, memory, load and network totals come from
+  ``procfs.py`` (pre-opened ``/proc`` files, no psutil objects) when
+  available; each section falls back to psutil if its file cannot be read.
+  ``SystemCollector(proc=ProcReader(fixture_dir))`` runs against captured
+  files; ``use_procfs=False`` forces psutil.
+- Debug: ``python -c "from monitor.collectors.system import SystemCollector as S; c = S(); c.collect(); print(c.collect())"``
+"""
+
 import os
 import platform
 import socket
-from typing import Dict, Any
+import time
+from array import array
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+from .procfs import CPU_FIELDS, ProcReader, get_reader
 
 try:
     import psutil
@@ -9,14 +38,60 @@ try:
 except ImportError:
     PSUTIL_AVAILABLE = False
 
+# cpu_times fields reported as their own percentages, when the platform has them
+_BREAKDOWN = ('user', 'system', 'iowait', 'steal')
+
+# counted in user/nice already on Linux
+_GUEST = ('guest', 'guest_nice')
+
+
+def _layout(fields: Sequence[str]) -> Tuple[List[int], List[int], List[Tuple[str, int]]]:
+    """Column indexes for one cpu_times field order: (guest, idle, breakdown)."""
+    guest = [fields.index(name) for name in _GUEST if name in fields]
+    idle = [fields.index(name) for name in ('idle', 'iowait') if name in fields]
+    breakdown = [(name, fields.index(name)) for name in _BREAKDOWN if name in fields]
+    return guest, idle, breakdown
+
+
+def _percent(part: float, total: float) -> float:
+    if total <= 0:
+        return 0.0
+    return round(min(100.0, max(0.0, part / total * 100)), 1)
+
 
 class SystemCollector:
     """Collects system metrics via psutil."""
     
+    def __init__(self, proc: Optional[ProcReader] = None, use_procfs: bool = True):
+        self._proc = (proc or get_reader()) if use_procfs else None
+        self._static: Optional[Dict[str, Any]] = None
+        # flat per-core cpu times (one row of fields per core); the previous
+        # reading is None until the first collect()
+        self._cpu_buffers = (array('d'), array('d'))
+        self._prev_cpu: Optional[Sequence[float]] = None
+        self._prev_fields: Sequence[str] = ()
+        self._last_cpu: Optional[Dict[str, Any]] = None
+    
+    def _static_fields(self) -> Dict[str, Any]:
+        if self._static is None:
+            static = {
+                'hostname': socket.gethostname(),
+                'platform': platform.system(),
+            }
+            if PSUTIL_AVAILABLE:
+                try:
+                    static['cpu_count'] = psutil.cpu_count()
+                    static['boot_time'] = psutil.boot_time()
+                except Exception:
+                    pass
+            self._static = static
+        return self._static
+    
     def collect(self) -> Dict[str, Any]:
+        static = self._static_fields()
         metrics = {
-            'hostname': socket.gethostname(),
-            'platform': platform.system(),
+            'hostname': static['hostname'],
+            'platform': static['platform'],
         }
         
         if PSUTIL_AVAILABLE:
@@ -26,22 +101,72 @@ class SystemCollector:
         
         return metrics
     
+    def _read_cpu_times(self) -> Tuple[Sequence[float], Sequence[str]]:
+        if self._proc is not None:
+            try:
+                # fill whichever buffer does not hold the previous reading
+                buffer = self._cpu_buffers[1] if self._cpu_buffers[0] is self._prev_cpu else self._cpu_buffers[0]
+                self._proc.cpu_times(buffer)
+                return buffer, CPU_FIELDS
+            except (OSError, ValueError, IndexError):
+                pass
+        cores = psutil.cpu_times(percpu=True)
+        fields = cores[0]._fields if cores else ()
+        return [value for core in cores for value in core], fields
+    
+    def _collect_cpu(self) -> Dict[str, Any]:
+        now, fields = self._read_cpu_times()
+        width = len(fields) or 1
+        prev = self._prev_cpu
+        if prev is None or len(prev) != len(now) or self._prev_fields != fields:
+            # first reading (or CPUs went on/offline): measure since boot
+            prev = None
+        guest, idle, breakdown = _layout(fields)
+        
+        total = busy = 0.0
+        parts = [0.0] * len(breakdown)
+        per_core = []
+        for base in range(0, len(now), width):
+            if prev is None:
+                delta = now[base:base + width]
+            else:
+                delta = [now[base + i] - prev[base + i] for i in range(width)]
+            core_total = sum(delta) - sum(delta[i] for i in guest)
+            core_busy = core_total - sum(delta[i] for i in idle)
+            per_core.append(_percent(core_busy, core_total))
+            total += core_total
+            busy += core_busy
+            for j, (_, i) in enumerate(breakdown):
+                parts[j] += delta[i]
+        
+        if total <= 0 and self._last_cpu is not None:
+            # called again within one clock tick: nothing new to measure
+            return self._last_cpu
+        self._prev_cpu = now
+        self._prev_fields = fields
+        
+        metrics = {'cpu_percent': _percent(busy, total), 'cpu_percent_per_core': per_core}
+        for (name, _), seconds in zip(breakdown, parts):
+            metrics[f'cpu_{name}_percent'] = _percent(seconds, total)
+        self._last_cpu = metrics
+        return metrics
+    
     def _collect_psutil(self) -> Dict[str, Any]:
         metrics = {}
         
         try:
-            metrics['cpu_percent'] = psutil.cpu_percent(interval=0.1)
-            metrics['cpu_count'] = psutil.cpu_count()
-            metrics['cpu_freq'] = psutil.cpu_freq().current if psutil.cpu_freq() else 0
+            metrics.update(self._collect_cpu())
+            metrics['cpu_count'] = self._static_fields().get('cpu_count')
+            metrics['cpu_freq'] = self._cpu_freq()
         except Exception as e:
             metrics['cpu_error'] = str(e)
         
         try:
-            mem = psutil.virtual_memory()
-            metrics['memory_total_gb'] = mem.total / (1024**3)
-            metrics['memory_used_gb'] = mem.used / (1024**3)
-            metrics['memory_available_gb'] = mem.available / (1024**3)
-            metrics['memory_percent'] = mem.percent
+            mem = self._memory()
+            metrics['memory_total_gb'] = mem['total'] / (1024**3)
+            metrics['memory_used_gb'] = mem['used'] / (1024**3)
+            metrics['memory_available_gb'] = mem['available'] / (1024**3)
+            metrics['memory_percent'] = mem['percent']
         except Exception as e:
             metrics['memory_error'] = str(e)
         
@@ -55,26 +180,72 @@ class SystemCollector:
             metrics['disk_error'] = str(e)
         
         try:
-            if hasattr(os, 'getloadavg'):
-                metrics['load_avg'] = list(os.getloadavg())
-            else:
-                metrics['load_avg'] = [0, 0, 0]
+            metrics['load_avg'] = self._load_avg()
         except Exception:
             metrics['load_avg'] = [0, 0, 0]
         
         try:
-            net = psutil.net_io_counters()
-            metrics['net_bytes_sent'] = net.bytes_sent
-            metrics['net_bytes_recv'] = net.bytes_recv
+            metrics['net_bytes_sent'], metrics['net_bytes_recv'] = self._net_totals()
         except Exception:
             pass
         
         try:
-            metrics['uptime_seconds'] = (psutil.time.time() - psutil.boot_time())
+            metrics['uptime_seconds'] = time.time() - self._static_fields()['boot_time']
         except Exception:
             pass
         
         return metrics
+    
+    def _cpu_freq(self) -> float:
+        if self._proc is not None:
+            try:
+                mhz = self._proc.cpu_freq_mhz()
+                if mhz is not None:
+                    return mhz
+                # no cpufreq driver: psutil would parse /proc/cpuinfo, whose value does not change
+                static = self._static_fields()
+                if 'cpu_freq' not in static:
+                    freq = psutil.cpu_freq()
+                    static['cpu_freq'] = freq.current if freq else 0
+                return static['cpu_freq']
+            except (OSError, ValueError):
+                pass
+        freq = psutil.cpu_freq()
+        return freq.current if freq else 0
+    
+    def _load_avg(self) -> List[float]:
+        if self._proc is not None:
+            try:
+                return list(self._proc.loadavg())
+            except (OSError, ValueError):
+                pass
+        if hasattr(os, 'getloadavg'):
+            return list(os.getloadavg())
+        return [0, 0, 0]
+    
+    def _memory(self) -> Dict[str, Any]:
+        if self._proc is not None:
+            try:
+                mem = self._proc.meminfo()
+                if mem['total']:
+                    used = mem['total'] - mem['available']
+                    mem['percent'] = round(used / mem['total'] * 100, 1)
+                    return mem
+            except (OSError, ValueError):
+                pass
+        mem = psutil.virtual_memory()
+        return {'total': mem.total, 'used': mem.used, 'available': mem.available, 'percent': mem.percent}
+    
+    def _net_totals(self) -> Tuple[int, int]:
+        """Bytes sent and received over all interfaces."""
+        if self._proc is not None:
+            try:
+                counters = self._proc.net_dev().values()
+                return sum(c[4] for c in counters), sum(c[0] for c in counters)
+            except (OSError, ValueError, IndexError):
+                pass
+        net = psutil.net_io_counters()
+        return net.bytes_sent, net.bytes_recv
 
     def collect_ports(self) -> list:
         """Collect active ports and associated processes."""
@@ -0,0 +1,204 @@
+"""Columnar export and import of metrics history.
+
+Maintenance:
+- Purpose: move weeks of history between nodes or into offline analysis
+  without row-wise JSON. Each series becomes one file with two columns,
+  ``ts`` (epoch ms, int64) and ``value`` (float64).
+- Formats: ``parquet`` or ``arrow`` (Arrow IPC file) when pyarrow is
+  installed, otherwise ``npz`` (NumPy, compressed). ``default_format()``
+  picks the best one available.
+- Layout: hive-style directories, one per series,
+  ``hostname=<h>/metric_type=<t>/metric_name=<n>/data.<ext>`` (values
+  URI-encoded), plus ``_manifest.json`` listing every file with its row
+  count and time range. ``pyarrow.dataset.dataset(path,
+  partitioning='hive')`` reads a parquet/arrow export as one table.
+- Import: ``import_history`` reads an export directory or its zip and
+  backfills through ``MetricsStorage.backfill_series``. Samples already
+  in the target DB are kept. The rollup job re-aggregates the imported
+  range. Samples older than the target's retention are dropped by its
+  next retention pass.
+- Debug: ``_manifest.json`` in the export; ``import_history`` returns the
+  number of series and rows it offered.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+FORMATS = ('parquet', 'arrow', 'npz')
+
+# leading underscore: dataset readers skip it as metadata
+MANIFEST = '_manifest.json'
+
+_MANIFEST_VERSION = 1
+
+
+def available_formats() -> List[str]:
+    formats = []
+    if PYARROW_AVAILABLE:
+        formats += ['parquet', 'arrow']
+    if NUMPY_AVAILABLE:
+        formats.append('npz')
+    return formats
+
+
+def default_format() -> Optional[str]:
+    formats = available_formats()
+    return formats[0] if formats else None
+
+
+def _series_dir(hostname: str, metric_type: str, metric_name: str) -> str:
+    return '/'.join(f'{key}={quote(str(value), safe="")}' for key, value in (
+        ('hostname', hostname), ('metric_type', metric_type), ('metric_name', metric_name)))
+
+
+def _write_series(path: Path, fmt: str, ts: List[int], values: List[float]):
+    if fmt == 'npz':
+        np.savez_compressed(path, ts=np.asarray(ts, dtype=np.int64),
+                            value=np.asarray(values, dtype=np.float64))
+        return
+    table = pa.table({'ts': pa.array(ts, pa.int64()), 'value': pa.array(values, pa.float64())})
+    if fmt == 'parquet':
+        # timestamps are near-regular: delta encoding shrinks them to almost nothing
+        pq.write_table(table, path, compression='zstd', use_dictionary=False,
+                       column_encoding={'ts': 'DELTA_BINARY_PACKED'})
+    else:
+        with pa_ipc.new_file(path, table.schema,
+                             options=pa_ipc.IpcWriteOptions(compression='zstd')) as writer:
+            writer.write_table(table)
+
+
+def _read_series(path: Path, fmt: str) -> Tuple[List[int], List[float]]:
+    if fmt == 'npz':
+        with np.load(path) as data:
+            return data['ts'].tolist(), data['value'].tolist()
+    if fmt == 'parquet':
+        table = pq.read_table(path, columns=['ts', 'value'])
+    else:
+        with pa_ipc.open_file(path) as reader:
+            table = reader.read_all()
+    return table.column('ts').to_pylist(), table.column('value').to_pylist()
+
+
+def _check_format(fmt: str):
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format '{fmt}' (expected one of: {', '.join(FORMATS)})")
+    if fmt not in available_formats():
+        needs = 'numpy' if fmt == 'npz' else 'pyarrow'
+        raise ValueError(f"format '{fmt}' requires {needs}")
+
+
+def export_history(storage, dest: str, fmt: Optional[str] = None, hours: Optional[float] = None,
+                   hostname: Optional[str] = None, metric_type: Optional[str] = None,
+                   metric_name: Optional[str] = None) -> Dict[str, Any]:
+    """Write one file per series under ``dest`` and return the manifest.
+
+    Blocking; run it on a worker thread (the storage must be initialized).
+    """
+    fmt = fmt or default_format()
+    if fmt is None:
+        raise ValueError('columnar export requires pyarrow or numpy')
+    _check_format(fmt)
+
+    root = Path(dest)
+    root.mkdir(parents=True, exist_ok=True)
+    series = []
+    for host, mtype, mname, ts, values in storage.iter_series(hours, hostname, metric_type, metric_name):
+        rel = f'{_series_dir(host, mtype, mname)}/data.{fmt}'
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write_series(path, fmt, ts, values)
+        series.append({'hostname': host, 'metric_type': mtype, 'metric_name': mname, 'file': rel,
+                       'rows': len(ts), 'first_ts': ts[0], 'last_ts': ts[-1]})
+
+    manifest = {'version': _MANIFEST_VERSION, 'format': fmt, 'columns': ['ts', 'value'],
+                'rows': sum(s['rows'] for s in series), 'series': series}
+    (root / MANIFEST).write_text(json.dumps(manifest, indent=1))
+    return manifest
+
+
+def export_archive(storage, fmt: Optional[str] = None, **filters) -> Tuple[str, Dict[str, Any]]:
+    """``export_history`` into a temporary directory, zipped; returns ``(zip_path, manifest)``.
+
+    The caller deletes the zip's parent directory when done.
+    """
+    workdir = tempfile.mkdtemp(prefix='metrics-export-')
+    try:
+        manifest = export_history(storage, os.path.join(workdir, 'export'), fmt, **filters)
+        zip_path = os.path.join(workdir, 'export.zip')
+        root = Path(workdir, 'export')
+        # series files are compressed already
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_STORED) as archive:
+            for path in sorted(root.rglob('*')):
+                if path.is_file():
+                    archive.write(path, path.relative_to(root).as_posix())
+        shutil.rmtree(root, ignore_errors=True)
+        return zip_path, manifest
+    except Exception:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+
+
+async def import_history(storage, src: str, hostname: Optional[str] = None) -> Dict[str, Any]:
+    """Backfill ``storage`` from an export directory or zip.
+
+    ``hostname`` files every series under that host instead of the one
+    recorded in the manifest.
+    """
+    workdir = None
+    root = Path(src)
+    try:
+        if root.is_file() and zipfile.is_zipfile(root):
+            workdir = tempfile.mkdtemp(prefix='metrics-import-')
+            await asyncio.to_thread(_safe_extract, root, workdir)
+            root = Path(workdir)
+        elif not root.is_dir():
+            raise ValueError(f'{src} is neither an export directory nor a zip of one')
+
+        manifest = json.loads((root / MANIFEST).read_text())
+        fmt = manifest.get('format')
+        _check_format(fmt)
+
+        rows = 0
+        for entry in manifest.get('series', []):
+            path = (root / entry['file']).resolve()
+            if root.resolve() not in path.parents:
+                continue
+            ts, values = await asyncio.to_thread(_read_series, path, fmt)
+            rows += await storage.backfill_series(
+                hostname or entry['hostname'], entry['metric_type'], entry['metric_name'], ts, values)
+        return {'series': len(manifest.get('series', [])), 'rows': rows, 'format': fmt}
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _safe_extract(archive_path: Path, dest: str):
+    base = Path(dest).resolve()
+    with zipfile.ZipFile(archive_path) as archive:
+        for member in archive.namelist():
+            target = (base / member).resolve()
+            if target != base and base not in target.parents:
+                raise ValueError(f'unsafe path in archive: {member}')
+        archive.extractall(base)
+
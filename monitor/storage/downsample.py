@@ -0,0 +1,147 @@
+"""Point-budget downsampling for history queries.
+
+Maintenance:
+- Purpose: reduce a time series to roughly the number of pixels it will be
+  drawn on without losing its shape. ``lttb`` (Largest-Triangle-Three-Buckets)
+  keeps the visually significant points; ``minmax`` keeps the lowest and
+  highest sample of every bucket so short spikes (thermal excursions, power
+  transients) always survive.
+- Both return indices into the (time-ascending) input so callers can keep
+  whatever extra columns the rows carry.
+- NumPy is optional (it ships with the visualization extras); without it
+  both methods fall back to plain-Python min/max bucketing.
+"""
+
+from typing import Any, Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+METHODS = ('lttb', 'minmax')
+
+
+def lttb(x: Sequence[float], y: Sequence[float], points: int) -> List[int]:
+    """Indices of the ``points`` samples chosen by Largest-Triangle-Three-Buckets."""
+    n = len(x)
+    if points >= n or points < 3:
+        return list(range(n)) if points >= n else _endpoints(n, points)
+    if not NUMPY_AVAILABLE:
+        return minmax(x, y, points)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # first and last points are fixed; the rest is split into points - 2 buckets
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    # per-bucket averages serve as the third triangle vertex for the previous bucket
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    counts = np.maximum(np.diff(edges), 1)
+    avg_x = np.append(sums_x / counts, x[-1])
+    avg_y = np.append(sums_y / counts, y[-1])
+
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        bx, by = x[lo:hi], y[lo:hi]
+        area = np.abs((x[a] - avg_x[i + 1]) * (by - y[a]) - (x[a] - bx) * (avg_y[i + 1] - y[a]))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected.tolist()
+
+
+def minmax(x: Sequence[float], y: Sequence[float], points: int) -> List[int]:
+    """Indices of the min and max sample of ``points // 2`` equal-count buckets."""
+    n = len(x)
+    if points >= n:
+        return list(range(n))
+    if points < 2:
+        return _endpoints(n, points)
+    lows, highs = _bucket_extremes(y, y, points // 2)
+    return sorted(set(lows) | set(highs))
+
+
+def _bucket_extremes(low: Sequence[float], high: Sequence[float],
+                     buckets: int) -> Tuple[List[int], List[int]]:
+    """Per equal-count bucket: index of the smallest ``low`` and of the largest ``high``."""
+    n = len(low)
+    if not NUMPY_AVAILABLE:
+        lows, highs = [], []
+        for b in range(buckets):
+            idx = range((b * n) // buckets, ((b + 1) * n) // buckets)
+            if idx:
+                lows.append(min(idx, key=low.__getitem__))
+                highs.append(max(idx, key=high.__getitem__))
+        return lows, highs
+
+    bucket = (np.arange(n) * buckets) // n
+    starts = np.searchsorted(bucket, np.arange(buckets))
+    ends = np.append(starts[1:], n) - 1
+    # sort by (bucket, value): each bucket's min comes first, its max last
+    order_low = np.lexsort((np.asarray(low, dtype=np.float64), bucket))
+    order_high = np.lexsort((np.asarray(high, dtype=np.float64), bucket))
+    return order_low[starts].tolist(), order_high[ends].tolist()
+
+
+def _endpoints(n: int, points: int) -> List[int]:
+    if points <= 0 or n == 0:
+        return []
+    return [0] if points == 1 else [0, n - 1]
+
+
+def downsample_rows(rows: List[Dict[str, Any]], points: int,
+                    method: str = 'lttb') -> List[Dict[str, Any]]:
+    """Downsample query rows to at most ``points`` per series, keeping newest-first order.
+
+    Rows are grouped by (hostname, metric_type, metric_name); ``ts`` is the
+    x axis and ``metric_value`` the y axis. Rollup rows already carry min/max
+    per bucket, so ``minmax`` uses those columns when present.
+    """
+    if method not in METHODS:
+        raise ValueError(f'unknown downsampling method: {method}')
+
+    series: Dict[tuple, List[Dict[str, Any]]] = {}
+    for row in rows:
+        key = (row.get('hostname'), row.get('metric_type'), row.get('metric_name'))
+        series.setdefault(key, []).append(row)
+
+    out: List[Dict[str, Any]] = []
+    for group in series.values():
+        if len(group) <= points:
+            out.extend(group)
+            continue
+        group.sort(key=lambda r: r['ts'])
+        x = [r['ts'] for r in group]
+        y = [r['metric_value'] if r['metric_value'] is not None else 0.0 for r in group]
+        if method == 'minmax' and 'max' in group[0]:
+            out.extend(_minmax_rollup(group, points))
+            continue
+        pick = lttb(x, y, points) if method == 'lttb' else minmax(x, y, points)
+        out.extend(group[i] for i in pick)
+
+    out.sort(key=lambda r: r['ts'], reverse=True)
+    return out
+
+
+def _minmax_rollup(group: List[Dict[str, Any]], points: int) -> List[Dict[str, Any]]:
+    # Choose buckets by their extremes (lowest min, highest max) rather than by
+    # the average, and report the extreme that got the bucket picked.
+    lows = [r['min'] if r['min'] is not None else 0.0 for r in group]
+    highs = [r['max'] if r['max'] is not None else 0.0 for r in group]
+    low_pick, high_pick = _bucket_extremes(lows, highs, max(1, points // 2))
+    low_pick, high_pick = set(low_pick), set(high_pick)
+    out = []
+    for i in sorted(low_pick | high_pick):
+        if i in low_pick and i in high_pick:
+            # one bucket holds both extremes: keep whichever strays further from its mean
+            avg = group[i]['metric_value'] or 0.0
+            value = highs[i] if highs[i] - avg >= avg - lows[i] else lows[i]
+        else:
+            value = highs[i] if i in high_pick else lows[i]
+        out.append(dict(group[i], metric_value=value))
+    return out
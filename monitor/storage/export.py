@@ -0,0 +1,67 @@
+"""Incremental encoders for metrics exports.
+
+Maintenance:
+- Purpose: turn the row chunks of ``MetricsStorage.iter_rows`` into byte
+  chunks for a ``StreamingResponse`` without ever holding the whole export:
+  memory is one chunk of rows plus its encoding, and the first bytes go out
+  as soon as the first chunk is read.
+- Formats: ``ndjson`` (one object per line), ``json`` (a JSON array, for
+  the existing download button) and ``csv`` (header plus rows).
+- Row shape: ``ts, timestamp, hostname, metric_type, metric_name,
+  metric_value``, the same keys ``MetricsStorage.query`` returns.
+- Debug: call an encoder on a hand-made async generator and join the output.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, List
+
+FIELDS = ('ts', 'timestamp', 'hostname', 'metric_type', 'metric_name', 'metric_value')
+
+MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+    'csv': 'text/csv',
+}
+
+
+def _records(rows: List[tuple]):
+    for ts, hostname, metric_type, metric_name, value in rows:
+        yield ts, datetime.fromtimestamp(ts / 1000).isoformat(), hostname, metric_type, metric_name, value
+
+
+async def ndjson_chunks(chunks: AsyncIterator[List[tuple]]) -> AsyncIterator[bytes]:
+    async for rows in chunks:
+        yield ''.join(json.dumps(dict(zip(FIELDS, record))) + '\n' for record in _records(rows)).encode()
+
+
+async def json_chunks(chunks: AsyncIterator[List[tuple]]) -> AsyncIterator[bytes]:
+    yield b'['
+    first = True
+    async for rows in chunks:
+        body = ',\n'.join(json.dumps(dict(zip(FIELDS, record))) for record in _records(rows))
+        if body:
+            yield (('\n' if first else ',\n') + body).encode()
+            first = False
+    yield b'\n]\n'
+
+
+async def csv_chunks(chunks: AsyncIterator[List[tuple]]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(FIELDS)
+    yield buffer.getvalue().encode()
+    async for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(_records(rows))
+        yield buffer.getvalue().encode()
+
+
+ENCODERS = {
+    'ndjson': ndjson_chunks,
+    'json': json_chunks,
+    'csv': csv_chunks,
+}
@@ -0,0 +1,202 @@
+"""Day partitions for the raw ``samples`` data.
+
+Maintenance:
+- Purpose: raw samples are split into one WITHOUT ROWID table per UTC day
+  (``samples_YYYYMMDD``) so retention drops whole tables instead of
+  deleting rows: no per-row index maintenance and no long write lock on a
+  multi-GB database.
+- ``samples`` is a view over every partition, kept for ad-hoc queries and
+  the ``metrics`` view. It is rebuilt by ``publish()`` after the write
+  that created a partition commits, once per batch rather than once per
+  new day, so a backfill over many days never rebuilds it inside its
+  transaction. Hot paths build one query arm per partition that overlaps
+  their time range (``union``), so each arm is still a primary-key seek
+  per series.
+- Databases created before partitioning keep their old table as
+  ``samples_archive``; it is read like any other partition and dropped
+  once its newest sample falls out of retention.
+- Rollup buckets (1m/15m/1h) never straddle a UTC day, so grouping per
+  partition gives the same result as grouping the whole range.
+- Threads: the set is mutated only by the connection's owner (the storage
+  writer thread). Readers on other threads see the snapshot taken by the
+  last ``publish()``, which the owner calls once new partitions are
+  committed, so a reader never names a table it cannot see yet. If the
+  transaction rolls back instead, ``discard_unpublished()`` forgets the
+  tables it created, so the next write creates them again.
+- Limit: SQLite allows 500 arms per compound SELECT. ``union`` nests
+  longer lists as ``SELECT * FROM (...)`` groups of at most
+  ``MAX_ARMS``, so the view and every query work with any number of
+  partitions (``retention_hours=None`` keeps them all).
+- Debug: ``PartitionSet.describe()`` lists every partition with its range.
+"""
+
+import calendar
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+DAY_MS = 86_400_000
+
+ARCHIVE = 'samples_archive'
+
+_PREFIX = 'samples_'
+
+# Arms per compound SELECT; SQLite rejects more than 500 (SQLITE_MAX_COMPOUND_SELECT)
+MAX_ARMS = 500
+
+
+def day_of(ts_ms: int) -> int:
+    return int(ts_ms) // DAY_MS
+
+
+def table_name(day: int) -> str:
+    return _PREFIX + time.strftime('%Y%m%d', time.gmtime(day * 86400))
+
+
+def _day_from_name(name: str) -> Optional[int]:
+    try:
+        return calendar.timegm(time.strptime(name[len(_PREFIX):], '%Y%m%d')) // 86400
+    except ValueError:
+        return None
+
+
+def union(template: str, tables: List[str]) -> str:
+    """``template`` (with a ``{samples}`` placeholder) once per table, joined with UNION ALL.
+
+    Callers repeat their parameters once per table. Past ``MAX_ARMS``
+    tables the arms are grouped into subqueries, keeping the same order.
+    """
+    arms = [template.replace('{samples}', table) for table in tables]
+    if len(arms) <= MAX_ARMS:
+        return '\nUNION ALL\n'.join(arms)
+    return '\nUNION ALL\n'.join(
+        'SELECT * FROM (' + '\nUNION ALL\n'.join(arms[start:start + MAX_ARMS]) + ')'
+        for start in range(0, len(arms), MAX_ARMS))
+
+
+class PartitionSet:
+    """The day partitions of one database connection."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        # table name -> (first ms, end ms exclusive)
+        self._ranges: Dict[str, Tuple[int, int]] = {}
+        self._by_day: Dict[int, str] = {}
+        # created by table_for() since the last publish(), possibly not committed yet
+        self._created: List[str] = []
+        # what covering()/all() report: (name, first ms, end ms), oldest first
+        self._visible: Tuple[Tuple[str, int, int], ...] = ()
+        # the samples view misses partitions created since it was built
+        self._view_stale = False
+
+    def load(self):
+        """Discover existing partitions (and adopt a pre-partitioning ``samples`` table)."""
+        row = self.conn.execute("SELECT type FROM sqlite_master WHERE name = 'samples'").fetchone()
+        if row and row[0] == 'table':
+            with self.conn:
+                # the metrics view is recreated on top of the partition view below
+                self.conn.execute('DROP VIEW IF EXISTS metrics')
+                self.conn.execute(f'ALTER TABLE samples RENAME TO {ARCHIVE}')
+
+        self._ranges.clear()
+        self._by_day.clear()
+        for (name,) in self.conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB 'samples_[0-9]*'"):
+            day = _day_from_name(name)
+            if day is not None and table_name(day) == name:
+                self._by_day[day] = name
+                self._ranges[name] = (day * DAY_MS, (day + 1) * DAY_MS)
+
+        if self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (ARCHIVE,)).fetchone():
+            lo, hi = self.conn.execute(f'''
+                SELECT MIN((SELECT MIN(ts) FROM {ARCHIVE} WHERE series_id = se.id)),
+                       MAX((SELECT MAX(ts) FROM {ARCHIVE} WHERE series_id = se.id))
+                FROM series se
+            ''').fetchone()
+            if lo is None:
+                self.conn.execute(f'DROP TABLE {ARCHIVE}')
+            else:
+                self._ranges[ARCHIVE] = (lo, hi + 1)
+
+        if not self._by_day:
+            self.table_for(int(time.time() * 1000))
+        self._view_stale = True
+        self.publish()
+
+    def table_for(self, ts_ms: int) -> str:
+        """Partition holding ``ts_ms``, created on first use."""
+        day = day_of(ts_ms)
+        name = self._by_day.get(day)
+        if name is None:
+            name = table_name(day)
+            self.conn.execute(f'''
+                CREATE TABLE IF NOT EXISTS {name} (
+                    series_id INTEGER NOT NULL,
+                    ts INTEGER NOT NULL,
+                    value REAL,
+                    PRIMARY KEY (series_id, ts)
+                ) WITHOUT ROWID
+            ''')
+            self._by_day[day] = name
+            self._ranges[name] = (day * DAY_MS, (day + 1) * DAY_MS)
+            self._created.append(name)
+            self._view_stale = True
+        return name
+
+    def publish(self):
+        """Make partitions created so far visible to ``covering()``; call after committing."""
+        self._created.clear()
+        self._visible = tuple((name, lo, hi) for name, (lo, hi) in self._sorted())
+        if self._view_stale:
+            try:
+                with self.conn:
+                    self._refresh_view()
+                self._view_stale = False
+            except sqlite3.Error:
+                # only ad-hoc queries read the view; retried on the next publish
+                pass
+
+    def discard_unpublished(self):
+        """Forget partitions created since the last ``publish()``; call after a rollback undid them."""
+        for name in self._created:
+            self._ranges.pop(name, None)
+        self._by_day = {day: name for day, name in self._by_day.items() if name in self._ranges}
+        self._created.clear()
+
+    def covering(self, since_ms: int, until_ms: Optional[int] = None) -> List[str]:
+        """Published partitions that may hold samples in ``[since_ms, until_ms)``, oldest first."""
+        return [name for name, lo, hi in self._visible
+                if hi > since_ms and (until_ms is None or lo < until_ms)]
+
+    def all(self) -> List[str]:
+        return self.covering(0)
+
+    def drop_before(self, cutoff_ms: int) -> List[str]:
+        """Drop every partition whose samples are all older than ``cutoff_ms``."""
+        expired = [name for name, (_, hi) in self._ranges.items() if hi <= cutoff_ms]
+        # always keep the partition currently written to
+        current = self._by_day.get(day_of(time.time() * 1000))
+        expired = [name for name in expired if name != current]
+        if not expired:
+            return []
+        # hide them from readers before they disappear
+        self._visible = tuple(entry for entry in self._visible if entry[0] not in expired)
+        with self.conn:
+            for name in expired:
+                self.conn.execute(f'DROP TABLE IF EXISTS {name}')
+                del self._ranges[name]
+            self._by_day = {day: name for day, name in self._by_day.items() if name in self._ranges}
+            self._refresh_view()
+        return expired
+
+    def _refresh_view(self):
+        self.conn.execute('DROP VIEW IF EXISTS samples')
+        self.conn.execute('CREATE VIEW samples AS ' + union(
+            'SELECT series_id, ts, value FROM {samples}', [name for name, _ in self._sorted()]))
+
+    def _sorted(self) -> List[Tuple[str, Tuple[int, int]]]:
+        return sorted(self._ranges.items(), key=lambda item: item[1])
+
+    def describe(self) -> List[Dict[str, int]]:
+        return [{'table': name, 'from_ms': lo, 'to_ms': hi} for name, (lo, hi) in self._sorted()]
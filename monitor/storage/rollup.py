@@ -0,0 +1,165 @@
+"""Multi-resolution rollups for the metrics ``samples`` partitions.
+
+Maintenance:
+- Purpose: keep 1-minute, 15-minute and 1-hour min/max/sum/count aggregates
+  next to the raw samples so long-range history reads a bounded number of
+  rows instead of scanning (or truncating) raw data.
+- Each level is built from the one below it (samples -> 1m -> 15m -> 1h)
+  and only for buckets that are complete; progress is tracked per level in
+  ``rollup_state.watermark`` (epoch ms, exclusive upper bound).
+- Raw samples live in day partitions (``partitions.py``); a chunk is
+  aggregated per partition and merged, since a chunk may span two days.
+- Debug: ``SELECT * FROM rollup_state`` shows how far each level has been
+  built; ``plan_resolution`` explains which table a history query will hit.
+"""
+
+import sqlite3
+from typing import Optional, Tuple
+
+from . import partitions
+
+# (name, bucket width in ms), finest first
+RESOLUTIONS: Tuple[Tuple[str, int], ...] = (
+    ('1m', 60_000),
+    ('15m', 900_000),
+    ('1h', 3_600_000),
+)
+
+# Maximum number of buckets built per level in one step, so catching up on a
+# large backlog happens in short transactions that interleave with writers.
+_MAX_BUCKETS_PER_STEP = 1440
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS rollup_state (
+        resolution TEXT PRIMARY KEY,
+        watermark INTEGER NOT NULL
+    );
+''' + ''.join(f'''
+    CREATE TABLE IF NOT EXISTS rollup_{name} (
+        series_id INTEGER NOT NULL,
+        bucket INTEGER NOT NULL,
+        min REAL,
+        max REAL,
+        sum REAL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (series_id, bucket)
+    ) WITHOUT ROWID;
+''' for name, _ in RESOLUTIONS)
+
+
+def table_for(resolution: str) -> str:
+    if resolution not in dict(RESOLUTIONS):
+        raise ValueError(f'unknown rollup resolution: {resolution}')
+    return f'rollup_{resolution}'
+
+
+def plan_resolution(span_ms: int, raw_interval_ms: int,
+                    max_points: int) -> Optional[Tuple[str, int]]:
+    """Pick the finest level whose bucket count for ``span_ms`` fits ``max_points``.
+
+    Returns None when raw samples already fit the budget. If even hourly
+    buckets exceed it, the hourly level is returned (callers may further
+    downsample); its size is bounded by the data's actual age.
+    """
+    max_points = max(1, int(max_points))
+    if span_ms / max(1, raw_interval_ms) <= max_points:
+        return None
+    for name, step in RESOLUTIONS:
+        if span_ms / step <= max_points:
+            return name, step
+    return RESOLUTIONS[-1]
+
+
+def _watermark(conn: sqlite3.Connection, resolution: str) -> Optional[int]:
+    row = conn.execute(
+        'SELECT watermark FROM rollup_state WHERE resolution = ?', (resolution,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def watermarks(conn: sqlite3.Connection) -> dict:
+    return {name: _watermark(conn, name) for name, _ in RESOLUTIONS}
+
+
+def _earliest_sample(conn: sqlite3.Connection, parts: 'partitions.PartitionSet') -> Optional[int]:
+    # One primary-key seek per series (and partition) instead of a scan of samples
+    for table in parts.all():
+        row = conn.execute(f'''
+            SELECT MIN((SELECT MIN(ts) FROM {table} WHERE series_id = se.id)) FROM series se
+        ''').fetchone()
+        if row and row[0] is not None:
+            return row[0]
+    return None
+
+
+def rollup_step(conn: sqlite3.Connection, parts: 'partitions.PartitionSet', now_ms: int,
+                lag_ms: int) -> bool:
+    """Advance every level by at most one chunk; True if any level still lags behind."""
+    behind = False
+    source_table, source_limit = 'samples', now_ms - lag_ms
+    source_step = None
+
+    for name, step in RESOLUTIONS:
+        upper = (source_limit // step) * step
+        start = _watermark(conn, name)
+        if start is None:
+            earliest = _earliest_sample(conn, parts) if source_table == 'samples' else _watermark_floor(conn, source_step)
+            if earliest is None:
+                return behind
+            start = (earliest // step) * step
+
+        if start < upper:
+            end = min(upper, start + step * _MAX_BUCKETS_PER_STEP)
+            with conn:
+                if source_table == 'samples':
+                    tables = parts.covering(start, end)
+                    if tables:
+                        arms = partitions.union(f'''
+                            SELECT s.series_id AS series_id, (s.ts / {step}) * {step} AS b,
+                                   MIN(s.value) AS min, MAX(s.value) AS max,
+                                   SUM(s.value) AS sum, COUNT(s.value) AS count
+                            FROM series se CROSS JOIN {{samples}} s
+                            WHERE s.series_id = se.id AND s.ts >= ? AND s.ts < ?
+                            GROUP BY s.series_id, b
+                        ''', tables)
+                        conn.execute(f'''
+                            INSERT OR REPLACE INTO rollup_{name} (series_id, bucket, min, max, sum, count)
+                            SELECT series_id, b, MIN(min), MAX(max), SUM(sum), SUM(count)
+                            FROM ({arms})
+                            GROUP BY series_id, b
+                        ''', (start, end) * len(tables))
+                else:
+                    conn.execute(f'''
+                        INSERT OR REPLACE INTO rollup_{name} (series_id, bucket, min, max, sum, count)
+                        SELECT r.series_id, (r.bucket / {step}) * {step} AS b,
+                               MIN(r.min), MAX(r.max), SUM(r.sum), SUM(r.count)
+                        FROM series se CROSS JOIN {source_table} r
+                        WHERE r.series_id = se.id AND r.bucket >= ? AND r.bucket < ?
+                        GROUP BY r.series_id, b
+                    ''', (start, end))
+                conn.execute(
+                    'INSERT OR REPLACE INTO rollup_state (resolution, watermark) VALUES (?, ?)',
+                    (name, end))
+            start = end
+            behind = behind or end < upper
+
+        # the next level may only consume buckets this level has finished
+        source_table, source_limit, source_step = f'rollup_{name}', start, name
+
+    return behind
+
+
+def rewind(conn: sqlite3.Connection, ts_ms: int):
+    """Move every level's watermark back to cover ``ts_ms`` (after backfilling older samples)."""
+    for name, step in RESOLUTIONS:
+        conn.execute(
+            'UPDATE rollup_state SET watermark = MIN(watermark, ?) WHERE resolution = ?',
+            ((int(ts_ms) // step) * step, name))
+
+
+def _watermark_floor(conn: sqlite3.Connection, resolution: str) -> Optional[int]:
+    row = conn.execute(f'''
+        SELECT MIN((SELECT MIN(bucket) FROM rollup_{resolution} WHERE series_id = se.id))
+        FROM series se
+    ''').fetchone()
+    return row[0] if row else None
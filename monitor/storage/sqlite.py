@@ -2,45 +2,239 @@
 
 Maintenance:
 - Purpose: persistent storage of collected metrics. Schema is created lazily.
-- Debug: check `metrics.db` (path from config) and inspect `metrics` table.
+- Layout: ``hosts`` and ``series`` are small dictionary tables; each sample
+  is a ``(series_id, ts, value)`` row in a WITHOUT ROWID table keyed by
+  ``(series_id, ts)`` with ``ts`` in epoch milliseconds, so a range scan for
+  one series is a single primary-key seek. Samples are partitioned into one
+  such table per UTC day (see ``partitions.py``).
+- Retention: a background job drops whole day partitions once they are
+  older than ``retention_hours`` (``monitoring.history_retention_hours``),
+  so purging never deletes rows one by one. Rollups are kept.
+- Writes are buffered in memory and flushed with one ``executemany``
+  transaction every ``flush_interval`` seconds or ``flush_rows`` rows,
+  whichever comes first. Reads and ``close()`` flush first. A batch whose
+  transaction fails with an ``OperationalError`` (locked, busy, I/O) is
+  kept by the writer and put ahead of the next one, capped at
+  ``_MAX_UNWRITTEN_FLUSHES`` batches' worth of rows, so a transient error
+  does not lose the samples buffered so far.
+- Threads: no SQLite call runs on the event loop. The read-write
+  connection belongs to a dedicated writer thread that runs flushes,
+  rollups, retention, migration and backfill one job at a time from a
+  queue; history and alert queries run on a small pool of read-only
+  connections (``storage.read_connections``), see ``worker.py``. Each
+  ``async`` method awaits its job, so a slow commit delays only the
+  coroutine that asked for it. Helpers that take a ``conn`` argument run
+  on a reader thread; those using ``self.conn`` run on the writer thread.
+- Rollups: ``rollup_1m``/``rollup_15m``/``rollup_1h`` hold min/max/sum/count
+  aggregates maintained by a background job (see ``rollup.py``). History
+  queries with a point budget read the finest level that fits the budget.
+- Databases created before the normalized layout are migrated online: the
+  old table is renamed to ``metrics_legacy`` and drained newest-first in
+  small chunks by a background task while the app keeps running. Each
+  chunk rewinds the rollup watermarks to its oldest sample, and the rollup
+  job waits for the migration to finish before it starts.
+- Alerts: lifecycle transitions from ``AlertTracker`` are queued with
+  ``queue_alert_transitions`` and written in the same flush transaction as
+  samples: a fired alert inserts one row keyed by its ``fingerprint``, a
+  resolved one sets ``resolved_at`` on that row. Rows left open by a
+  previous run are closed at startup, since the tracker starts empty.
+- Exports: ``iter_rows`` streams raw samples in chunks from a separate
+  read-only connection inside one read transaction, fetching on a worker
+  thread so the event loop and the writer are never blocked. The
+  partition list is resolved against ``sqlite_master`` inside that
+  transaction, so the export is a consistent snapshot: a partition that
+  retention drops mid-export is still read, and one dropped before the
+  transaction began is skipped.
+  ``iter_series`` does the same one series at a time for columnar exports,
+  and ``backfill_series`` writes imported history (see ``columnar.py``).
+- Debug: check `metrics.db` (path from config) and inspect the `metrics`
+  view, which joins the tables back into the old row shape.
 """
 
 import json
 import sqlite3
 import asyncio
+import time
+from concurrent.futures import Future
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import AsyncIterator, Dict, Any, Iterator, List, Optional, Tuple, Union
+
+from . import partitions, rollup
+from .downsample import downsample_rows
+from .worker import DEFAULT_READERS, ReadPool, SQLiteWriter
+
+
+_INSERT_SAMPLE = 'INSERT OR REPLACE INTO {table} (series_id, ts, value) VALUES (?, ?, ?)'
+
+# Rows copied per migration step; small enough to keep each step in the low milliseconds
+_MIGRATION_BATCH = 5000
+
+# Failed flushes whose rows are kept for the next attempt (in flush_rows units)
+_MAX_UNWRITTEN_FLUSHES = 10
+
+# Alert transitions kept for the next attempt after a failed flush
+_MAX_UNWRITTEN_ALERTS = 10000
+
+# How often the background job folds new raw samples into the rollup tables
+_ROLLUP_INTERVAL_SECONDS = 60
+
+# How often expired day partitions are looked for
+_RETENTION_INTERVAL_SECONDS = 3600
+
+# Rows per chunk when streaming exports
+_EXPORT_CHUNK_ROWS = 5000
+
+# Per-device disk values stored as series (see collectors/disk.py)
+_DISK_SERIES = ('read_bytes_per_sec', 'write_bytes_per_sec', 'read_iops', 'write_iops',
+                'read_latency_ms', 'write_latency_ms', 'util_percent')
+
+# Source rows fetched per displayed point before downsampling, so LTTB/min-max
+# have detail to choose from without reading the whole raw range
+_DOWNSAMPLE_OVERSAMPLE = 4
+
+
+def _to_epoch_ms(timestamp: Union[str, datetime, int, float, None]) -> int:
+    """Convert an ISO-8601 string / datetime / epoch seconds to epoch milliseconds."""
+    if timestamp is None:
+        return int(time.time() * 1000)
+    if isinstance(timestamp, datetime):
+        return int(timestamp.timestamp() * 1000)
+    if isinstance(timestamp, (int, float)):
+        return int(timestamp * 1000)
+    return int(datetime.fromisoformat(timestamp).timestamp() * 1000)
+
+
+def _iso(ts_ms: int) -> str:
+    """Render epoch milliseconds as the local ISO-8601 text the API has always returned."""
+    return datetime.fromtimestamp(ts_ms / 1000).isoformat()
 
 
 class MetricsStorage:
-    """SQLite-based metrics storage."""
+    """SQLite-based metrics storage with a write-behind buffer."""
     
-    def __init__(self, db_path: str = './metrics.db'):
+    def __init__(self, db_path: str = './metrics.db', flush_interval: float = 10.0,
+                 flush_rows: int = 5000, sample_interval: float = 5.0,
+                 retention_hours: Optional[float] = None, read_connections: int = DEFAULT_READERS):
         self.db_path = Path(db_path)
+        # owned by the writer thread once initialize() has run
         self.conn = None
+        self.read_connections = max(1, int(read_connections))
+        self._writer: Optional[SQLiteWriter] = None
+        self._readers: Optional[ReadPool] = None
+        self._opening = None
+        self.flush_interval = float(flush_interval)
+        self.flush_rows = max(1, int(flush_rows))
+        # expected spacing of raw samples, used to estimate raw point counts
+        self.sample_interval = max(0.001, float(sample_interval))
+        # None keeps raw samples forever
+        self.retention_hours = float(retention_hours) if retention_hours else None
+        self._partitions: Optional[partitions.PartitionSet] = None
+        self._pending: List[tuple] = []
+        self._pending_alerts: List[Dict[str, Any]] = []
+        # writer thread: a failed batch, written ahead of the next one
+        self._unwritten: List[tuple] = []
+        self._unwritten_alerts: List[Dict[str, Any]] = []
+        self._last_flush = time.monotonic()
+        self._host_ids: Dict[str, int] = {}
+        self._series_ids: Dict[Tuple[str, str, str], int] = {}
+        self._migration_task: Optional[asyncio.Task] = None
+        self._rollup_task: Optional[asyncio.Task] = None
+        self._retention_task: Optional[asyncio.Task] = None
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'MetricsStorage':
+        storage_config = config.get('storage', {}) or {}
+        monitoring = config.get('monitoring', {}) or {}
+        return cls(
+            storage_config.get('path', './metrics.db'),
+            flush_interval=storage_config.get('flush_interval_seconds', 10.0),
+            flush_rows=storage_config.get('flush_max_rows', 5000),
+            sample_interval=monitoring.get('interval_seconds', 5),
+            retention_hours=monitoring.get('history_retention_hours'),
+            read_connections=storage_config.get('read_connections', DEFAULT_READERS),
+        )
     
     async def initialize(self):
+        if self._opening is not None:
+            # another coroutine is already opening the database
+            await asyncio.wrap_future(self._opening)
+            return
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
+        self._writer = SQLiteWriter()
+        # read connections open lazily, after the schema exists
+        self._readers = ReadPool(self.db_path, self.read_connections)
+        self._opening = self._writer.submit(self._open)
+        try:
+            legacy_pending = await asyncio.wrap_future(self._opening)
+        except BaseException:
+            self.conn = None
+            self._readers.close()
+            self._readers = None
+            self._writer.stop()
+            self._writer = None
+            self._opening = None
+            raise
+        
+        if legacy_pending:
+            try:
+                self._migration_task = asyncio.get_running_loop().create_task(self._migrate_legacy())
+            except RuntimeError:
+                # No running loop: migrate synchronously
+                while self._writer.call(self._migrate_legacy_step):
+                    pass
+        
+        try:
+            loop = asyncio.get_running_loop()
+            self._rollup_task = loop.create_task(self._rollup_loop())
+            if self.retention_hours:
+                self._retention_task = loop.create_task(self._retention_loop())
+        except RuntimeError:
+            # No running loop: callers drive rollup() and drop_expired() themselves
+            pass
+    
+    def _open(self) -> bool:
+        """Open the write connection and create the schema (writer thread); True if a legacy migration is due."""
         self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
         self.conn.row_factory = sqlite3.Row
+        # WAL lets readers proceed during a flush; NORMAL only fsyncs at checkpoints
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        
+        legacy_pending = self._prepare_legacy_migration()
         
         self.conn.executescript('''
-            CREATE TABLE IF NOT EXISTS metrics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT NOT NULL,
-                hostname TEXT NOT NULL,
+            CREATE TABLE IF NOT EXISTS hosts (
+                id INTEGER PRIMARY KEY,
+                hostname TEXT NOT NULL UNIQUE
+            );
+            
+            CREATE TABLE IF NOT EXISTS series (
+                id INTEGER PRIMARY KEY,
+                host_id INTEGER NOT NULL REFERENCES hosts(id),
                 metric_type TEXT NOT NULL,
                 metric_name TEXT NOT NULL,
-                metric_value REAL,
-                metric_json TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                UNIQUE (host_id, metric_type, metric_name)
             );
             
-            CREATE INDEX IF NOT EXISTS idx_metrics_timestamp ON metrics(timestamp);
-            CREATE INDEX IF NOT EXISTS idx_metrics_hostname ON metrics(hostname);
-            CREATE INDEX IF NOT EXISTS idx_metrics_type ON metrics(metric_type);
+            CREATE INDEX IF NOT EXISTS idx_series_name ON series(metric_name);
+        ''')
+        # Day partitions and the ``samples`` view over them; adopts an unpartitioned table
+        self._partitions = partitions.PartitionSet(self.conn)
+        self._partitions.load()
+        
+        self.conn.executescript('''
+            CREATE VIEW IF NOT EXISTS metrics AS
+                SELECT s.ts AS ts,
+                       strftime('%Y-%m-%dT%H:%M:%f', s.ts / 1000.0, 'unixepoch', 'localtime') AS timestamp,
+                       h.hostname AS hostname,
+                       se.metric_type AS metric_type,
+                       se.metric_name AS metric_name,
+                       s.value AS metric_value
+                FROM samples s
+                JOIN series se ON se.id = s.series_id
+                JOIN hosts h ON h.id = se.host_id;
             
             CREATE TABLE IF NOT EXISTS alerts (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -54,73 +248,570 @@ class MetricsStorage:
             );
             
             CREATE INDEX IF NOT EXISTS idx_alerts_timestamp ON alerts(timestamp);
-        ''')
+        ''' + rollup.SCHEMA)
+        self._prepare_alert_lifecycle()
         self.conn.commit()
+        return legacy_pending
+    
+    async def _rollup_loop(self):
+        try:
+            if self._migration_task is not None:
+                # aggregating a half-migrated history would only be redone
+                await asyncio.shield(self._migration_task)
+            while self.conn:
+                # catching up on a backlog: flushes queue up between chunks
+                while self.conn and await self._writer.run(self._rollup_step):
+                    pass
+                await asyncio.sleep(_ROLLUP_INTERVAL_SECONDS)
+        except asyncio.CancelledError:
+            pass
+    
+    def _rollup_step(self) -> bool:
+        # Leave room for rows still sitting in the write buffer
+        lag_ms = int((self.flush_interval + self.sample_interval) * 1000)
+        try:
+            return rollup.rollup_step(self.conn, self._partitions, int(time.time() * 1000), lag_ms)
+        except sqlite3.Error:
+            return False
+    
+    async def _retention_loop(self):
+        try:
+            while self.conn:
+                try:
+                    await self._writer.run(self._drop_expired, self.retention_hours)
+                except sqlite3.Error:
+                    pass
+                await asyncio.sleep(_RETENTION_INTERVAL_SECONDS)
+        except asyncio.CancelledError:
+            pass
+    
+    def drop_expired(self, retention_hours: Optional[float] = None) -> List[str]:
+        """Drop day partitions entirely older than the retention window; returns their names.
+        
+        Blocks until the writer thread has done it.
+        """
+        hours = retention_hours if retention_hours is not None else self.retention_hours
+        if not self.conn or not hours:
+            return []
+        return self._writer.call(self._drop_expired, hours)
+    
+    def _drop_expired(self, hours: Optional[float]) -> List[str]:
+        if not self.conn or not hours:
+            return []
+        cutoff = _to_epoch_ms(datetime.now() - timedelta(hours=hours))
+        return self._partitions.drop_before(cutoff)
+    
+    def rollup(self):
+        """Bring every rollup level up to date (the background job does this every minute).
+        
+        Blocks until the writer thread is done.
+        """
+        if not self.conn:
+            return
+        self.flush().result()
+        while self._writer.call(self._rollup_step):
+            pass
+    
+    def _prepare_alert_lifecycle(self):
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(alerts)')}
+        if 'fingerprint' not in columns:
+            self.conn.execute('ALTER TABLE alerts ADD COLUMN fingerprint TEXT')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_alerts_fingerprint ON alerts(fingerprint, resolved_at)')
+        # Alerts still open from a previous run are re-fired if the condition persists
+        self.conn.execute('''
+            UPDATE alerts SET resolved_at = ?
+            WHERE resolved_at IS NULL AND fingerprint IS NOT NULL
+        ''', (datetime.now().isoformat(),))
+    
+    def _prepare_legacy_migration(self) -> bool:
+        """Move a pre-normalization ``metrics`` table aside; True if rows remain to migrate."""
+        row = self.conn.execute(
+            "SELECT type FROM sqlite_master WHERE name = 'metrics'"
+        ).fetchone()
+        if row and row[0] == 'table':
+            with self.conn:
+                for index in ('idx_metrics_timestamp', 'idx_metrics_hostname', 'idx_metrics_type'):
+                    self.conn.execute(f'DROP INDEX IF EXISTS {index}')
+                self.conn.execute('ALTER TABLE metrics RENAME TO metrics_legacy')
+        
+        return self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'metrics_legacy'"
+        ).fetchone() is not None
+    
+    async def _migrate_legacy(self):
+        try:
+            while self.conn and await self._writer.run(self._migrate_legacy_step):
+                # leave the writer to flushes between chunks
+                await asyncio.sleep(0.01)
+        except asyncio.CancelledError:
+            pass
+        except sqlite3.Error:
+            pass
+    
+    def _migrate_legacy_step(self, batch: int = _MIGRATION_BATCH) -> bool:
+        """Copy the newest ``batch`` legacy rows; returns False once the legacy table is gone."""
+        rows = self.conn.execute('''
+            SELECT id, timestamp, hostname, metric_type, metric_name, metric_value
+            FROM metrics_legacy ORDER BY id DESC LIMIT ?
+        ''', (batch,)).fetchall()
+        
+        if not rows:
+            with self.conn:
+                self.conn.execute('DROP TABLE IF EXISTS metrics_legacy')
+            return False
+        
+        try:
+            with self.conn:
+                samples: Dict[str, List[tuple]] = {}
+                oldest = None
+                for row in rows:
+                    try:
+                        ts = _to_epoch_ms(row['timestamp'])
+                    except (TypeError, ValueError):
+                        continue
+                    sid = self._series_id(row['hostname'], row['metric_type'], row['metric_name'])
+                    samples.setdefault(self._partitions.table_for(ts), []).append((sid, ts, row['metric_value']))
+                    oldest = ts if oldest is None else min(oldest, ts)
+                # never overwrite samples written since the upgrade
+                for table, table_rows in samples.items():
+                    self.conn.executemany(
+                        f'INSERT OR IGNORE INTO {table} (series_id, ts, value) VALUES (?, ?, ?)', table_rows)
+                self.conn.execute('DELETE FROM metrics_legacy WHERE id >= ?', (rows[-1]['id'],))
+                if oldest is not None:
+                    # levels built before this chunk arrived must cover it too
+                    rollup.rewind(self.conn, oldest)
+        except sqlite3.Error:
+            self._forget_ids()
+            raise
+        self._partitions.publish()
+        return True
+    
+    def _host_id(self, hostname: str) -> int:
+        host_id = self._host_ids.get(hostname)
+        if host_id is None:
+            self.conn.execute('INSERT OR IGNORE INTO hosts (hostname) VALUES (?)', (hostname,))
+            host_id = self.conn.execute(
+                'SELECT id FROM hosts WHERE hostname = ?', (hostname,)).fetchone()[0]
+            self._host_ids[hostname] = host_id
+        return host_id
+    
+    def _series_id(self, hostname: str, metric_type: str, metric_name: str) -> int:
+        key = (hostname, metric_type, metric_name)
+        series_id = self._series_ids.get(key)
+        if series_id is None:
+            host_id = self._host_id(hostname)
+            self.conn.execute(
+                'INSERT OR IGNORE INTO series (host_id, metric_type, metric_name) VALUES (?, ?, ?)',
+                (host_id, metric_type, metric_name))
+            series_id = self.conn.execute(
+                'SELECT id FROM series WHERE host_id = ? AND metric_type = ? AND metric_name = ?',
+                (host_id, metric_type, metric_name)).fetchone()[0]
+            self._series_ids[key] = series_id
+        return series_id
+    
+    def _forget_ids(self):
+        # ids assigned and partitions created inside a rolled-back transaction are no longer valid
+        self._host_ids.clear()
+        self._series_ids.clear()
+        self._partitions.discard_unpublished()
     
     async def store(self, metrics: Dict[str, Any]):
+        """Buffer one snapshot; flushes when the interval or row budget is hit."""
         if not self.conn:
             await self.initialize()
         
-        timestamp = metrics.get('timestamp', datetime.now().isoformat())
+        self._pending.extend(self._metric_rows(metrics))
+        
+        if (len(self._pending) >= self.flush_rows
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            await asyncio.wrap_future(self.flush())
+    
+    def queue_alert_transitions(self, transitions: List[Dict[str, Any]]):
+        """Buffer alert lifecycle transitions; the next ``flush()`` writes them."""
+        self._pending_alerts.extend(transitions)
+    
+    def flush(self) -> Future:
+        """Hand all buffered rows and alert transitions to the writer thread.
+        
+        They are written in a single transaction. Returns a future that
+        completes once they are committed: ``await asyncio.wrap_future(...)``
+        it from a coroutine, or call ``.result()`` from plain code. Any job
+        submitted afterwards sees the rows.
+        """
+        self._last_flush = time.monotonic()
+        retry = self._unwritten or self._unwritten_alerts
+        if not (self._pending or self._pending_alerts or retry) or not self.conn:
+            done: Future = Future()
+            done.set_result(None)
+            return done
+        rows, self._pending = self._pending, []
+        transitions, self._pending_alerts = self._pending_alerts, []
+        return self._writer.submit(self._write_rows, rows, transitions)
+    
+    async def _flushed(self):
+        await asyncio.wrap_future(self.flush())
+    
+    def _write_rows(self, rows: List[tuple], transitions: List[Dict[str, Any]]):
+        if self._unwritten or self._unwritten_alerts:
+            rows = self._unwritten + rows
+            transitions = self._unwritten_alerts + transitions
+            self._unwritten, self._unwritten_alerts = [], []
+        try:
+            with self.conn:
+                by_table: Dict[str, List[tuple]] = {}
+                for ts, hostname, metric_type, metric_name, value in rows:
+                    by_table.setdefault(self._partitions.table_for(ts), []).append(
+                        (self._series_id(hostname, metric_type, metric_name), ts, value))
+                for table, table_rows in by_table.items():
+                    self.conn.executemany(_INSERT_SAMPLE.format(table=table), table_rows)
+                for t in transitions:
+                    if t['state'] == 'firing':
+                        self.conn.execute('''
+                            INSERT INTO alerts (timestamp, hostname, alert_name, severity, message, fingerprint)
+                            VALUES (?, ?, ?, ?, ?, ?)
+                        ''', (t['timestamp'], t['hostname'], t['name'], t['severity'],
+                              t['message'], t['fingerprint']))
+                    elif t['state'] == 'resolved':
+                        self.conn.execute('''
+                            UPDATE alerts SET resolved_at = ?
+                            WHERE fingerprint = ? AND resolved_at IS NULL
+                        ''', (t['resolved_at'], t['fingerprint']))
+        except sqlite3.Error as e:
+            self._forget_ids()
+            if isinstance(e, sqlite3.OperationalError):
+                # locked, busy, I/O or disk full: retried by the next flush;
+                # if failures persist the oldest rows go first
+                self._unwritten = rows[-self.flush_rows * _MAX_UNWRITTEN_FLUSHES:]
+                self._unwritten_alerts = transitions[-_MAX_UNWRITTEN_ALERTS:]
+            raise
+        self._partitions.publish()
+    
+    @staticmethod
+    def _metric_rows(metrics: Dict[str, Any]) -> List[tuple]:
+        """Flatten a snapshot into ``(ts_ms, hostname, type, name, value)`` tuples."""
+        ts = _to_epoch_ms(metrics.get('timestamp'))
         hostname = metrics.get('hostname', 'unknown')
+        rows = []
         
         for gpu in metrics.get('gpus', []):
             if 'error' in gpu:
                 continue
-                
-            self._insert_metric(timestamp, hostname, 'gpu', f"gpu_{gpu['index']}_utilization", gpu.get('utilization', 0))
-            self._insert_metric(timestamp, hostname, 'gpu', f"gpu_{gpu['index']}_memory_used", gpu.get('memory_used', 0))
-            self._insert_metric(timestamp, hostname, 'gpu', f"gpu_{gpu['index']}_temperature", gpu.get('temperature', 0))
-            self._insert_metric(timestamp, hostname, 'gpu', f"gpu_{gpu['index']}_power", gpu.get('power', 0))
+            prefix = f"gpu_{gpu['index']}"
+            rows.append((ts, hostname, 'gpu', f'{prefix}_utilization', gpu.get('utilization', 0)))
+            rows.append((ts, hostname, 'gpu', f'{prefix}_memory_used', gpu.get('memory_used', 0)))
+            rows.append((ts, hostname, 'gpu', f'{prefix}_temperature', gpu.get('temperature', 0)))
+            rows.append((ts, hostname, 'gpu', f'{prefix}_power', gpu.get('power', 0)))
         
         sys_metrics = metrics.get('system', {})
-        self._insert_metric(timestamp, hostname, 'system', 'cpu_percent', sys_metrics.get('cpu_percent', 0))
-        self._insert_metric(timestamp, hostname, 'system', 'memory_percent', sys_metrics.get('memory_percent', 0))
-        self._insert_metric(timestamp, hostname, 'system', 'disk_percent', sys_metrics.get('disk_percent', 0))
+        rows.append((ts, hostname, 'system', 'cpu_percent', sys_metrics.get('cpu_percent', 0)))
+        rows.append((ts, hostname, 'system', 'memory_percent', sys_metrics.get('memory_percent', 0)))
+        rows.append((ts, hostname, 'system', 'disk_percent', sys_metrics.get('disk_percent', 0)))
         
-        self.conn.commit()
-    
-    def _insert_metric(self, timestamp: str, hostname: str, metric_type: str, 
-                       metric_name: str, metric_value: float):
-        self.conn.execute('''
-            INSERT INTO metrics (timestamp, hostname, metric_type, metric_name, metric_value)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (timestamp, hostname, metric_type, metric_name, metric_value))
+        # Only interfaces past their first sample carry rates
+        for iface in (metrics.get('network') or {}).get('interfaces', []):
+            name = iface.get('name')
+            if not name:
+                continue
+            for key, value in iface.items():
+                if key.endswith('_per_sec'):
+                    rows.append((ts, hostname, 'network', f'net_{name}_{key}', value))
+        
+        disk = metrics.get('disk') or {}
+        for device in disk.get('devices', []):
+            for key in _DISK_SERIES:
+                if key in device:
+                    rows.append((ts, hostname, 'disk', f"disk_{device['name']}_{key}", device[key]))
+        for mount in disk.get('mounts', []):
+            if 'percent' in mount:
+                rows.append((ts, hostname, 'disk', f"mount_{mount['name']}_percent", mount['percent']))
+                rows.append((ts, hostname, 'disk', f"mount_{mount['name']}_free_gb", mount['free_gb']))
+        
+        return rows
     
     async def query(self, hostname: Optional[str] = None, metric_type: Optional[str] = None,
-                    metric_name: Optional[str] = None, hours: int = 24) -> List[Dict[str, Any]]:
+                    metric_name: Optional[str] = None, hours: int = 24,
+                    max_points: Optional[int] = None, points: Optional[int] = None,
+                    downsample: str = 'lttb') -> List[Dict[str, Any]]:
+        """Return samples newer than ``hours`` ago, newest first.
+        
+        Without ``max_points`` raw rows are returned (capped as before). With a
+        point budget the range is served from the finest resolution that fits
+        it: raw samples, or a rollup level whose rows also carry min/max/count.
+        ``points`` additionally reduces each series to that many points with
+        ``downsample`` ('lttb' or 'minmax', see ``downsample.py``).
+        """
         if not self.conn:
             await self.initialize()
+        await self._flushed()
         
-        since = (datetime.now() - timedelta(hours=hours)).isoformat()
+        if points is not None:
+            points = max(1, int(points))
+            if max_points is None:
+                max_points = points * _DOWNSAMPLE_OVERSAMPLE
+            rows = await self.query(hostname, metric_type, metric_name, hours, max_points=max_points)
+            return downsample_rows(rows, points, downsample)
         
-        query = 'SELECT * FROM metrics WHERE timestamp > ?'
-        params = [since]
+        return await self._readers.run(self._query, hostname, metric_type, metric_name, hours, max_points)
+    
+    def _query(self, conn: sqlite3.Connection, hostname: Optional[str], metric_type: Optional[str],
+               metric_name: Optional[str], hours: int, max_points: Optional[int]) -> List[Dict[str, Any]]:
+        now = int(time.time() * 1000)
+        since = _to_epoch_ms(datetime.now() - timedelta(hours=hours))
+        filters, params = self._series_filters(hostname, metric_type, metric_name)
+        
+        if max_points is not None:
+            earliest = self._earliest(conn, filters, params)
+            if earliest is None:
+                return []
+            span = now - max(since, earliest)
+            plan = rollup.plan_resolution(span, int(self.sample_interval * 1000), max_points)
+            if plan is not None:
+                return self._query_rollup(conn, plan, since, filters, params)
+        
+        # Resolve the (tiny) series dictionary first, then seek samples by primary key,
+        # one arm per day partition in range
+        tables = self._partitions.covering(since)
+        if not tables:
+            return []
+        query = partitions.union(f'''
+            SELECT s.ts AS ts, h.hostname AS hostname, se.metric_type AS metric_type,
+                   se.metric_name AS metric_name, s.value AS metric_value
+            FROM series se
+            JOIN hosts h ON h.id = se.host_id
+            CROSS JOIN {{samples}} s
+            WHERE s.series_id = se.id AND s.ts > ?{filters}
+        ''', tables) + ' ORDER BY ts DESC'
+        if max_points is None:
+            query += ' LIMIT 5000' if hours > 1000 else ' LIMIT 1000'
+        
+        cursor = conn.execute(query, ([since] + params) * len(tables))
+        results = []
+        for row in cursor.fetchall():
+            item = dict(row)
+            item['timestamp'] = _iso(item['ts'])
+            results.append(item)
+        return results
+    
+    async def iter_rows(self, hours: Optional[float] = None, hostname: Optional[str] = None,
+                        metric_type: Optional[str] = None, metric_name: Optional[str] = None,
+                        chunk_rows: int = _EXPORT_CHUNK_ROWS) -> AsyncIterator[List[tuple]]:
+        """Yield raw samples as lists of ``(ts, hostname, metric_type, metric_name, value)``.
+        
+        Covers the last ``hours`` (everything when None), day partition by
+        day partition, oldest first. Within a day rows come in the order the
+        primary-key seeks produce them (series by series, in time order); no
+        sort is requested, so nothing is materialized.
+        """
+        if not self.conn:
+            await self.initialize()
+        await self._flushed()
+        
+        since = _to_epoch_ms(datetime.now() - timedelta(hours=hours)) if hours else 0
+        filters, params = self._series_filters(hostname, metric_type, metric_name)
+        
+        conn = await asyncio.to_thread(self._read_connection)
+        try:
+            tables = await asyncio.to_thread(self._snapshot_partitions, conn, since)
+            for table in tables:
+                cursor = await asyncio.to_thread(conn.execute, f'''
+                    SELECT s.ts, h.hostname, se.metric_type, se.metric_name, s.value
+                    FROM series se
+                    JOIN hosts h ON h.id = se.host_id
+                    CROSS JOIN {table} s
+                    WHERE s.series_id = se.id AND s.ts > ?{filters}
+                ''', [since] + params)
+                while True:
+                    rows = await asyncio.to_thread(cursor.fetchmany, chunk_rows)
+                    if not rows:
+                        break
+                    yield rows
+        finally:
+            conn.close()
+    
+    def iter_series(self, hours: Optional[float] = None, hostname: Optional[str] = None,
+                    metric_type: Optional[str] = None, metric_name: Optional[str] = None
+                    ) -> Iterator[Tuple[str, str, str, List[int], List[float]]]:
+        """Yield ``(hostname, metric_type, metric_name, ts, values)`` per series, in time order.
+        
+        Blocking; meant to run on a worker thread. Reads through its own
+        read-only connection in one read transaction, holding one series
+        in memory at a time.
+        """
+        since = _to_epoch_ms(datetime.now() - timedelta(hours=hours)) if hours else 0
+        filters, params = self._series_filters(hostname, metric_type, metric_name)
+        conn = self._read_connection()
+        try:
+            tables = self._snapshot_partitions(conn, since)
+            series = conn.execute(f'''
+                SELECT se.id, h.hostname, se.metric_type, se.metric_name
+                FROM series se JOIN hosts h ON h.id = se.host_id
+                WHERE 1 = 1{filters}
+                ORDER BY h.hostname, se.metric_type, se.metric_name
+            ''', params).fetchall()
+            for series_id, host, mtype, mname in series:
+                ts: List[int] = []
+                values: List[float] = []
+                for table in tables:
+                    for t, v in conn.execute(
+                            f'SELECT ts, value FROM {table} WHERE series_id = ? AND ts > ? ORDER BY ts',
+                            (series_id, since)):
+                        ts.append(t)
+                        values.append(v)
+                if ts:
+                    yield host, mtype, mname, ts, values
+        finally:
+            conn.close()
+    
+    async def backfill_series(self, hostname: str, metric_type: str, metric_name: str,
+                              ts: List[int], values: List[float], batch: int = _MIGRATION_BATCH) -> int:
+        """Insert imported samples of one series; existing samples win. Returns rows offered.
+        
+        Written in ``batch``-row transactions, one writer job each, so
+        flushes interleave with the import as with the legacy migration.
+        Rollup levels are rewound to the oldest imported sample so the
+        background job re-aggregates that range.
+        """
+        if not self.conn:
+            await self.initialize()
+        if not ts:
+            return 0
+        await self._flushed()
+        for start in range(0, len(ts), batch):
+            await self._writer.run(self._backfill_batch, hostname, metric_type, metric_name,
+                                   ts[start:start + batch], values[start:start + batch])
+        await self._writer.run(self._rewind, min(ts))
+        return len(ts)
+    
+    def _backfill_batch(self, hostname: str, metric_type: str, metric_name: str,
+                        ts: List[int], values: List[float]):
+        try:
+            with self.conn:
+                series_id = self._series_id(hostname, metric_type, metric_name)
+                by_table: Dict[str, List[tuple]] = {}
+                for t, v in zip(ts, values):
+                    by_table.setdefault(self._partitions.table_for(t), []).append((series_id, t, v))
+                for table, table_rows in by_table.items():
+                    self.conn.executemany(
+                        f'INSERT OR IGNORE INTO {table} (series_id, ts, value) VALUES (?, ?, ?)', table_rows)
+        except sqlite3.Error:
+            self._forget_ids()
+            raise
+        self._partitions.publish()
+    
+    def _rewind(self, ts_ms: int):
+        with self.conn:
+            rollup.rewind(self.conn, ts_ms)
+    
+    def _snapshot_partitions(self, conn: sqlite3.Connection, since: int) -> List[str]:
+        """Open a read transaction on ``conn`` and list the partitions covering ``since`` in it.
+        
+        The schema is read inside the transaction, so every table returned
+        stays readable until it ends, even if retention drops it meanwhile.
+        """
+        conn.execute('BEGIN')
+        existing = {name for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB 'samples_*'")}
+        return [table for table in self._partitions.covering(since) if table in existing]
+    
+    def _read_connection(self) -> sqlite3.Connection:
+        uri = self.db_path.resolve().as_uri() + '?mode=ro'
+        # isolation_level=None: the explicit BEGIN above is the only transaction
+        return sqlite3.connect(uri, uri=True, isolation_level=None, check_same_thread=False)
+    
+    @staticmethod
+    def _series_filters(hostname: Optional[str], metric_type: Optional[str],
+                        metric_name: Optional[str]) -> Tuple[str, List[Any]]:
+        filters = ''
+        params: List[Any] = []
         
         if hostname:
-            query += ' AND hostname = ?'
+            filters += ' AND h.hostname = ?'
             params.append(hostname)
         
         if metric_type:
-            query += ' AND metric_type = ?'
+            filters += ' AND se.metric_type = ?'
             params.append(metric_type)
         
         if metric_name:
-            query += ' AND metric_name = ?'
+            filters += ' AND se.metric_name = ?'
             params.append(metric_name)
         
-        if hours > 1000:
-             query += ' ORDER BY timestamp DESC LIMIT 5000'
-        else:
-             query += ' ORDER BY timestamp DESC LIMIT 1000'
+        return filters, params
+    
+    def _earliest(self, conn: sqlite3.Connection, filters: str, params: List[Any]) -> Optional[int]:
+        """Oldest timestamp held for the matching series, in raw or hourly data."""
+        coarsest = rollup.table_for(rollup.RESOLUTIONS[-1][0])
+        raw = partitions.union('SELECT MIN(ts) AS ts FROM {samples} WHERE series_id = se.id',
+                               self._partitions.all())
+        row = conn.execute(f'''
+            SELECT MIN(
+                MIN((SELECT MIN(ts) FROM ({raw}))),
+                COALESCE(MIN((SELECT MIN(bucket) FROM {coarsest} WHERE series_id = se.id)), 1e18)
+            )
+            FROM series se JOIN hosts h ON h.id = se.host_id
+            WHERE 1 = 1{filters}
+        ''', params).fetchone()
+        if not row or row[0] is None or row[0] >= 1e18:
+            return None
+        return int(row[0])
+    
+    def _query_rollup(self, conn: sqlite3.Connection, plan: Tuple[str, int], since: int, filters: str,
+                      params: List[Any]) -> List[Dict[str, Any]]:
+        name, step = plan
+        table = rollup.table_for(name)
+        watermark = rollup.watermarks(conn).get(name) or 0
+        start = (since // step) * step
+        tail_start = max(start, watermark)
         
-        cursor = self.conn.execute(query, params)
-        return [dict(row) for row in cursor.fetchall()]
+        # Completed buckets come from the rollup table; the not-yet-rolled-up
+        # tail is aggregated on the fly from raw samples (at most one step or so),
+        # per day partition and then merged.
+        tables = self._partitions.covering(tail_start)
+        tail = ''
+        if tables:
+            arms = partitions.union(f'''
+                SELECT se.id AS series_id, (s.ts / {step}) * {step} AS ts, MIN(s.value) AS min,
+                       MAX(s.value) AS max, SUM(s.value) AS sum, COUNT(s.value) AS count
+                FROM series se
+                JOIN hosts h ON h.id = se.host_id
+                CROSS JOIN {{samples}} s
+                WHERE s.series_id = se.id AND s.ts >= ?{filters}
+                GROUP BY se.id, 2
+            ''', tables)
+            tail = f'''
+            UNION ALL
+            SELECT t.ts, h.hostname, se.metric_type, se.metric_name,
+                   SUM(t.sum) / SUM(t.count), MIN(t.min), MAX(t.max), SUM(t.count)
+            FROM ({arms}) t
+            JOIN series se ON se.id = t.series_id
+            JOIN hosts h ON h.id = se.host_id
+            GROUP BY t.series_id, t.ts
+            '''
+        cursor = conn.execute(f'''
+            SELECT r.bucket AS ts, h.hostname AS hostname, se.metric_type AS metric_type,
+                   se.metric_name AS metric_name, r.sum / r.count AS metric_value,
+                   r.min AS min, r.max AS max, r.count AS count
+            FROM series se
+            JOIN hosts h ON h.id = se.host_id
+            CROSS JOIN {table} r
+            WHERE r.series_id = se.id AND r.bucket >= ? AND r.bucket < ?{filters}{tail}
+            ORDER BY ts DESC
+        ''', [start, watermark] + params + ([tail_start] + params) * len(tables))
+        
+        results = []
+        for row in cursor.fetchall():
+            item = dict(row)
+            item['timestamp'] = _iso(item['ts'])
+            item['resolution'] = name
+            results.append(item)
+        return results
     
     async def store_alert(self, alert: Dict[str, Any]):
         if not self.conn:
             await self.initialize()
-        
+        await self._writer.run(self._insert_alert, alert)
+    
+    def _insert_alert(self, alert: Dict[str, Any]):
         self.conn.execute('''
             INSERT INTO alerts (timestamp, hostname, alert_name, severity, message)
             VALUES (?, ?, ?, ?, ?)
@@ -136,8 +827,12 @@ class MetricsStorage:
     async def get_active_alerts(self) -> List[Dict[str, Any]]:
         if not self.conn:
             await self.initialize()
-        
-        cursor = self.conn.execute('''
+        await self._flushed()
+        return await self._readers.run(self._active_alerts)
+    
+    @staticmethod
+    def _active_alerts(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+        cursor = conn.execute('''
             SELECT * FROM alerts WHERE resolved_at IS NULL ORDER BY timestamp DESC
         ''')
         return [dict(row) for row in cursor.fetchall()]
@@ -145,13 +840,32 @@ class MetricsStorage:
     async def cleanup_old_data(self, retention_hours: int = 168):
         if not self.conn:
             return
+        await self._flushed()
         
-        cutoff = (datetime.now() - timedelta(hours=retention_hours)).isoformat()
-        
-        self.conn.execute('DELETE FROM metrics WHERE timestamp < ?', (cutoff,))
-        self.conn.commit()
+        # whole day partitions only; the background job does this every hour
+        await self._writer.run(self._drop_expired, retention_hours)
     
     def close(self):
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+        for task in (self._migration_task, self._rollup_task, self._retention_task):
+            if task:
+                task.cancel()
+        self._migration_task = None
+        self._rollup_task = None
+        self._retention_task = None
+        if self._readers:
+            self._readers.close()
+            self._readers = None
+        if self._writer:
+            if self.conn:
+                try:
+                    self.flush().result()
+                except sqlite3.Error:
+                    pass
+                self._writer.call(self._close_connection)
+            self._writer.stop()
+            self._writer = None
+            self._opening = None
+    
+    def _close_connection(self):
+        self.conn.close()
+        self.conn = None
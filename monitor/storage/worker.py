@@ -0,0 +1,119 @@
+"""Threads that own the SQLite connections of ``MetricsStorage``.
+
+Maintenance:
+- Purpose: keep every blocking ``sqlite3`` call off the event loop. A
+  commit that waits on fsync or a checkpoint must never stall requests.
+- ``SQLiteWriter``: one daemon thread that owns the read-write connection
+  and runs submitted callables one at a time, in order. Everything that
+  writes (flushes, rollups, retention, migration, backfill) goes through
+  it, so writes never contend for the SQLite write lock among themselves
+  and the per-connection id caches need no locking. Jobs are FIFO: a job
+  submitted after a flush sees the flushed rows.
+- ``ReadPool``: a few worker threads, each with its own read-only
+  connection (opened lazily, ``mode=ro``). Under WAL readers neither block
+  nor are blocked by the writer. Callables receive the thread's connection
+  as their first argument.
+- Both hand back ``concurrent.futures.Future``s; async callers await them
+  through ``asyncio.wrap_future``, sync callers (scripts, ``close()``) call
+  ``.result()``.
+- Debug: ``SQLiteWriter.pending`` is the number of queued jobs; a value
+  that keeps growing means the disk cannot keep up with the write load.
+"""
+
+import asyncio
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, List, Optional
+
+# Read connections (and reader threads) per database
+DEFAULT_READERS = 4
+
+
+class SQLiteWriter:
+    """A single thread that runs database jobs in submission order."""
+
+    def __init__(self, name: str = 'sqlite-writer'):
+        self._queue: 'queue.Queue[Optional[tuple]]' = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, fn: Callable, *args) -> Future:
+        future: Future = Future()
+        self._queue.put((fn, args, future))
+        return future
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run ``fn(*args)`` on the writer thread and await its result."""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def call(self, fn: Callable, *args) -> Any:
+        """Run ``fn(*args)`` on the writer thread and block until it is done."""
+        if threading.current_thread() is self._thread:
+            return fn(*args)
+        return self.submit(fn, *args).result()
+
+    def stop(self):
+        """Finish the queued jobs, then end the thread."""
+        self._queue.put(None)
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            fn, args, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+
+class ReadPool:
+    """Worker threads with one read-only connection each."""
+
+    def __init__(self, db_path: Path, size: int = DEFAULT_READERS):
+        self._uri = Path(db_path).resolve().as_uri() + '?mode=ro'
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(size)),
+                                            thread_name_prefix='sqlite-reader')
+        self._local = threading.local()
+        self._conns: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # check_same_thread=False only so close() can close it from another thread
+            conn = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+            with self._lock:
+                self._conns.append(conn)
+        return conn
+
+    def _call(self, fn: Callable, args: tuple) -> Any:
+        return fn(self._connection(), *args)
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run ``fn(conn, *args)`` on a reader thread and await its result."""
+        return await asyncio.wrap_future(self._executor.submit(self._call, fn, args))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for conn in self._conns:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._conns.clear()
@@ -0,0 +1,150 @@
+"""Alert rule evaluation benchmark: 1,000 hosts x 8 GPUs per tick.
+
+Compares the old per-GPU Python branches (``legacy_check``, a copy of the
+pre-rule-table ``AlertEngine.check``, run once per host) with the compiled
+rule table evaluating every host in one pass, with and without NumPy.
+Hosts are generated so that a few percent of GPUs are alerting, which is
+what a healthy cluster looks like most of the time. Two scenarios:
+
+- ``drifting``: readings move a little every tick (the steady state), so
+  most alerts stay firing from one tick to the next;
+- ``re-drawn``: every value is drawn afresh each tick, so most alerts fire
+  and resolve on alternate ticks. This is the worst case for the lifecycle
+  tracking (lifecycle.py) that ``check_many`` includes and the legacy
+  branches never did.
+
+Usage: python scripts/bench_alert_rules.py --hosts 1000 --gpus 8 --ticks 20
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from monitor.alerting import AlertEngine  # noqa: E402
+from monitor.alerting import rule_table  # noqa: E402
+
+# System thresholds match the literals the legacy engine hardcoded, so both fire the same alerts
+CONFIG = {
+    'gpu_temperature_warn': 80, 'gpu_temperature_critical': 90, 'gpu_memory_usage_warn': 90,
+    'gpu_utilization_low': 10, 'cpu_usage_warn': 95, 'memory_usage_warn': 95, 'disk_usage_warn': 90,
+}
+
+
+def make_hosts(count: int, gpus: int, seed: int = 1):
+    rng = random.Random(seed)
+    return [
+        {
+            'hostname': f'node-{h:04d}',
+            'gpus': [
+                {'index': g, 'temperature': rng.gauss(65, 6), 'utilization': rng.uniform(8, 100),
+                 'memory_used': rng.uniform(0, 76000), 'memory_total': 81920.0, 'power': rng.uniform(80, 400)}
+                for g in range(gpus)
+            ],
+            'system': {'cpu_percent': rng.uniform(0, 100), 'memory_percent': rng.uniform(20, 95),
+                       'disk_percent': rng.uniform(30, 92)},
+        }
+        for h in range(count)
+    ]
+
+
+def drift(hosts, seed: int):
+    """Copy of ``hosts`` one tick later: every reading moves a little."""
+    rng = random.Random(seed)
+    return [
+        dict(host,
+             gpus=[dict(gpu, temperature=gpu['temperature'] + rng.gauss(0, 0.5),
+                        utilization=min(100.0, max(0.0, gpu['utilization'] + rng.gauss(0, 2))),
+                        memory_used=min(gpu['memory_total'], max(0.0, gpu['memory_used'] + rng.gauss(0, 300))))
+                   for gpu in host['gpus']],
+             system={key: min(100.0, max(0.0, value + rng.gauss(0, 1))) for key, value in host['system'].items()})
+        for host in hosts
+    ]
+
+
+def legacy_check(config, metrics):
+    alerts = []
+    hostname = metrics.get('hostname', 'unknown')
+    timestamp = datetime.now().isoformat()
+    for gpu in metrics.get('gpus', []):
+        i = gpu.get('index', 0)
+        temp = gpu.get('temperature', 0)
+        if temp >= config.get('gpu_temperature_critical', 90):
+            alerts.append({'timestamp': timestamp, 'hostname': hostname, 'name': f'gpu_{i}_temp_critical',
+                           'severity': 'critical', 'message': f'GPU {i} temperature critical: {temp}°C'})
+        elif temp >= config.get('gpu_temperature_warn', 80):
+            alerts.append({'timestamp': timestamp, 'hostname': hostname, 'name': f'gpu_{i}_temp_warn',
+                           'severity': 'warning', 'message': f'GPU {i} temperature warning: {temp}°C'})
+        mem_total = gpu.get('memory_total', 1)
+        mem_pct = (gpu.get('memory_used', 0) / mem_total * 100) if mem_total > 0 else 0
+        if mem_pct >= config.get('gpu_memory_usage_warn', 90):
+            alerts.append({'timestamp': timestamp, 'hostname': hostname, 'name': f'gpu_{i}_memory_high',
+                           'severity': 'warning', 'message': f'GPU {i} memory usage high: {mem_pct:.0f}%'})
+        util = gpu.get('utilization', 0)
+        if util < config.get('gpu_utilization_low', 10):
+            alerts.append({'timestamp': timestamp, 'hostname': hostname, 'name': f'gpu_{i}_idle',
+                           'severity': 'info', 'message': f'GPU {i} appears idle: {util}% utilization'})
+    sys_metrics = metrics.get('system', {})
+    for key, limit, name, severity in (('cpu_percent', 95, 'cpu_high', 'warning'),
+                                       ('memory_percent', 95, 'memory_high', 'critical'),
+                                       ('disk_percent', 90, 'disk_high', 'warning')):
+        if sys_metrics.get(key, 0) >= limit:
+            alerts.append({'timestamp': timestamp, 'hostname': hostname, 'name': name,
+                           'severity': severity, 'message': f'{key}: {sys_metrics[key]:.0f}%'})
+    return alerts
+
+
+def timed(fn, snapshots):
+    fn(snapshots[-1])  # warm-up
+    t0 = time.perf_counter()
+    for hosts in snapshots:
+        result = fn(hosts)
+    return (time.perf_counter() - t0) / len(snapshots), len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--hosts', type=int, default=1000)
+    parser.add_argument('--gpus', type=int, default=8)
+    parser.add_argument('--ticks', type=int, default=20)
+    args = parser.parse_args()
+
+    hosts = make_hosts(args.hosts, args.gpus)
+    drifting = [hosts]
+    for tick in range(1, args.ticks):
+        drifting.append(drift(drifting[-1], seed=tick))
+    scenarios = [('drifting', drifting),
+                 ('re-drawn', [make_hosts(args.hosts, args.gpus, seed=tick) for tick in range(args.ticks)])]
+
+    print(f"{args.hosts} hosts x {args.gpus} GPUs, mean of {args.ticks} ticks")
+    for scenario, snapshots in scenarios:
+        engine = AlertEngine(CONFIG)
+        legacy_s, legacy_n = timed(lambda hosts: [a for m in hosts for a in legacy_check(CONFIG, m)], snapshots)
+        table_s, table_n = timed(engine.check_many, snapshots)
+        eval_s, eval_n = timed(engine.rules.evaluate, snapshots)
+        rows = [('legacy (per-host branches)', legacy_s, legacy_n),
+                (f'rule table (numpy={rule_table.NUMPY_AVAILABLE})', table_s, table_n),
+                ('  of which rule evaluation', eval_s, eval_n)]
+
+        if rule_table.NUMPY_AVAILABLE:
+            rule_table.NUMPY_AVAILABLE = False
+            fallback = AlertEngine(CONFIG)
+            python_s, python_n = timed(fallback.check_many, snapshots)
+            python_eval_s, python_eval_n = timed(fallback.rules.evaluate, snapshots)
+            rule_table.NUMPY_AVAILABLE = True
+            rows += [('rule table (pure python)', python_s, python_n),
+                     ('  of which rule evaluation', python_eval_s, python_eval_n)]
+
+        print(f"{scenario} readings:")
+        for label, seconds, alerts in rows:
+            print(f"  {label:<32} {seconds * 1000:8.2f} ms/tick  {alerts:>5} alerts")
+        print(f"  speedup vs legacy: {legacy_s / table_s:.1f}x "
+              f"(rule evaluation alone: {legacy_s / eval_s:.1f}x)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Cluster poll benchmark against local agents.
+
+Starts ``--agents`` agent apps (``monitor.api.agent``) on consecutive ports
+from ``--port``, one uvicorn process each (with ``--dead``, plus a node at
+a blackholed address), then times ``ClusterAggregator.poll()``:
+
+- ``cold``: a fresh aggregator per round, so every node pays for a new
+  TCP connection;
+- ``keep-alive``: one aggregator reused across rounds.
+
+The blackholed node shows that a dead node costs its own timeout once
+per round, not once per node.
+
+Usage: python scripts/bench_cluster.py --agents 8 --rounds 50
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from monitor.collectors.cluster import ClusterAggregator, parse_nodes  # noqa: E402
+
+AGENT_CMD = ("import sys, uvicorn; from monitor.api.agent import create_agent_app; "
+             "uvicorn.run(create_agent_app({'monitoring': {'interval_seconds': 1}}), "
+             "host='127.0.0.1', port=int(sys.argv[1]), log_level='warning')")
+
+
+def wait_for_port(port: int, deadline: float):
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'agent on port {port} did not start')
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def run(nodes, rounds: int):
+    results = {}
+    cold = []
+    for _ in range(rounds):
+        aggregator = ClusterAggregator(nodes)
+        t0 = time.perf_counter()
+        await aggregator.poll()
+        cold.append(time.perf_counter() - t0)
+        await aggregator.stop()
+    results['cold'] = cold
+
+    aggregator = ClusterAggregator(nodes)
+    await aggregator.poll()
+    warm = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        view = await aggregator.poll()
+        warm.append(time.perf_counter() - t0)
+    await aggregator.stop()
+    results['keep-alive'] = warm
+    return results, view
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--agents', type=int, default=8)
+    parser.add_argument('--port', type=int, default=18091)
+    parser.add_argument('--rounds', type=int, default=50)
+    parser.add_argument('--dead', action='store_true', help='add a node that never answers (blackholed address)')
+    args = parser.parse_args()
+
+    ports = [args.port + i for i in range(args.agents)]
+    procs = [subprocess.Popen([sys.executable, '-c', AGENT_CMD, str(p)], cwd=BASE_DIR) for p in ports]
+    try:
+        deadline = time.monotonic() + 30
+        for port in ports:
+            wait_for_port(port, deadline)
+        specs = [f'127.0.0.1:{p}' for p in ports]
+        if args.dead:
+            # TEST-NET-1: connection attempts hang until the timeout
+            specs.append({'hostname': '192.0.2.1', 'port': 8091, 'timeout': 0.5})
+        nodes = parse_nodes(specs, default_timeout=2.0)
+
+        results, view = asyncio.run(run(nodes, args.rounds))
+        print(f"{args.agents} local agents{' + 1 blackholed node (0.5 s timeout)' if args.dead else ''}, "
+              f"{args.rounds} poll rounds")
+        for mode, values in results.items():
+            ms = [v * 1000 for v in values]
+            print(f"  {mode:10s} p50 {percentile(ms, 0.5):7.2f} ms  p99 {percentile(ms, 0.99):7.2f} ms")
+        statuses = {}
+        for entry in view['nodes']:
+            statuses[entry['status']] = statuses.get(entry['status'], 0) + 1
+        print(f"  last round: {statuses}, summary {view['summary']}")
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Host collector benchmark: psutil path vs the Linux /proc fast path.
+
+Times ``SystemCollector.collect()`` and ``NetworkCollector.collect()`` with
+``use_procfs=False`` (psutil only) and with the procfs fast path, after
+one warm-up call each.
+
+Usage: python scripts/bench_collectors.py --calls 5000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from monitor.collectors.network import NetworkCollector  # noqa: E402
+from monitor.collectors.procfs import PROCFS_AVAILABLE  # noqa: E402
+from monitor.collectors.system import SystemCollector  # noqa: E402
+
+
+def per_call_us(collector, calls: int) -> float:
+    collector.collect()
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        collector.collect()
+    return (time.perf_counter() - t0) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=5000)
+    args = parser.parse_args()
+
+    if not PROCFS_AVAILABLE:
+        print('procfs fast path unavailable on this platform; timing psutil only')
+    for cls in (SystemCollector, NetworkCollector):
+        psutil_us = per_call_us(cls(use_procfs=False), args.calls)
+        line = f"{cls.__name__:17s} psutil {psutil_us:7.1f} us"
+        if PROCFS_AVAILABLE:
+            procfs_us = per_call_us(cls(), args.calls)
+            line += f"   procfs {procfs_us:7.1f} us   ({psutil_us / procfs_us:.1f}x)"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Host overhead of benchmark-time GPU sampling.
+
+Compares the old benchmark sampler (one ``nvidia-smi`` fork every 100 ms
+for utilization plus one per stored sample) with the shared GPUSampler
+subscribed at 100 ms. Reports CPU seconds consumed by this process and its
+children per second of sampling.
+
+Runs anywhere with the stand-ins:
+
+    PATH="$PWD/scripts/fake-nvidia-smi:$PATH" MYGPU_FAKE_NVML=8 \\
+        python scripts/bench_gpu_sampler.py --seconds 10
+
+(The fake nvidia-smi is a Python script, so absolute fork costs are higher
+than the real binary's; the relative difference is what matters.)
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from monitor.collectors.gpu_sampler import GPUSampler  # noqa: E402
+
+
+def cpu_seconds() -> float:
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def bench_legacy(seconds: float, sample_interval: float) -> float:
+    start_cpu, start = cpu_seconds(), time.monotonic()
+    last_sample = 0.0
+    while time.monotonic() - start < seconds:
+        subprocess.run(['nvidia-smi', '--query-gpu=utilization.gpu', '--format=csv,noheader,nounits'],
+                       capture_output=True, text=True, timeout=5)
+        if time.monotonic() - last_sample >= sample_interval:
+            subprocess.run(['nvidia-smi', '--query-gpu=utilization.gpu,memory.used,memory.total,'
+                            'temperature.gpu,power.draw', '--format=csv,noheader,nounits'],
+                           capture_output=True, text=True, timeout=5)
+            last_sample = time.monotonic()
+        time.sleep(0.1)
+    return (cpu_seconds() - start_cpu) / seconds
+
+
+def bench_shared(seconds: float, sample_interval: float) -> float:
+    sampler = GPUSampler()
+    start_cpu, start = cpu_seconds(), time.monotonic()
+    with sampler.subscribe(0.1):
+        last_sample = 0.0
+        while time.monotonic() - start < seconds:
+            sampler.latest()
+            if time.monotonic() - last_sample >= sample_interval:
+                sampler.history(0, seconds=sample_interval)
+                last_sample = time.monotonic()
+            time.sleep(0.1)
+    print(f"shared   : source={sampler.source}, ticks={sampler.ticks}")
+    return (cpu_seconds() - start_cpu) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--sample-interval', type=float, default=0.5)
+    args = parser.parse_args()
+
+    legacy = bench_legacy(args.seconds, args.sample_interval)
+    shared = bench_shared(args.seconds, args.sample_interval)
+    print(f"legacy   : {legacy * 100:6.2f}% of one core")
+    print(f"shared   : {shared * 100:6.2f}% of one core")
+    if shared > 0:
+        print(f"reduction: {legacy / shared:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
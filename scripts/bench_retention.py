@@ -0,0 +1,95 @@
+"""Retention benchmark: row DELETE on one samples table vs dropping a day partition.
+
+Fills ``--days`` days of samples (``--series`` series at ``--interval``
+seconds) and times purging the oldest day both ways: the old
+``DELETE ... WHERE ts < ?`` on an unpartitioned table, and
+``MetricsStorage.drop_expired`` on day partitions.
+
+Usage: python scripts/bench_retention.py --days 3 --series 40 --interval 5
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from monitor.storage import partitions  # noqa: E402
+from monitor.storage.sqlite import MetricsStorage  # noqa: E402
+
+
+def sample_rows(days: int, series: int, interval: float, now_ms: int):
+    step = int(interval * 1000)
+    start = (now_ms // partitions.DAY_MS - days + 1) * partitions.DAY_MS
+    for ts in range(start, now_ms, step):
+        for sid in range(1, series + 1):
+            yield sid, ts, float(ts % 97)
+
+
+def bench_delete(path: str, rows, cutoff: int) -> float:
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('CREATE TABLE samples (series_id INTEGER NOT NULL, ts INTEGER NOT NULL, value REAL, '
+                 'PRIMARY KEY (series_id, ts)) WITHOUT ROWID')
+    with conn:
+        conn.executemany('INSERT INTO samples VALUES (?, ?, ?)', rows)
+    t0 = time.perf_counter()
+    with conn:
+        conn.execute('DELETE FROM samples WHERE ts < ?', (cutoff,))
+    elapsed = time.perf_counter() - t0
+    conn.close()
+    return elapsed
+
+
+def bench_drop(path: str, rows, series: int, now_ms: int) -> float:
+    storage = MetricsStorage(path)
+    asyncio.run(storage.initialize())
+    conn = storage.conn
+    with conn:
+        conn.execute("INSERT INTO hosts (id, hostname) VALUES (1, 'bench')")
+        conn.executemany("INSERT INTO series (id, host_id, metric_type, metric_name) VALUES (?, 1, 'bench', ?)",
+                         [(sid, f's{sid}') for sid in range(1, series + 1)])
+        by_table = {}
+        for row in rows:
+            by_table.setdefault(storage._partitions.table_for(row[1]), []).append(row)
+        for table, table_rows in by_table.items():
+            conn.executemany(f'INSERT INTO {table} VALUES (?, ?, ?)', table_rows)
+    # retention that expires exactly the oldest day
+    oldest_end = (now_ms // partitions.DAY_MS - len(by_table) + 2) * partitions.DAY_MS
+    hours = (now_ms - oldest_end) / 3_600_000 - 0.01
+    t0 = time.perf_counter()
+    dropped = storage.drop_expired(hours)
+    elapsed = time.perf_counter() - t0
+    storage.close()
+    assert len(dropped) == 1, dropped
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--days', type=int, default=3)
+    parser.add_argument('--series', type=int, default=40)
+    parser.add_argument('--interval', type=float, default=5.0)
+    args = parser.parse_args()
+
+    now_ms = int(time.time() * 1000)
+    rows = list(sample_rows(args.days, args.series, args.interval, now_ms))
+    cutoff = (now_ms // partitions.DAY_MS - args.days + 2) * partitions.DAY_MS
+    purged = sum(1 for row in rows if row[1] < cutoff)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        delete_s = bench_delete(os.path.join(tmp, 'delete.db'), rows, cutoff)
+        drop_s = bench_drop(os.path.join(tmp, 'drop.db'), rows, args.series, now_ms)
+
+    print(f"{len(rows):,} samples over {args.days} days, purging the oldest day ({purged:,} rows)")
+    print(f"  DELETE WHERE ts < ?   {delete_s * 1000:9.1f} ms")
+    print(f"  drop day partition    {drop_s * 1000:9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Ingest benchmark for MetricsStorage.
+
+Compares the old write path (one INSERT per metric into the wide text
+``metrics`` table, commit per snapshot, default rollback journal) with the
+buffered executemany path into the normalized ``samples`` table, and
+reports the resulting database sizes.
+
+Usage: python scripts/bench_storage.py --snapshots 2000 --gpus 8
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from monitor.storage.sqlite import MetricsStorage  # noqa: E402
+
+
+def make_snapshots(count: int, gpus: int):
+    start = datetime.now() - timedelta(seconds=count)
+    for i in range(count):
+        yield {
+            'timestamp': (start + timedelta(seconds=i)).isoformat(),
+            'hostname': 'bench-node',
+            'gpus': [
+                {'index': g, 'utilization': (i + g) % 100, 'memory_used': 1024.0 + g,
+                 'temperature': 40 + g, 'power': 150.0 + g}
+                for g in range(gpus)
+            ],
+            'system': {'cpu_percent': i % 100, 'memory_percent': 50.0, 'disk_percent': 70.0},
+        }
+
+
+def bench_legacy(path: str, snapshots) -> int:
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL, hostname TEXT NOT NULL, metric_type TEXT NOT NULL,
+            metric_name TEXT NOT NULL, metric_value REAL, metric_json TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )''')
+    rows = 0
+    for snap in snapshots:
+        for _, hostname, metric_type, metric_name, value in MetricsStorage._metric_rows(snap):
+            conn.execute('INSERT INTO metrics (timestamp, hostname, metric_type, metric_name, metric_value) '
+                         'VALUES (?, ?, ?, ?, ?)', (snap['timestamp'], hostname, metric_type, metric_name, value))
+            rows += 1
+        conn.commit()
+    conn.close()
+    return rows
+
+
+async def bench_buffered(path: str, snapshots) -> int:
+    storage = MetricsStorage(path)
+    await storage.initialize()
+    rows = 0
+    for snap in snapshots:
+        rows += len(MetricsStorage._metric_rows(snap))
+        await storage.store(snap)
+    storage.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--snapshots', type=int, default=2000)
+    parser.add_argument('--gpus', type=int, default=8)
+    args = parser.parse_args()
+
+    snaps = list(make_snapshots(args.snapshots, args.gpus))
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_db = os.path.join(tmp, 'legacy.db')
+        buffered_db = os.path.join(tmp, 'buffered.db')
+
+        t0 = time.perf_counter()
+        legacy_rows = bench_legacy(legacy_db, snaps)
+        legacy_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        buffered_rows = asyncio.run(bench_buffered(buffered_db, snaps))
+        buffered_s = time.perf_counter() - t0
+
+        legacy_size = os.path.getsize(legacy_db)
+        buffered_size = os.path.getsize(buffered_db)
+
+    legacy_rate = legacy_rows / legacy_s
+    buffered_rate = buffered_rows / buffered_s
+    print(f"legacy   : {legacy_rows:>8} rows in {legacy_s:7.3f}s  ({legacy_rate:,.0f} rows/s)")
+    print(f"buffered : {buffered_rows:>8} rows in {buffered_s:7.3f}s  ({buffered_rate:,.0f} rows/s)")
+    print(f"speedup  : {buffered_rate / legacy_rate:.1f}x")
+    print(f"db size  : legacy {legacy_size / 1024:,.0f} KiB, normalized {buffered_size / 1024:,.0f} KiB")
+
+
+if __name__ == '__main__':
+    main()
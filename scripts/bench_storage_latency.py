@@ -0,0 +1,162 @@
+"""Request latency while MetricsStorage is writing.
+
+Runs on one event loop, the way the FastAPI app does:
+
+- a writer feeds ``--hosts`` snapshots of ``--gpus`` GPUs every
+  ``--interval`` seconds into ``MetricsStorage.store``;
+- a client fires a request every ``--every`` ms, alternating between a
+  ``status`` request (no database, it only waits for the loop) and a
+  ``history`` request (``MetricsStorage.query`` with a point budget).
+
+Each request is timed from when it was due until it completes, so time
+spent waiting for a blocked loop counts. Two modes are compared:
+
+- ``inline``: every SQLite call runs on the event loop thread with one
+  shared connection, as before the writer thread existed;
+- ``threaded``: the writer thread plus the read-only connection pool.
+
+Usage: python scripts/bench_storage_latency.py --seconds 20 --hosts 16 --gpus 8
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import Future
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from monitor.storage.sqlite import MetricsStorage  # noqa: E402
+
+
+class InlineWriter:
+    """Runs writer jobs on the calling thread."""
+
+    pending = 0
+
+    def submit(self, fn, *args) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    async def run(self, fn, *args):
+        return fn(*args)
+
+    def call(self, fn, *args):
+        return fn(*args)
+
+    def stop(self):
+        pass
+
+
+class InlineReaders:
+    """Runs reader jobs on the calling thread with the shared write connection."""
+
+    def __init__(self, storage: MetricsStorage):
+        self.storage = storage
+
+    async def run(self, fn, *args):
+        return fn(self.storage.conn, *args)
+
+    def close(self):
+        pass
+
+
+def snapshot(host: int, gpus: int, i: int):
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'hostname': f'node-{host:03d}',
+        'gpus': [{'index': g, 'utilization': (i + g) % 100, 'memory_used': 1024.0 + g,
+                  'temperature': 40 + (i + g) % 30, 'power': 150.0 + g} for g in range(gpus)],
+        'system': {'cpu_percent': i % 100, 'memory_percent': 50.0, 'disk_percent': 70.0},
+    }
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def run(mode: str, path: str, args) -> dict:
+    storage = MetricsStorage(path, flush_interval=args.flush_interval, flush_rows=args.flush_rows,
+                             sample_interval=args.interval)
+    await storage.initialize()
+    if mode == 'inline':
+        storage._writer.stop()
+        storage._writer = InlineWriter()
+        storage._readers.close()
+        storage._readers = InlineReaders(storage)
+
+    # history to query against
+    for i in range(args.warmup):
+        for host in range(args.hosts):
+            storage._pending.extend(MetricsStorage._metric_rows(snapshot(host, args.gpus, i)))
+    await asyncio.wrap_future(storage.flush())
+
+    stop = time.perf_counter() + args.seconds
+    latencies = {'status': [], 'history': []}
+
+    async def writer():
+        i = 0
+        while time.perf_counter() < stop:
+            for host in range(args.hosts):
+                await storage.store(snapshot(host, args.gpus, i))
+            i += 1
+            await asyncio.sleep(args.interval)
+
+    async def request(kind: str, due: float):
+        if kind == 'history':
+            await storage.query(hostname='node-000', metric_name='gpu_0_utilization', hours=1, max_points=500)
+        else:
+            await asyncio.sleep(0)
+        latencies[kind].append(time.perf_counter() - due)
+
+    async def client():
+        pending = []
+        n = 0
+        due = time.perf_counter()
+        while due < stop:
+            kind = 'history' if n % 2 else 'status'
+            pending.append(asyncio.ensure_future(request(kind, due)))
+            n += 1
+            due += args.every / 1000
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        await asyncio.gather(*pending)
+
+    await asyncio.gather(writer(), client())
+    storage.close()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--hosts', type=int, default=16)
+    parser.add_argument('--gpus', type=int, default=8)
+    parser.add_argument('--interval', type=float, default=1.0, help='seconds between snapshot rounds')
+    parser.add_argument('--every', type=float, default=10, help='ms between requests')
+    parser.add_argument('--warmup', type=int, default=600, help='snapshot rounds stored before timing')
+    parser.add_argument('--flush-interval', type=float, default=10.0)
+    parser.add_argument('--flush-rows', type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{args.hosts} hosts x {args.gpus} GPUs every {args.interval}s, "
+          f"a request every {args.every:g} ms for {args.seconds:g}s")
+    for mode in ('inline', 'threaded'):
+        with tempfile.TemporaryDirectory() as tmp:
+            latencies = asyncio.run(run(mode, os.path.join(tmp, 'latency.db'), args))
+        for kind, values in latencies.items():
+            ms = [v * 1000 for v in values]
+            print(f"  {mode:8s} {kind:8s} n={len(ms):5d}  p50 {percentile(ms, 0.5):7.2f} ms  "
+                  f"p99 {percentile(ms, 0.99):7.2f} ms  max {max(ms):7.2f} ms")
+
+
+if __name__ == '__main__':
+    main()